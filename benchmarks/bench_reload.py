@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""bench_reload module. Measures what a reload of file.json spends in the
+parsing of the entries and in the creation of the objects, and what the
+parent process would spend to receive the entries parsed by another
+process (unpickling them) instead of parsing them itself
+file name: bench_reload.py
+
+usage: python3 -m benchmarks.bench_reload [number of places]
+"""
+import os
+import pickle
+import sys
+import tempfile
+from datetime import datetime
+from json import loads
+from benchmarks.bench_snapshot import places, timed
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def main(count) -> None:
+    """prints the results for count places"""
+    objs = places(count)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "file.json")
+        fs = FileStorage(path)
+        for obj in objs:
+            fs.new(obj)
+        fs.save()
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [line.rstrip().rstrip(",") for line in f][1:-1]
+        entries = [line.partition(": ") for line in lines]
+
+        def parse() -> list:
+            """parses the entries and their datetimes"""
+            parsed = []
+            for k, _, text in entries:
+                value = loads(text)
+                for name in ("created_at", "updated_at"):
+                    value[name] = datetime.fromisoformat(value[name])
+                parsed.append((loads(k), value, text))
+            return parsed
+        parsed = parse()
+        payload = pickle.dumps(parsed, pickle.HIGHEST_PROTOCOL)
+        values = [v for _, v, _ in parsed]
+        results = (
+            ("reload", timed(lambda: FileStorage(path).reload())),
+            ("lazy reload",
+             timed(lambda: FileStorage(path, lazy=True).reload())),
+            ("parse", timed(parse)),
+            ("create", timed(lambda: [Place(**v) for v in values])),
+            ("unpickle parsed", timed(lambda: pickle.loads(payload))),
+            )
+    print("{} places, {:.1f} MB pickled".format(count, len(payload) / 1e6))
+    for name, elapsed in results:
+        print("{:<16}{:>9.2f}s".format(name, elapsed))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 60000)
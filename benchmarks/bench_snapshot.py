@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+"""bench_snapshot module. Compares the JSON and binary snapshot layouts
+of FileStorage: size of the file, time of save and reload, and time of
+the encoding and decoding of the fragments alone
+file name: bench_snapshot.py
+
+usage: python3 -m benchmarks.bench_snapshot [number of places]
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from json import dumps, loads
+from time import perf_counter
+from uuid import uuid4
+from models.engine import binary_snapshot
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def places(count) -> list:
+    """returns count places with every field set"""
+    start = datetime(2017, 9, 28, 21, 5, 54, 119427)
+    cities = [str(uuid4()) for _ in range(50)]
+    users = [str(uuid4()) for _ in range(500)]
+    return [Place(id=str(uuid4()),
+                  created_at=start + timedelta(seconds=i),
+                  updated_at=start + timedelta(seconds=2 * i),
+                  city_id=cities[i % len(cities)],
+                  user_id=users[i % len(users)],
+                  name="Place {}".format(i),
+                  description="A cosy place number {} near the centre, "
+                  "with a garden and a view".format(i),
+                  number_rooms=i % 5 + 1, number_bathrooms=i % 3 + 1,
+                  max_guest=i % 8 + 1, price_by_night=50 + i % 200,
+                  latitude=48.0 + i % 1000 / 1000,
+                  longitude=2.0 + i % 700 / 1000,
+                  amenity_ids=[]) for i in range(count)]
+
+
+def timed(func) -> float:
+    """returns the best of 3 runs of func, in seconds"""
+    best = None
+    for _ in range(3):
+        start = perf_counter()
+        func()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_storage(objs, directory, snapshot_format) -> tuple:
+    """returns the size of the snapshot, the time of a full save and the
+    time of a reload of objs in snapshot_format
+    """
+    path = os.path.join(directory, "file." + snapshot_format)
+    fs = FileStorage(path, snapshot_format=snapshot_format)
+    for obj in objs:
+        fs.new(obj)
+
+    def save():
+        """rewrites every object"""
+        fs.all().update({})
+        for obj in objs:
+            fs.touch(obj)
+        fs.save()
+    save_time = timed(save)
+    reload_time = timed(
+        lambda: FileStorage(path, snapshot_format=snapshot_format).reload())
+    return os.path.getsize(path), save_time, reload_time
+
+
+def bench_fragments(objs) -> dict:
+    """returns the time of the encoding and decoding of the fragments of
+    objs in both layouts, without creating the objects
+    """
+    dicts = [("Place." + obj.id, obj.to_dict()) for obj in objs]
+    texts = [dumps(values) for _, values in dicts]
+    records = [binary_snapshot.encode_record(k, values)
+               for k, values in dicts]
+    return {
+        "json": (timed(lambda: [dumps(values) for _, values in dicts]),
+                 timed(lambda: [loads(text) for text in texts])),
+        "binary": (timed(lambda: [binary_snapshot.encode_record(k, values)
+                                  for k, values in dicts]),
+                   timed(lambda: [binary_snapshot.decode_record(
+                       "Place", record) for record in records])),
+        }
+
+
+def main(count) -> None:
+    """prints the results for count places"""
+    objs = places(count)
+    print("{} places".format(count))
+    print("{:<8}{:>12}{:>10}{:>10}{:>10}{:>10}".format(
+        "format", "size (MB)", "save", "reload", "encode", "decode"))
+    fragments = bench_fragments(objs)
+    with tempfile.TemporaryDirectory() as directory:
+        for snapshot_format in ("json", "binary"):
+            size, save, reload = bench_storage(objs, directory,
+                                               snapshot_format)
+            encode, decode = fragments[snapshot_format]
+            print("{:<8}{:>12.1f}{:>9.2f}s{:>9.2f}s{:>9.2f}s{:>9.2f}s"
+                  .format(snapshot_format, size / 1e6, save, reload,
+                          encode, decode))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 60000)
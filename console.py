@@ -8,13 +8,7 @@ import re
 from json import loads
 from json.decoder import JSONDecodeError
 from typing import Union
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.amenity import Amenity
-from models.place import Place
-from models.review import Review
+from models.base_model import registry
 from models import storage
 
 
@@ -25,22 +19,6 @@ class HBNBCommand(cmd.Cmd):
     """
     prompt = "(hbnb) "
 
-    _models = {
-        "BaseModel": BaseModel,
-        "User": User,
-        "State": State,
-        "City": City,
-        "Amenity": Amenity,
-        "Place": Place,
-        "Review": Review
-        }
-    str_attr = ["name", "amenity_id", "place_id", "state_id",
-                "user_id", "city_id", "description", "text",
-                "email", "password", "first_name", "last_name"]
-    int_attr = ["number_rooms", "number_bathrooms",
-                "max_guest", "price_by_night"]
-    float_attr = ["latitude", "longitude"]
-
     patterns = {"all": re.compile(r'(.*)\.(.*)\((.*)\)'),
 
                 # id, attribute, value
@@ -52,12 +30,14 @@ class HBNBCommand(cmd.Cmd):
     def do_quit(self, arg) -> bool:
         """quit command to exit the program
         """
+        storage.flush()
         return True
 
     # pylint: disable-next=unused-argument
     def do_EOF(self, arg) -> bool:
         """EOF or Ctrl-D command to exit the program
         """
+        storage.flush()
         return True
 
     def emptyline(self) -> bool:
@@ -127,7 +107,7 @@ class HBNBCommand(cmd.Cmd):
         args = shlex.split(arg)
         if not self.validate_cls(args):
             return
-        instance = self._models[args[0]]()
+        instance = registry[args[0]]()
         storage.save()
         print(instance.id)
 
@@ -155,7 +135,7 @@ class HBNBCommand(cmd.Cmd):
         args = shlex.split(arg)
         if not (self.validate_cls(args) and self.validate_id(args)):
             return
-        del storage.all()[args[0] + "." + args[1]]
+        storage.delete(storage.all()[args[0] + "." + args[1]])
         storage.save()
 
     def count(self, arg) -> None:
@@ -168,12 +148,7 @@ class HBNBCommand(cmd.Cmd):
 
         if not self.validate_cls(args):
             return
-        res = 0
-        if len(args) > 0:
-            for k in storage.all():
-                if args[0] == k.split(".")[0]:
-                    res += 1
-        print(res)
+        print(storage.count(args[0]))
 
     def do_all(self, arg) -> None:
         """Prints all string representation of all instances
@@ -189,9 +164,8 @@ class HBNBCommand(cmd.Cmd):
         if len(args) > 0:
             if not self.validate_cls(args):
                 return
-            for k, v in storage.all().items():
-                if args[0] == k.split(".")[0]:
-                    res.append(str(v))
+            for v in storage.all(args[0]).values():
+                res.append(str(v))
         else:
             for k, v in storage.all().items():
                 res.append(str(v))
@@ -227,15 +201,12 @@ class HBNBCommand(cmd.Cmd):
 
         instance = storage.all()[key]
 
-        if args[2] in self.int_attr:
-            setattr(instance,
-                    args[2], int(match))
-        elif args[2] in self.str_attr:
-            setattr(instance, args[2], str(match))
-        elif args[2] in self.float_attr:
-            setattr(instance, args[2], float(match))
-        else:
-            setattr(instance, args[2], self.type_cast(match))
+        # the fields are converted to the type of their default (the
+        # type of the field in the other models when the class does not
+        # declare it), the other attributes to the type the value looks
+        # like
+        coerce = instance.coercer(args[2], self.type_cast)
+        setattr(instance, args[2], coerce(match))
         storage.save()
 
     def type_cast(self, arg) -> Union[float, int, str]:
@@ -255,7 +226,7 @@ class HBNBCommand(cmd.Cmd):
         if len(args) < 1:
             print("** class name missing **")
             return False
-        if args[0] not in self._models:
+        if args[0] not in registry:
             print("** class doesn't exist **")
             return False
         return True
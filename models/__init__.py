@@ -1,7 +1,29 @@
 """models init
-initializes the file storage by reloading the objects
+creates the storage engine chosen by HBNB_STORAGE_ENGINE (see
+models/engine/base_storage.py) and reloads the objects
+HBNB_STORAGE_ENGINE=file (default) keeps the objects in file.json
+HBNB_STORAGE_ENGINE=db keeps them in the SQLite database HBNB_STORAGE_DB
+(default file.db)
+HBNB_STORAGE_ENGINE=memory keeps them in memory only
+The file engine is configured by:
+HBNB_STORAGE_JOURNAL=1 turns on the append-only journal of FileStorage
+HBNB_STORAGE_COMPACT_SIZE=<bytes> and HBNB_STORAGE_COMPACT_RATIO=<ratio>
+(journal size / snapshot size) start the background compaction of the
+journal into a new snapshot
+HBNB_STORAGE_SHARDED=1 keeps one file per class instead of file.json
+HBNB_STORAGE_WRITE_BEHIND=<seconds> writes the saved changes in the
+background at most every <seconds>
+HBNB_STORAGE_LAZY=1 only creates the objects when they are first read
+HBNB_STORAGE_DURABILITY=none|batch|always chooses when writes are fsynced
+HBNB_STORAGE_FORMAT=json|binary chooses the layout of the written snapshot
+HBNB_STORAGE_COMPRESSION=gzip|xz compresses it to file.json.gz/file.json.xz
+HBNB_STORAGE_TEXT_INDEX=1 keeps the full-text indexes in file.json.text
+HBNB_LAZY_DATETIMES=1 only parses the dates of an object when first read
+(see models/base_model.py)
 """
-from models.engine.file_storage import FileStorage
+# the model modules add their classes to base_model.registry
+from models import amenity, city, place, review, state, user
+from models.engine import base_storage
 
-storage = FileStorage()
+storage = base_storage.create()
 storage.reload()
@@ -2,44 +2,319 @@
 """base_model module. Contains class BaseModel
 All other classes will inherit from this class
 """
+import os
 from uuid import uuid4
 from datetime import datetime
 import models
 
+# HBNB_LAZY_DATETIMES=1: the created_at/updated_at strings given to
+# __init__ are only parsed when first read (see _Timestamp)
+lazy_datetimes = os.environ.get("HBNB_LAZY_DATETIMES") == "1"
 
-class BaseModel:
+# the model classes by name, every class of ModelType is added to it
+# when created: the console and the storage engines find them there
+registry = {}
+
+# the function converting the strings given to the fields whose default
+# is of one of these types, by type
+_COERCERS = {str: str, int: int, float: float}
+
+
+class _Timestamp:
+    """descriptor of created_at and updated_at, kept in the private slot
+    of the same name (__created_at, __updated_at). A string stored there,
+    the ISO format given to __init__ in lazy mode, is parsed into a
+    datetime when first read and replaced by it. Strings that are not in
+    ISO format are returned as they are
+    """
+    __slots__ = ("slot",)
+
+    def __set_name__(self, owner, name) -> None:
+        """finds the private slot of the attribute name of owner"""
+        self.slot = owner.__dict__["_{}__{}".format(owner.__name__, name)]
+
+    def __get__(self, obj, owner=None):
+        """returns the datetime of obj, parsing it if needed"""
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj)
+        if type(value) is str:
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return value
+            self.slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value) -> None:
+        """sets the datetime (or ISO string) of obj"""
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj) -> None:
+        """deletes the datetime of obj"""
+        self.slot.__delete__(obj)
+
+
+class ModelType(type):
+    """ModelType class, the metaclass of the models: the fields of a
+    model, its public class attributes that are neither methods nor
+    properties, become slots of its instances and the class values their
+    defaults. An instance then holds its fields in its slots, without a
+    dictionary of its own. Every model class is added to registry
+
+    Attributes (of every model class):
+        _defaults (private, class attribute): dictionary -
+                            the default of every field by name
+        _fields (private, class attribute): tuple -
+                            the (name, slot) of every field, the fields
+                            of the base classes first (the private slot
+                            of created_at and updated_at)
+        _schema (private, class attribute): dictionary -
+                            the function converting a string to the
+                            type of the field, by name, for the fields
+                            whose default is a string or a number
+    """
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        """creates the model class name, turning its fields into slots
+        """
+        fields = {k: v for k, v in namespace.items()
+                  if not k.startswith("_") and not hasattr(v, "__get__")}
+        for field in fields:
+            del namespace[field]
+        namespace["__slots__"] = tuple(namespace.get("__slots__", ())) + \
+            tuple(fields)
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+        cls._defaults = {}
+        slots = {}
+        for base in reversed(cls.__mro__[:-1]):
+            cls._defaults.update(base.__dict__.get("_defaults", {}))
+            for k in base.__dict__.get("__slots__", ()):
+                timestamp = base.__dict__.get(k.lstrip("_"))
+                if isinstance(timestamp, _Timestamp):
+                    slots[k.lstrip("_")] = timestamp.slot
+                elif not k.startswith("_"):
+                    slots[k] = base.__dict__[k]
+        cls._defaults.update(fields)
+        cls._fields = tuple(slots.items())
+        cls._schema = {k: _COERCERS[type(v)]
+                       for k, v in cls._defaults.items()
+                       if type(v) in _COERCERS}
+        registry[name] = cls
+        return cls
+
+
+class BaseModel(metaclass=ModelType):
     """BaseModel class
 
+    The fields of the models are kept in slots (see ModelType), the other
+    attributes in a dictionary created by the first of them. With
+    HBNB_LAZY_DATETIMES=1 the created_at and updated_at strings given to
+    __init__ are kept as they are: parsed when first read, written back
+    unchanged by to_dict if they never were
+
     Attributes:
         id (public, instance attribute): string uuid4
-        created_at (public, instance attribute): datetime
-        updated_at (public, instance attribute): datetime
+        created_at (public, instance attribute): datetime (see _Timestamp)
+        updated_at (public, instance attribute): datetime (see _Timestamp)
+        __extra (private, instance attribute): dictionary -
+                    the attributes that are not fields, None until
+                    the first one is set
+        __cache (private, instance attribute): dictionary -
+                    the dictionary returned by to_dict, None until it
+                    is first called and after every change
+        __text (private, instance attribute): string -
+                    the string returned by __str__, None until it
+                    is first called and after every change
+        __storage (private, instance attribute): BaseStorage -
+                    the engine holding the instance (see set_storage),
+                    told of its changes. None until it is stored: the
+                    changes then go to models.storage
     Methods:
         save: updates the public instance attribute updated_at
                 with the current datetime
         to_dict: returns a dictionary containing all keys/values of
-                __dict__ of the instance
+                the attributes of the instance, kept until the
+                next change unless told otherwise
+        attributes: returns the dictionary of the attributes set on
+                the instance
+        default: returns the default of a field of the class
+        coercer: returns the function converting a string to the type
+                of a field of the class
+        __getstate__/__setstate__: pickle and copy the attributes set
+        __setattr__/__delattr__: marks the instance as modified
+                in the engine holding it
+        __str__: returns the string representation of the instance,
+                kept until the next change
     """
+    __slots__ = ("id", "__created_at", "__updated_at", "__extra",
+                 "__cache", "__text", "__storage")
+    created_at = _Timestamp()
+    updated_at = _Timestamp()
+
     def __init__(self, **kwargs) -> None:
         """Initialization of BaseModel Class"""
+        _extra.__set__(self, None)
+        _storage.__set__(self, None)
+        self.__changed()
         if not kwargs:
             self.id = str(uuid4())
             self.created_at = datetime.now()
             self.updated_at = datetime.now()
             models.storage.new(self)
         else:
+            # not stored yet: set the attributes without the storage hook
             for k, v in kwargs.items():
                 if k == "__class__":
                     continue
                 if k in ["created_at", "updated_at"]:
-                    setattr(self, k, datetime.fromisoformat(v))
-                else:
-                    setattr(self, k, v)
+                    if isinstance(v, str) and not lazy_datetimes:
+                        v = datetime.fromisoformat(v)
+                try:
+                    object.__setattr__(self, k, v)
+                except AttributeError:
+                    self.__dict__[k] = v
+
+    def __changed(self) -> None:
+        """drops the dictionary of to_dict and the string of __str__,
+        built again when next needed
+        """
+        _cache.__set__(self, None)
+        _text.__set__(self, None)
+
+    def __store(self, name, value) -> None:
+        """sets the attribute name in its slot if it is a field, in the
+        dictionary of the other attributes otherwise
+        """
+        try:
+            object.__setattr__(self, name, value)
+        except AttributeError:
+            self.__dict__[name] = value
+
+    @property
+    def __dict__(self) -> dict:
+        """the dictionary of the attributes that are not fields, created
+        when first read. It may be changed by the caller: the dictionary
+        of to_dict is built again
+        """
+        if self.__extra is None:
+            _extra.__set__(self, {})
+        self.__changed()
+        return self.__extra
+
+    def __getattr__(self, name):
+        """returns the attribute name when it is not a set field: the
+        default of the field, or the attribute if it is not a field
+        """
+        defaults = type(self)._defaults
+        if name in defaults:
+            return defaults[name]
+        extra = _extra.__get__(self)
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError("{!r} object has no attribute {!r}".format(
+            type(self).__name__, name))
+
+    def __touch(self) -> None:
+        """tells the engine holding the instance (models.storage when
+        none recorded it) that the instance has been modified
+        """
+        storage = self.__storage
+        (models.storage if storage is None else storage).touch(self)
+
+    def __setattr__(self, name, value) -> None:
+        """sets the attribute and tells the storage that
+        the instance has been modified
+        """
+        self.__store(name, value)
+        self.__changed()
+        self.__touch()
+
+    def __delattr__(self, name) -> None:
+        """deletes the attribute and tells the storage that
+        the instance has been modified
+        """
+        try:
+            super().__delattr__(name)
+        except AttributeError:
+            if name not in (self.__extra or {}):
+                raise
+            del self.__extra[name]
+        self.__changed()
+        self.__touch()
 
     def __str__(self) -> str:
-        """returns the string representation of the class instance
+        """returns the string representation of the class instance,
+        kept until an attribute is set or deleted (see to_dict)
+        """
+        text = self.__text
+        if text is None:
+            text = f"[{self.__class__.__name__}] ({self.id}) " \
+                f"{self.attributes()}"
+            _text.__set__(self, text)
+        return text
+
+    def __values(self) -> dict:
+        """returns the dictionary of the attributes set on the instance
+        as they are stored, the dates not parsed yet included
+        """
+        attributes = {}
+        for name, slot in self._fields:
+            try:
+                attributes[name] = slot.__get__(self)
+            except AttributeError:
+                pass
+        if self.__extra:
+            attributes.update(self.__extra)
+        return attributes
+
+    def attributes(self) -> dict:
+        """returns the dictionary of the attributes set on the instance:
+        its fields in the order of the class, then the other attributes.
+        The fields never set are left out
+        """
+        attributes = self.__values()
+        for name in ("created_at", "updated_at"):
+            if type(attributes.get(name)) is str:
+                attributes[name] = getattr(self, name)
+        return attributes
+
+    def __getstate__(self) -> dict:
+        """returns the attributes set on the instance, for pickle and copy
+        """
+        return self.__values()
+
+    def __setstate__(self, state) -> None:
+        """sets the attributes state on an instance created by pickle
+        or copy
+        """
+        _extra.__set__(self, None)
+        _storage.__set__(self, None)
+        self.__changed()
+        for k, v in state.items():
+            self.__store(k, v)
+
+    @classmethod
+    def default(cls, name):
+        """returns the default of the field name of the class, None if
+        name is not a field with a default
+        """
+        return cls._defaults.get(name)
+
+    @classmethod
+    def coercer(cls, name, default=None):
+        """returns the function converting a string to the type of the
+        field name of the class. When the class has no such field, the
+        type of the field name of the other models (str when they do not
+        agree), default if no model has a field name whose default is a
+        string or a number
         """
-        return f"[{self.__class__.__name__}] ({self.id}) {self.__dict__}"
+        coerce = cls._schema.get(name)
+        if coerce is None:
+            found = {model._schema[name] for model in registry.values()
+                     if name in model._schema}
+            coerce = found.pop() if len(found) == 1 else \
+                str if found else default
+        return coerce
 
     def save(self) -> None:
         """updates the public instance attribute updated_at
@@ -48,14 +323,42 @@ class BaseModel:
         self.updated_at = datetime.now()
         models.storage.save()
 
-    def to_dict(self) -> dict:
+    def to_dict(self, cache=True) -> dict:
         """returns a dictionary containing all keys/values of
-        __dict__ of the instance
+        the attributes of the instance, the dates never parsed written
+        back as they were read. The dictionary is built once and copied
+        until an attribute is set or deleted: the values changed in
+        place (ex: a list appended to) are only seen after that.
+        With cache False a dictionary built is not kept (the storage
+        engines, which keep the serialized form themselves)
         """
-        my_dict = self.__dict__.copy()
+        my_dict = self.__cache
+        if my_dict is not None:
+            return dict(my_dict)
+        my_dict = self.__values()
         my_dict["__class__"] = self.__class__.__name__
         if isinstance(my_dict["created_at"], datetime):
             my_dict["created_at"] = my_dict["created_at"].isoformat()
         if isinstance(my_dict["updated_at"], datetime):
             my_dict["updated_at"] = my_dict["updated_at"].isoformat()
-        return my_dict
+        if not cache:
+            return my_dict
+        _cache.__set__(self, my_dict)
+        return dict(my_dict)
+
+
+# the slots of the other attributes, of the results of to_dict and
+# __str__ and of the engine, read and set without calling __getattr__
+# and __setattr__
+_extra = BaseModel._BaseModel__extra
+_cache = BaseModel._BaseModel__cache
+_text = BaseModel._BaseModel__text
+_storage = BaseModel._BaseModel__storage
+
+
+def set_storage(obj, storage) -> None:
+    """records storage as the engine holding the model instance obj,
+    the one its changes are reported to. Called by the engines when obj
+    is added to them or created from what they read
+    """
+    _storage.__set__(obj, storage)
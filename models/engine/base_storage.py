@@ -0,0 +1,252 @@
+#!/usr/bin/python3
+"""base_storage module. Contains the BaseStorage interface of the
+storage engines and the registry they are created from
+file name: base_storage.py
+"""
+from abc import ABC, abstractmethod
+from importlib import import_module
+import os
+from models.engine.columns import aggregate, check_aggregation
+from models.engine.indexes import COORDINATES, SPATIAL_KEYS, TEXT_KEYS, \
+    GridIndex, SortedIndex, TextIndex, distance, in_box, radius_box
+
+# engine name: class or "<module>.<class name>" imported on first use
+_engines = {
+    "file": "models.engine.file_storage.FileStorage",
+    "db": "models.engine.db_storage.DBStorage",
+    "memory": "models.engine.memory_storage.MemoryStorage",
+    }
+
+
+class BaseStorage(ABC):
+    """BaseStorage class, what BaseModel and the console expect from
+    a storage engine
+
+    Methods:
+        all(self, cls): returns the dictionary of the objects by
+                    <class name>.id, of one class only if given
+        count(self, cls): returns the number of objects (of a class)
+        lookup(self, cls, attr, value): returns the objects of a class
+                    whose attribute is value (ex: the cities of a state)
+        lookup_range(self, cls, attr, low, high): returns the objects of
+                    a class whose attribute is a number between low and
+                    high, by ascending value (ex: the places by price)
+        lookup_box(self, cls, south, west, north, east): returns the
+                    objects of a class inside a latitude/longitude box
+        lookup_radius(self, cls, latitude, longitude, km): returns the
+                    objects of a class within km kilometers of a point,
+                    nearest first
+        search(self, cls, query, prefix, attrs): returns the objects of
+                    a class whose text holds the words of query, best
+                    match first (ex: the places with a pool)
+        aggregate(self, cls, attr, func, by, q, groups): returns the
+                    sum, mean, min, max, percentile or count of an
+                    attribute of a class, by value of another attribute
+                    (ex: the mean price of the places of each city)
+        query(self, cls): returns a Query on the objects of a class
+        new(self, obj): adds obj to the objects
+        delete(self, obj): removes obj from the objects
+        touch(self, obj): marks a stored obj as modified
+        save(self): persists the objects
+        flush(self): writes what save left pending
+        reload(self): reads the persisted objects
+        close(self): releases the resources of the engine
+        from_env(cls, environ): creates the engine configured by
+                    the environment variables
+    """
+    @abstractmethod
+    def all(self, cls=None) -> dict:
+        """returns the dictionary of the objects by <class name>.id,
+        with a class (or class name) a new dictionary holding the
+        objects of that class only
+        """
+
+    def count(self, cls=None) -> int:
+        """returns the number of objects, of the class cls (or
+        class name) only if given
+        """
+        return len(self.all(cls))
+
+    def lookup(self, cls, attr, value) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        attribute attr is value by key. Engines that index the
+        relationships (indexes.FOREIGN_KEYS) override it
+        """
+        return {k: v for k, v in self.all(cls).items()
+                if getattr(v, attr, None) == value}
+
+    def lookup_range(self, cls, attr, low=None, high=None) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        attribute attr is a number between low and high included (no
+        bound when None) by key, by ascending value. Engines that keep
+        the values sorted (indexes.RANGE_KEYS) override it
+        """
+        found = []
+        for k, v in self.all(cls).items():
+            value = getattr(v, attr, None)
+            if SortedIndex.indexable(value) and \
+                    (low is None or value >= low) and \
+                    (high is None or value <= high):
+                found.append((value, k, v))
+        return {k: v for _, k, v in sorted(found, key=lambda f: f[:2])}
+
+    def lookup_box(self, cls, south, west, north, east) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        latitude and longitude (indexes.SPATIAL_KEYS) are inside the box,
+        which crosses the antimeridian when west > east. Engines that
+        index the coordinates override it
+        """
+        attrs = SPATIAL_KEYS.get(class_name(cls), COORDINATES)
+        found = {}
+        for k, v in self.all(cls).items():
+            point = tuple(getattr(v, a, None) for a in attrs)
+            if GridIndex.indexable(point) and \
+                    in_box(point, south, west, north, east):
+                found[k] = v
+        return found
+
+    def lookup_radius(self, cls, latitude, longitude, km) -> dict:
+        """returns the objects of the class cls (or class name) within
+        km kilometers of (latitude, longitude), nearest first
+        """
+        attrs = SPATIAL_KEYS.get(class_name(cls), COORDINATES)
+        found = []
+        for k, v in self.lookup_box(
+                cls, *radius_box(latitude, longitude, km)).items():
+            d = distance((latitude, longitude),
+                         tuple(getattr(v, a) for a in attrs))
+            if d <= km:
+                found.append((d, k, v))
+        return {k: v for _, k, v in sorted(found, key=lambda f: f[:2])}
+
+    def search(self, cls, query, prefix=False, attrs=None) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        text attributes attrs (default indexes.TEXT_KEYS) hold every
+        word of query, the last one being the start of a word when
+        prefix is True (search as you type), best match first. Engines
+        that index the text override it
+        """
+        attrs = text_attributes(class_name(cls), attrs)
+        objects = self.all(cls)
+        index = TextIndex(attrs)
+        index.build((k, tuple(getattr(v, a, None) for a in attrs))
+                    for k, v in objects.items())
+        return {k: objects[k] for k in index.search(query, prefix)}
+
+    def aggregate(self, cls, attr, func="sum", by=None, q=50,
+                  groups=None):
+        """returns func (see columns.FUNCTIONS) of the numbers of the
+        attribute attr of the objects of the class cls (or class name),
+        the number of objects for count when attr is None, q being the
+        percentile. With by, returns a dictionary of the results by value
+        of the attribute by, each value going through the dictionary
+        groups if given (ex: the state of each city). Engines that keep
+        the attributes in columns (indexes.COLUMN_KEYS) override it
+        """
+        check_aggregation(attr, func, q)
+        return aggregate(((getattr(v, by, None) if by else None,
+                           getattr(v, attr, None) if attr else 0)
+                          for v in self.all(cls).values()),
+                         func, by is not None, q, groups)
+
+    def query(self, cls):
+        """returns a Query (see query.py) on the objects of the class
+        cls (or class name): query(Place).filter(city_id=...)
+        .order_by("price_by_night").limit(10)
+        """
+        # query.py imports this module
+        from models.engine.query import Query
+        return Query(self, cls)
+
+    @abstractmethod
+    def new(self, obj) -> None:
+        """adds obj to the objects under the key <obj class name>.id
+        """
+
+    @abstractmethod
+    def delete(self, obj=None) -> None:
+        """removes obj from the objects if it is stored
+        """
+
+    def touch(self, obj) -> None:
+        """marks obj as modified, called by BaseModel on every
+        attribute change. Engines that track changes override it
+        """
+
+    @abstractmethod
+    def save(self) -> None:
+        """persists the objects
+        """
+
+    def flush(self) -> None:
+        """writes the changes save left pending, called before the
+        console exits. Nothing is pending by default
+        """
+
+    @abstractmethod
+    def reload(self) -> None:
+        """reads the persisted objects
+        """
+
+    def close(self) -> None:
+        """releases the files or connections held by the engine
+        """
+
+    @classmethod
+    def from_env(cls, environ=os.environ):
+        """returns an engine configured by the environment variables,
+        the engine defaults by default
+        """
+        return cls()
+
+
+def class_name(cls) -> str:
+    """returns the name of cls, a class or a class name
+    """
+    return cls if isinstance(cls, str) else cls.__name__
+
+
+def text_attributes(name, attrs=None) -> tuple:
+    """returns the tuple of the text attributes searched in the class
+    called name: attrs if given, indexes.TEXT_KEYS otherwise
+    """
+    if attrs is None:
+        if name not in TEXT_KEYS:
+            raise ValueError("no text attribute to search in " + name)
+        attrs = TEXT_KEYS[name]
+    return tuple(attrs)
+
+
+def register(name, engine) -> None:
+    """registers engine (a BaseStorage subclass or the dotted path of
+    one) under name, replacing the engine already registered
+    """
+    _engines[name] = engine
+
+
+def engines() -> list:
+    """returns the names of the registered engines
+    """
+    return sorted(_engines)
+
+
+def get_engine(name):
+    """returns the class of the engine registered under name
+    """
+    if name not in _engines:
+        raise ValueError("unknown storage engine {!r}, expected one of {}"
+                         .format(name, ", ".join(engines())))
+    engine = _engines[name]
+    if isinstance(engine, str):
+        module, _, cls_name = engine.rpartition(".")
+        engine = _engines[name] = getattr(import_module(module), cls_name)
+    return engine
+
+
+def create(name=None, environ=os.environ):
+    """creates the engine registered under name, HBNB_STORAGE_ENGINE
+    (default "file") when name is None, configured by environ
+    """
+    if name is None:
+        name = environ.get("HBNB_STORAGE_ENGINE", "file")
+    return get_engine(name).from_env(environ)
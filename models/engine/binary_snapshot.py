@@ -0,0 +1,335 @@
+#!/usr/bin/python3
+"""binary_snapshot module. Compact binary layout of the storage snapshot
+file name: binary_snapshot.py
+
+A snapshot starts with MAGIC and the table of the fields of every class
+it holds, written once, then the records of each class:
+
+    snapshot := MAGIC, u16 count, count * table, sections
+    table    := u8 length, class name, u8 count, count * column
+    column   := u8 kind, u8 length, field name
+    section  := u16 table index, u32 count, count * record
+    record   := u32 length, fixed, text
+
+The fixed part of a record is read with one Struct per table: the
+length of the key when it is not <class name>.id (0xffff otherwise), a
+bitmap of the columns set, then one fixed-width value per column. The
+kinds of columns are the uuids (16 bytes), the created_at/updated_at
+datetimes (64-bit microseconds since the epoch), the integers (32 bits),
+the floats (64 bits), the strings and the lists (u16 length in
+characters of the string or of the JSON array, none for an empty list,
+the characters being in the text). The text holds, in utf-8, the key
+when it is not <class name>.id, the strings and lists of the columns,
+then the JSON object of the attributes that are not columns or whose
+value does not fit the column (ex: an id that is not a uuid).
+
+The columns of a class are id, created_at, updated_at and its fields
+whose default is a string, a number or a list, grouped by kind, and
+__class__ (nothing stored, set when equal to the class name). The
+records are kept by FileStorage between two saves, so the table of a
+class only depends on the class: the records of a file whose table
+differs are encoded again.
+"""
+import re
+from datetime import datetime, timedelta
+from json import dumps, loads
+from struct import Struct, error
+from models.base_model import registry
+
+MAGIC = b"HBNB\x02"
+DATETIMES = ("created_at", "updated_at")
+
+_U8 = Struct("<B")
+_U16 = Struct("<H")
+_U32 = Struct("<I")
+_SECTION = Struct("<HI")
+_SAME_KEY = 0xffff
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_INT32 = (-(1 << 31), (1 << 31) - 1)
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-"
+                   r"[0-9a-f]{12}")
+# the bitmaps by number of columns, at most 64 columns
+_BITMAPS = ((8, "B"), (16, "H"), (32, "I"), (64, "Q"))
+_FORMATS = {"u": "16s", "i": "i", "f": "d", "d": "q", "s": "H", "l": "H",
+            "c": ""}
+_NO_UUID = bytes(16)
+# the value of the attributes that are not set
+_UNSET = object()
+_KINDS = {str: "s", int: "i", float: "f", list: "l"}
+# the order of the kinds of columns in the tables built from a class
+_ORDER = "udifslc"
+
+
+class _Table:
+    """fields of a class stored as columns: their names and kinds, the
+    Struct of the fixed part of the records and, by bitmap of the columns
+    set, the plan of the decoding of the records
+    """
+    __slots__ = ("name", "columns", "struct", "cls", "groups", "plans")
+
+    def __init__(self, name, columns, cls=None) -> None:
+        """Initialization of _Table, columns being the (name, kind) of
+        every column (at most 64), cls the class it was built from
+        """
+        self.name = name
+        self.columns = tuple(columns)
+        bitmap = next(code for size, code in _BITMAPS
+                      if len(self.columns) <= size)
+        self.struct = Struct("<H" + bitmap + "".join(
+            _FORMATS[kind] for _, kind in self.columns))
+        self.cls = cls
+        # the (bit, name) of the columns of each kind, in the order of
+        # the Struct when the columns are grouped by kind (see table)
+        self.groups = tuple(
+            (kind, tuple((1 << i, column)
+                         for i, (column, k) in enumerate(self.columns)
+                         if k == kind))
+            for kind in _ORDER)
+        self.plans = {}
+
+    def encode(self) -> bytes:
+        """returns the description of the table in the snapshot header
+        """
+        name = self.name.encode("utf-8")
+        parts = [_U8.pack(len(name)), name, _U8.pack(len(self.columns))]
+        for column, kind in self.columns:
+            column = column.encode("utf-8")
+            parts.append(kind.encode("ascii") + _U8.pack(len(column)) +
+                         column)
+        return b"".join(parts)
+
+    def plan(self, bits) -> tuple:
+        """returns the (name, index in the unpacked fixed part) of the
+        columns set in the bitmap bits, by kind: the uuids, the dates,
+        the numbers, the strings and lists (with whether it is a list) in
+        the order of the text, then whether __class__ is set
+        """
+        plan = self.plans.get(bits)
+        if plan is None:
+            found = {kind: [] for kind in _ORDER}
+            index = 2
+            for i, (column, kind) in enumerate(self.columns):
+                if bits >> i & 1:
+                    found["s" if kind == "l" else kind].append(
+                        (column, index, kind == "l") if kind in "sl"
+                        else (column, index))
+                if kind != "c":
+                    index += 1
+            plan = self.plans[bits] = (
+                tuple(found["u"]), tuple(found["d"]),
+                tuple(found["i"] + found["f"]), tuple(found["s"]),
+                bool(found["c"]))
+        return plan
+
+
+_tables = {}
+
+
+def table(name) -> _Table:
+    """returns the table of the class called name, the one of a class
+    without fields when it is not a model. Its columns are grouped by
+    kind, in the order of _ORDER
+    """
+    cls = registry.get(name)
+    found = _tables.get(name)
+    if found is not None and found.cls is cls:
+        return found
+    columns = [("id", "u"), ("created_at", "d"), ("updated_at", "d")]
+    for field, default in (cls._defaults.items() if cls else ()):
+        kind = _KINDS.get(type(default))
+        if kind is not None and len(columns) < 63:
+            if kind == "s" and field.endswith("_id"):
+                kind = "u"
+            columns.append((field, kind))
+    columns.append(("__class__", "c"))
+    columns.sort(key=lambda column: _ORDER.index(column[1]))
+    found = _tables[name] = _Table(name, columns, cls)
+    return found
+
+
+def encode_record(key, values) -> bytes:
+    """returns the record of the object stored under key, values being
+    the dictionary returned by its to_dict method
+    """
+    name = key.partition(".")[0]
+    tab = table(name)
+    get = values.get
+    fields = []
+    strings = []
+    bits = 0
+    for kind, columns in tab.groups:
+        for bit, column in columns:
+            value = get(column, _UNSET)
+            t = type(value)
+            if kind == "u":
+                if t is str and len(value) == 36 and \
+                        _UUID.fullmatch(value):
+                    fields.append(bytes.fromhex(value.replace("-", "")))
+                    bits |= bit
+                else:
+                    fields.append(_NO_UUID)
+            elif kind == "d":
+                # only the naive datetimes are stored as microseconds,
+                # the other values (ex: not ISO, a timezone) as they are
+                if t is str:
+                    try:
+                        value = datetime.fromisoformat(value)
+                    except ValueError:
+                        pass
+                if type(value) is datetime and value.tzinfo is None:
+                    fields.append((value - _EPOCH) // _MICROSECOND)
+                    bits |= bit
+                else:
+                    fields.append(0)
+            elif kind == "i":
+                if t is int and _INT32[0] <= value <= _INT32[1]:
+                    fields.append(value)
+                    bits |= bit
+                else:
+                    fields.append(0)
+            elif kind == "f":
+                if t is float:
+                    fields.append(value)
+                    bits |= bit
+                else:
+                    fields.append(0.0)
+            elif kind == "s":
+                if t is str and len(value) < 0x10000:
+                    fields.append(len(value))
+                    strings.append(value)
+                    bits |= bit
+                else:
+                    fields.append(0)
+            elif kind == "l":
+                # an empty list is stored as no text
+                value = dumps(value) if t is list and value else ""
+                if t is list and len(value) < 0x10000:
+                    fields.append(len(value))
+                    strings.append(value)
+                    bits |= bit
+                else:
+                    fields.append(0)
+            elif value == name:
+                bits |= bit
+    ident = get("id")
+    if type(ident) is str and key == name + "." + ident:
+        size = _SAME_KEY
+    else:
+        size = len(key)
+        strings.insert(0, key)
+    if len(values) > bin(bits).count("1"):
+        # the attributes that are not stored in a column
+        stored = {column for i, (column, _) in enumerate(tab.columns)
+                  if bits >> i & 1}
+        others = {k: v for k, v in values.items() if k not in stored}
+        for column in DATETIMES:
+            if isinstance(others.get(column), datetime):
+                others[column] = others[column].isoformat()
+        strings.append(dumps(others))
+    text = "".join(strings).encode("utf-8")
+    fixed = tab.struct.pack(size, bits, *fields)
+    return _U32.pack(len(fixed) + len(text)) + fixed + text
+
+
+def decode_record(name, record, tab=None) -> tuple:
+    """returns the key and the dictionary of values of the record of an
+    object of the class called name, encoded with the table tab (the
+    table of the class by default)
+    """
+    if tab is None:
+        tab = table(name)
+    fields = tab.struct.unpack_from(record, 4)
+    text = record[4 + tab.struct.size:].decode("utf-8")
+    size = fields[0]
+    uuids, dates, numbers, strings, cls = tab.plan(fields[1])
+    values = {}
+    for column, i in uuids:
+        h = fields[i].hex()
+        values[column] = h[:8] + "-" + h[8:12] + "-" + h[12:16] + "-" + \
+            h[16:20] + "-" + h[20:]
+    for column, i in dates:
+        values[column] = _EPOCH + fields[i] * _MICROSECOND
+    for column, i in numbers:
+        values[column] = fields[i]
+    pos = 0 if size == _SAME_KEY else size
+    for column, i, is_list in strings:
+        end = pos + fields[i]
+        if not is_list:
+            values[column] = text[pos:end]
+        else:
+            values[column] = loads(text[pos:end]) if end > pos else []
+        pos = end
+    if cls:
+        values["__class__"] = tab.name
+    if pos < len(text):
+        values.update(loads(text[pos:]))
+    if size == _SAME_KEY:
+        return tab.name + "." + values["id"], values
+    return text[:size], values
+
+
+def write_snapshot(f, shards) -> None:
+    """writes to the binary file f the snapshot of the records of
+    shards, dictionaries of records by key holding one class each
+    """
+    sections = [(next(iter(shard)).partition(".")[0], shard)
+                for shard in shards if shard]
+    f.write(MAGIC + _U16.pack(len(sections)))
+    for name, _ in sections:
+        f.write(table(name).encode())
+    for index, (_, shard) in enumerate(sections):
+        f.write(_SECTION.pack(index, len(shard)))
+        f.writelines(shard.values())
+
+
+def _read(f, size) -> bytes:
+    """reads size bytes of f, raises ValueError at the end of the file
+    """
+    data = f.read(size)
+    if len(data) < size:
+        raise ValueError("torn snapshot")
+    return data
+
+
+def _read_str(f) -> str:
+    """reads a string of at most 255 bytes prefixed by its length
+    """
+    return _read(f, _read(f, 1)[0]).decode("utf-8")
+
+
+def iter_records(f):
+    """reads the snapshot of the binary file f (positioned after MAGIC)
+    one record at a time
+    Yields the key, the dictionary of values and the record bytes, the
+    records written with another table than the one of their class
+    being encoded again. A torn or corrupted file raises ValueError
+    """
+    try:
+        tables = []
+        for _ in range(_U16.unpack(_read(f, 2))[0]):
+            name = _read_str(f)
+            columns = []
+            for _ in range(_read(f, 1)[0]):
+                kind = _read(f, 1).decode("ascii")
+                columns.append((_read_str(f), kind))
+            tables.append(_Table(name, columns))
+        while True:
+            head = f.read(_SECTION.size)
+            if not head:
+                return
+            if len(head) < _SECTION.size:
+                raise ValueError("torn snapshot")
+            index, count = _SECTION.unpack(head)
+            tab = tables[index]
+            current = table(tab.name)
+            same = current.columns == tab.columns
+            for _ in range(count):
+                head = _read(f, 4)
+                record = head + _read(f, _U32.unpack(head)[0])
+                key, values = decode_record(tab.name, record, tab)
+                if not same:
+                    record = encode_record(key, values)
+                yield key, values, record
+    except (error, IndexError, UnicodeDecodeError, KeyError) as e:
+        raise ValueError("corrupted snapshot") from e
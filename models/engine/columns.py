@@ -0,0 +1,309 @@
+#!/usr/bin/python3
+"""columns module. Contains ColumnIndex class, the attributes of the
+objects of one class kept in NumPy arrays for the aggregations
+file name: columns.py
+
+NumPy is optional: without it ObjectRegistry keeps no ColumnIndex and
+the aggregations go through the objects with aggregate
+"""
+from math import floor
+from models.engine.indexes import SortedIndex
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# the aggregation functions
+FUNCTIONS = ("count", "sum", "mean", "min", "max", "percentile")
+
+
+def check_aggregation(attr, func, q) -> None:
+    """raises ValueError if func is not a function of FUNCTIONS, if attr
+    is None for another function than count or if the percentile q is
+    not between 0 and 100
+    """
+    if func not in FUNCTIONS:
+        raise ValueError("unknown aggregation {!r}, expected one of {}"
+                         .format(func, ", ".join(FUNCTIONS)))
+    if attr is None and func != "count":
+        raise ValueError(func + " needs an attribute")
+    if not 0 <= q <= 100:
+        raise ValueError("percentile must be between 0 and 100")
+
+
+def aggregate(pairs, func="sum", grouped=False, q=50, groups=None):
+    """returns func of the numbers of the (group, number) pairs, by group
+    when grouped is True, the groups going through the dictionary groups
+    if given. Pairs whose number is not a number, or whose group is None
+    or missing from groups, are left out
+    """
+    found = {}
+    for group, number in pairs:
+        if not SortedIndex.indexable(number):
+            continue
+        if grouped:
+            try:
+                if groups is not None:
+                    group = groups.get(group)
+                if group is None:
+                    continue
+                numbers = found.setdefault(group, [])
+            except TypeError:
+                continue
+        else:
+            numbers = found.setdefault(None, [])
+        numbers.append(number)
+    results = {group: _summary(sorted(numbers), func, q)
+               for group, numbers in found.items()}
+    if not grouped:
+        return results.get(None, 0 if func == "count" else None)
+    return _sorted(results)
+
+
+def _summary(numbers, func, q):
+    """returns func of the list numbers sorted in ascending order
+    """
+    if func == "count":
+        return len(numbers)
+    if func == "sum":
+        return float(sum(numbers))
+    if func == "mean":
+        return sum(numbers) / len(numbers)
+    if func == "min":
+        return float(numbers[0])
+    if func == "max":
+        return float(numbers[-1])
+    position = (len(numbers) - 1) * q / 100
+    lo = floor(position)
+    hi = min(lo + 1, len(numbers) - 1)
+    return numbers[lo] + (numbers[hi] - numbers[lo]) * (position - lo)
+
+
+def _sorted(results) -> dict:
+    """returns the dictionary results sorted by key when the keys
+    can be compared
+    """
+    try:
+        return dict(sorted(results.items()))
+    except TypeError:
+        return results
+
+
+class ColumnIndex:
+    """ColumnIndex class, one column per attribute holding the value of
+    every object of one class, for the aggregations: each row is an
+    object, each value a code into the distinct values of its column.
+    The numbers of a column or the groups of the rows are then read as
+    arrays and reduced by NumPy instead of going through the objects
+
+    Code 0 stands for None, for the values that cannot be hashed and for
+    the rows of the removed objects, which are reused by the next objects
+
+    Attributes:
+        attr (public, instance attribute): tuple -
+                            names of the attributes, one per column
+        __rows (private, instance attribute): dictionary -
+                            the row of every object by key
+        __free (private, instance attribute): list -
+                            the rows of the removed objects
+        __size (private, instance attribute): integer -
+                            number of rows used, removed ones included
+        __codes (private, instance attribute): numpy array -
+                            the code of the value of every row (first
+                            axis) in every column (second axis)
+        __values (private, instance attribute): list -
+                            the distinct values of every column by code
+        __lookup (private, instance attribute): list -
+                            the code of every distinct value of every
+                            column, by value
+        __numbers (private, instance attribute): list -
+                            the distinct values of every column by code
+                            as a numpy array of numbers, NaN for the
+                            values that are not numbers
+
+    Methods:
+        build(self, pairs): indexes every (key, values) pair
+        put(self, key, value): stores the values of the object key
+        discard(self, key): removes the object key from the columns
+        aggregate(self, attr, func, by, q, groups): returns func of the
+                    numbers of a column, by value of another column
+        __len__(self): returns the number of objects
+    """
+    def __init__(self, attr) -> None:
+        """Initialization of ColumnIndex, attr is the tuple of the names
+        of the attributes kept in columns
+        """
+        self.attr = tuple(attr)
+        self.__rows = {}
+        self.__free = []
+        self.__size = 0
+        self.__codes = numpy.zeros((16, len(self.attr)), numpy.int32)
+        self.__values = [[None] for _ in self.attr]
+        self.__lookup = [{} for _ in self.attr]
+        self.__numbers = [numpy.full(16, numpy.nan) for _ in self.attr]
+
+    def __code(self, column, value) -> int:
+        """returns the code of value in column, adding it to the distinct
+        values of column if needed
+        """
+        if value is None or value != value:
+            return 0
+        lookup = self.__lookup[column]
+        try:
+            code = lookup.get(value)
+        except TypeError:
+            return 0
+        if code is None:
+            values = self.__values[column]
+            code = lookup[value] = len(values)
+            values.append(value)
+            numbers = self.__numbers[column]
+            if code == len(numbers):
+                numbers = self.__numbers[column] = numpy.concatenate(
+                    (numbers, numpy.full(len(numbers), numpy.nan)))
+            if SortedIndex.indexable(value):
+                numbers[code] = value
+        return code
+
+    def __compact(self, column) -> None:
+        """removes from column the distinct values no row holds anymore
+        """
+        codes = self.__codes[:self.__size, column]
+        used = numpy.union1d(numpy.unique(codes), [0])
+        renumber = numpy.zeros(len(self.__values[column]), numpy.int32)
+        renumber[used] = numpy.arange(len(used))
+        self.__codes[:self.__size, column] = renumber[codes]
+        values = self.__values[column] = \
+            [self.__values[column][code] for code in used.tolist()]
+        self.__lookup[column] = {v: c for c, v in enumerate(values) if c}
+        numbers = numpy.full(max(16, 2 * len(values)), numpy.nan)
+        numbers[:len(used)] = self.__numbers[column][used]
+        self.__numbers[column] = numbers
+
+    def build(self, pairs) -> None:
+        """stores the values of the object of every (key, values) pair
+        of pairs
+        """
+        pairs = list(pairs)
+        if len(pairs) > len(self.__codes):
+            codes = numpy.zeros((len(pairs), len(self.attr)), numpy.int32)
+            codes[:len(self.__codes)] = self.__codes
+            self.__codes = codes
+        for key, value in pairs:
+            self.put(key, value)
+
+    def put(self, key, value) -> None:
+        """stores value, the tuple of the attributes of the object stored
+        under key, in the row of the object
+        """
+        row = self.__rows.get(key)
+        if row is None:
+            if self.__free:
+                row = self.__free.pop()
+            else:
+                row = self.__size
+                self.__size += 1
+                if row == len(self.__codes):
+                    self.__codes = numpy.concatenate(
+                        (self.__codes, numpy.zeros_like(self.__codes)))
+            self.__rows[key] = row
+        self.__codes[row] = [self.__code(column, v)
+                             for column, v in enumerate(value)]
+        # values no object holds anymore are dropped once they outnumber
+        # the objects
+        for column, values in enumerate(self.__values):
+            if len(values) > 2 * len(self.__rows) + 64:
+                self.__compact(column)
+
+    def discard(self, key) -> None:
+        """removes the object stored under key from the columns
+        """
+        row = self.__rows.pop(key, None)
+        if row is not None:
+            self.__codes[row] = 0
+            self.__free.append(row)
+
+    def __len__(self) -> int:
+        """returns the number of objects in the columns
+        """
+        return len(self.__rows)
+
+    def aggregate(self, attr, func="sum", by=None, q=50, groups=None):
+        """returns func (see FUNCTIONS) of the numbers of the column attr
+        (the number of objects for count when attr is None): a number,
+        or with by a dictionary of the results by value of the column by,
+        each value going through the dictionary groups if given (ex: the
+        state of each city). Values that are not numbers are left out,
+        as the None values of by and the values missing from groups
+        """
+        check_aggregation(attr, func, q)
+        codes = self.__codes[:self.__size]
+        if attr is None:
+            numbers = numpy.zeros(self.__size)
+        else:
+            column = self.attr.index(attr)
+            numbers = self.__numbers[column][codes[:, column]]
+        if by is None:
+            if attr is None:
+                return len(self.__rows)
+            keep = ~numpy.isnan(numbers)
+            found = _reduce(numpy.zeros(int(keep.sum()), numpy.intp),
+                            numbers[keep], 1, func, q)
+            return found.get(0, 0 if func == "count" else None)
+        column = self.attr.index(by)
+        group = codes[:, column]
+        names = self.__values[column]
+        if groups is not None:
+            group, names = _regroup(group, names, groups)
+        keep = (group > 0) & ~numpy.isnan(numbers)
+        found = _reduce(group[keep], numbers[keep], len(names), func, q)
+        return _sorted({names[code]: result
+                        for code, result in found.items()})
+
+
+def _regroup(group, names, groups) -> tuple:
+    """returns the codes of the array group and their names once the
+    names went through the dictionary groups, code 0 for the names
+    missing from groups
+    """
+    renamed = {}
+    renumber = numpy.zeros(len(names), numpy.intp)
+    for code, name in enumerate(names[1:], 1):
+        try:
+            target = groups.get(name)
+        except TypeError:
+            continue
+        if target is not None:
+            renumber[code] = renamed.setdefault(target, len(renamed) + 1)
+    return renumber[group], [None] + list(renamed)
+
+
+def _reduce(group, numbers, size, func, q) -> dict:
+    """returns func of the numbers of every group by group code, group
+    being the array of the codes (below size) of the array numbers
+    """
+    counts = numpy.bincount(group, minlength=size)
+    present = numpy.flatnonzero(counts)
+    counts = counts[present]
+    if func == "count":
+        results = counts
+    elif func in ("sum", "mean"):
+        results = numpy.bincount(group, numbers, size)[present]
+        if func == "mean":
+            results = results / counts
+    else:
+        # the numbers sorted by group then value, each group a slice
+        numbers = numbers[numpy.lexsort((numbers, group))]
+        starts = numpy.cumsum(counts) - counts
+        if func == "min":
+            results = numbers[starts]
+        elif func == "max":
+            results = numbers[starts + counts - 1]
+        else:
+            position = (counts - 1) * q / 100
+            lo = numpy.floor(position).astype(numpy.intp)
+            hi = numpy.minimum(lo + 1, counts - 1)
+            low = numbers[starts + lo]
+            results = low + (numbers[starts + hi] - low) * (position - lo)
+    return dict(zip(present.tolist(), results.tolist()))
@@ -0,0 +1,454 @@
+#!/usr/bin/python3
+"""db_storage module. Contains DBStorage class
+file name: db_storage.py
+"""
+import os
+import sqlite3
+import threading
+from json import dumps, loads
+from models.engine.base_storage import BaseStorage, class_name
+from models.engine.indexes import COORDINATES, FOREIGN_KEYS, RANGE_KEYS, \
+    SPATIAL_KEYS, GridIndex, SortedIndex, in_box
+from models.base_model import registry, set_storage
+
+# the foreign keys, the range attributes and the coordinates get an
+# index on (class, value) used by lookup, lookup_range and lookup_box
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS objects ("
+    "key TEXT PRIMARY KEY, class TEXT NOT NULL, data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS objects_class ON objects (class)",
+    ) + tuple("CREATE INDEX IF NOT EXISTS objects_{0} ON objects "
+              "(class, json_extract(data, '$.{0}'))".format(attr)
+              for attr in sorted({attr for keys in (FOREIGN_KEYS, RANGE_KEYS,
+                                                    SPATIAL_KEYS)
+                                  for attrs in keys.values()
+                                  for attr in attrs}))
+_UPSERT = ("INSERT INTO objects (key, class, data) VALUES (?, ?, ?) "
+           "ON CONFLICT (key) DO UPDATE SET data = excluded.data")
+
+
+class _Table(dict):
+    """identity map of DBStorage: the objects already read from the
+    database by <class name>.id. A missing key is read on its own the
+    first time it is looked up, the whole table is only read when the
+    map is iterated or measured
+    """
+    def __init__(self, fetch) -> None:
+        """Initialization of _Table
+        fetch(key) returns the objects of the rows with that key
+        (every row when key is None) that are not in the map yet
+        """
+        super().__init__()
+        self.fetch = fetch
+        self.complete = False
+
+    def __missing__(self, key):
+        """reads the object stored under key from the database
+        """
+        obj = self.fetch(key).get(key)
+        if obj is None:
+            raise KeyError(key)
+        dict.__setitem__(self, key, obj)
+        return obj
+
+    def __contains__(self, key) -> bool:
+        """tells whether an object is stored under key
+        """
+        return self.get(key) is not None
+
+    def get(self, key, default=None):
+        """returns the object stored under key or default
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def load(self) -> None:
+        """reads every object of the database that is not in the map
+        """
+        if not self.complete:
+            dict.update(self, self.fetch(None))
+            self.complete = True
+
+    def __iter__(self):
+        """iterates over the keys of every stored object
+        """
+        self.load()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        """returns the number of stored objects
+        """
+        self.load()
+        return dict.__len__(self)
+
+    def keys(self):
+        """returns the keys of every stored object
+        """
+        self.load()
+        return dict.keys(self)
+
+    def values(self):
+        """returns every stored object
+        """
+        self.load()
+        return dict.values(self)
+
+    def items(self):
+        """returns the (key, object) pairs of every stored object
+        """
+        self.load()
+        return dict.items(self)
+
+
+class DBStorage(BaseStorage):
+    """DBStorage class, keeps the objects in a SQLite database holding
+    one row per object: its <class name>.id key, its class name and the
+    JSON text of its dictionary
+
+    Attributes:
+        __db_path (private, class attribute): string -
+                            path to the SQLite database (ex: file.db)
+        __models (private, class attribute): dictionary -
+                            model classes by name (base_model.registry)
+
+    Methods:
+        all(self, cls, **filters): returns the objects, all of them or
+                    the ones of a class matching attribute values
+        lookup(self, cls, attr, value): returns the objects of a class
+                    whose attribute is value, through the expression
+                    indexes of indexes.FOREIGN_KEYS
+        lookup_range(self, cls, attr, low, high): returns the objects of
+                    a class whose attribute is between low and high,
+                    through the expression indexes of indexes.RANGE_KEYS
+        lookup_box(self, cls, south, west, north, east): returns the
+                    objects of a class inside a latitude/longitude box,
+                    through the expression indexes of the coordinates
+        count(self, cls): returns the number of objects, counted by the
+                    database
+        new(self, obj): adds obj to the objects
+        delete(self, obj): removes obj from the objects
+        touch(self, obj): marks a stored obj as modified
+        save(self): writes the objects added, modified or removed since
+                    the last save, one row each, in one transaction
+        reload(self): drops the objects read so far, they are read
+                    again from the database when needed
+        close(self): closes the database
+        from_env(cls, environ): creates the DBStorage of the database
+                    HBNB_STORAGE_DB
+    """
+    __db_path = "file.db"
+    __models = registry
+
+    def __init__(self, db_path=None) -> None:
+        """Initialization of DBStorage
+        Opens (and creates if needed) the database at db_path
+        """
+        if db_path is not None:
+            self.__db_path = db_path
+        self.__conn = sqlite3.connect(self.__db_path,
+                                      check_same_thread=False)
+        if self.__db_path != ":memory:":
+            self.__conn.execute("PRAGMA journal_mode = WAL")
+            self.__conn.execute("PRAGMA synchronous = NORMAL")
+        with self.__conn:
+            for statement in _SCHEMA:
+                self.__conn.execute(statement)
+        self.__objects = _Table(self.__fetch)
+        self.__dirty = set()
+        self.__deleted = set()
+        self.__mutex = threading.Lock()
+
+    @classmethod
+    def from_env(cls, environ=os.environ):
+        """returns the DBStorage of the database HBNB_STORAGE_DB
+        (default file.db)
+        """
+        return cls(environ.get("HBNB_STORAGE_DB"))
+
+    def all(self, cls=None, **filters) -> dict:
+        """returns the dictionary of the objects by <class name>.id
+        With a class (or class name) or attribute filters, returns a new
+        dictionary holding the matching objects only: the database
+        selects them, the unsaved changes are applied on top. The
+        attributes missing from a row are read as the default of the
+        field
+        """
+        if cls is None and not filters:
+            return self.__objects
+        name = None if cls is None else class_name(cls)
+        where = []
+        params = []
+        for attr, value in filters.items():
+            # the path is inlined so that the expression indexes apply
+            if value is None:
+                sql = self.__type(attr) + " = 'null'"
+            else:
+                sql = self.__path(attr) + " IS ?"
+                params.append(value)
+            sql = self.__or_default(name, attr, sql, params,
+                                    lambda default: default == value)
+            where.append(sql)
+        return self.__select(name, where, params,
+                             lambda obj: all(getattr(obj, attr, None) == value
+                                             for attr, value
+                                             in filters.items()))
+
+    def lookup(self, cls, attr, value) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        attribute attr is value, selected by the database
+        """
+        return self.all(cls, **{attr: value})
+
+    def lookup_range(self, cls, attr, low=None, high=None) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        attribute attr is a number between low and high included (no
+        bound when None), by ascending value, selected by the database
+        """
+        name = class_name(cls)
+        path = self.__path(attr)
+        where = [self.__number(attr)]
+        params = []
+        for bound, op in ((low, " >= ?"), (high, " <= ?")):
+            if bound is not None:
+                where.append(path + op)
+                params.append(bound)
+
+        def in_range(value):
+            """tells whether value is a number in range
+            """
+            return SortedIndex.indexable(value) and \
+                (low is None or value >= low) and \
+                (high is None or value <= high)
+        where = [self.__or_default(name, attr, " AND ".join(where), params,
+                                   in_range)]
+        found = self.__select(name, where, params,
+                              lambda obj: in_range(getattr(obj, attr, None)))
+        return dict(sorted(found.items(),
+                           key=lambda item: (getattr(item[1], attr), item[0])))
+
+    def count(self, cls=None) -> int:
+        """returns the number of objects, of the class cls (or class
+        name) only if given, counted by the database without reading
+        the rows: the rows of the objects added, modified or removed
+        since the last save are left out and the unsaved objects added
+        """
+        name = None if cls is None else class_name(cls)
+        names = [n for n in self.__models if name in (None, n)]
+        with self.__mutex:
+            changed = [k for k in self.__dirty | self.__deleted
+                       if name is None or k.partition(".")[0] == name]
+            unsaved = sum(1 for k in self.__dirty
+                          if name is None or k.partition(".")[0] == name)
+        if not names:
+            return unsaved
+        stored = self.__conn.execute(
+            "SELECT COUNT(*) FROM objects WHERE class IN ({}) AND key NOT IN "
+            "(SELECT value FROM json_each(?))".format(
+                ", ".join("?" * len(names))),
+            names + [dumps(changed)]).fetchone()[0]
+        return stored + unsaved
+
+    def new(self, obj) -> None:
+        """adds obj to the objects under the key <obj class name>.id
+        """
+        key = obj.__class__.__name__ + "." + obj.id
+        set_storage(obj, self)
+        with self.__mutex:
+            dict.__setitem__(self.__objects, key, obj)
+            self.__dirty.add(key)
+            self.__deleted.discard(key)
+
+    def delete(self, obj=None) -> None:
+        """removes obj from the objects if it is inside
+        """
+        if obj is None:
+            return
+        key = obj.__class__.__name__ + "." + obj.id
+        with self.__mutex:
+            dict.pop(self.__objects, key, None)
+            self.__dirty.discard(key)
+            self.__deleted.add(key)
+
+    def touch(self, obj) -> None:
+        """marks obj as modified so that the next save writes it,
+        objects that are not stored are ignored
+        """
+        key = obj.__class__.__name__ + "." + getattr(obj, "id", "")
+        if dict.get(self.__objects, key) is obj:
+            with self.__mutex:
+                self.__dirty.add(key)
+
+    def save(self) -> None:
+        """writes one row per object added or modified and deletes the
+        row of every object removed since the last save, all in one
+        transaction. The changes are kept for the next save on failure
+        """
+        with self.__mutex:
+            put = [(k, k.partition(".")[0],
+                    dumps(dict.__getitem__(self.__objects, k)
+                          .to_dict(cache=False)))
+                   for k in self.__dirty]
+            deleted = [(k,) for k in self.__deleted]
+            self.__dirty.clear()
+            self.__deleted.clear()
+        try:
+            with self.__conn:
+                self.__conn.executemany(_UPSERT, put)
+                self.__conn.executemany("DELETE FROM objects WHERE key = ?",
+                                        deleted)
+        except sqlite3.Error:
+            with self.__mutex:
+                self.__dirty.update(k for k, _, _ in put
+                                    if k not in self.__deleted)
+                self.__deleted.update(k for (k,) in deleted
+                                      if k not in self.__dirty)
+            raise
+
+    def reload(self) -> None:
+        """drops the objects read from the database that were not
+        modified, they are read again the next time they are needed
+        """
+        with self.__mutex:
+            for k in [k for k in dict.keys(self.__objects)
+                      if k not in self.__dirty]:
+                dict.__delitem__(self.__objects, k)
+            self.__objects.complete = False
+
+    def close(self) -> None:
+        """closes the connection to the database
+        """
+        self.__conn.close()
+
+    def lookup_box(self, cls, south, west, north, east) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        latitude and longitude (indexes.SPATIAL_KEYS) are inside the box,
+        which crosses the antimeridian when west > east, selected by the
+        database
+        """
+        name = class_name(cls)
+        attrs = SPATIAL_KEYS.get(name, COORDINATES)
+        lat, lon = (self.__path(attr) for attr in attrs)
+        crossing = west > east
+        where = []
+        params = []
+        for attr, sql, bounds, inside in (
+                (attrs[0], lat + " BETWEEN ? AND ?", (south, north),
+                 lambda value: south <= value <= north),
+                (attrs[1], "({0} >= ? {1} {0} <= ?)".format(
+                    lon, "OR" if crossing else "AND"), (west, east),
+                 lambda value: (value >= west or value <= east)
+                 if crossing else west <= value <= east)):
+            params.extend(bounds)
+            where.append(self.__or_default(
+                name, attr, self.__number(attr) + " AND " + sql, params,
+                lambda value, inside=inside:
+                SortedIndex.indexable(value) and inside(value)))
+
+        def match(obj):
+            """tells whether an unsaved object is inside the box
+            """
+            point = tuple(getattr(obj, attr, None) for attr in attrs)
+            return GridIndex.indexable(point) and \
+                in_box(point, south, west, north, east)
+        return self.__select(name, where, params, match)
+
+    @staticmethod
+    def __number(attr) -> str:
+        """returns the SQL condition of the rows whose attribute attr
+        (checked by __path first) is a number
+        """
+        return "json_type(data, '$." + attr + "') IN ('integer', 'real')"
+
+    @classmethod
+    def __type(cls, attr) -> str:
+        """returns the SQL expression of the JSON type of the attribute
+        attr of a row, NULL when the row does not hold attr
+        """
+        cls.__path(attr)
+        return "json_type(data, '$." + attr + "')"
+
+    @classmethod
+    def __or_default(cls, name, attr, sql, params, match) -> str:
+        """returns the SQL condition sql on the attribute attr extended
+        to the rows that do not hold attr and whose class (name, or any
+        class when None) has a default for attr satisfying match: those
+        objects read the default. The class names are added to params
+        """
+        names = [n for n, model in registry.items()
+                 if name in (None, n) and match(model.default(attr))]
+        if not names:
+            return sql
+        params.extend(names)
+        return "({} OR {} IS NULL AND class IN ({}))".format(
+            sql, cls.__type(attr), ", ".join("?" * len(names)))
+
+    @staticmethod
+    def __path(attr) -> str:
+        """returns the SQL expression of the attribute attr of a row
+        """
+        if not attr.isidentifier():
+            raise ValueError("invalid attribute name: " + repr(attr))
+        return "json_extract(data, '$." + attr + "')"
+
+    def __select(self, name, where, params, match) -> dict:
+        """returns the objects of the class called name (every class when
+        None) of the rows matching the SQL conditions where, with the
+        unsaved objects satisfying match instead of their rows
+        """
+        if name is not None:
+            where = ["class = ?"] + where
+            params = [name] + params
+        rows = self.__conn.execute("SELECT key, class, data FROM objects "
+                                   "WHERE " + " AND ".join(where), params)
+        res = {}
+        for k, row_class, data in rows:
+            if k in self.__dirty or k in self.__deleted:
+                continue
+            obj = dict.get(self.__objects, k)
+            if obj is None:
+                obj = self.__create(row_class, data)
+                if obj is None:
+                    continue
+                dict.__setitem__(self.__objects, k, obj)
+            res[k] = obj
+        for k in list(self.__dirty):
+            obj = dict.get(self.__objects, k)
+            if obj is None or \
+                    name is not None and k.partition(".")[0] != name:
+                continue
+            if match(obj):
+                res[k] = obj
+        return res
+
+    def __create(self, name, data):
+        """returns the instance described by a row,
+        None when its class is unknown
+        """
+        cls = self.__models.get(name)
+        if cls is None:
+            return None
+        obj = cls(**loads(data))
+        set_storage(obj, self)
+        return obj
+
+    def __fetch(self, key) -> dict:
+        """reads the rows stored under key (every row when key is None)
+        Returns their objects by key, except for the objects already
+        in the map or deleted since the last save
+        """
+        if key is None:
+            rows = self.__conn.execute("SELECT key, class, data "
+                                       "FROM objects")
+        else:
+            rows = self.__conn.execute("SELECT key, class, data "
+                                       "FROM objects WHERE key = ?", (key,))
+        res = {}
+        for k, row_class, data in rows:
+            if k in self.__deleted or dict.__contains__(self.__objects, k):
+                continue
+            obj = self.__create(row_class, data)
+            if obj is not None:
+                res[k] = obj
+        return res
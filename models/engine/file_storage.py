@@ -2,82 +2,1251 @@
 """file_storage module. Contains FileStorage class
 file name: file_storage.py
 """
-from json import dump, load
-from json.decoder import JSONDecodeError
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.amenity import Amenity
-from models.place import Place
-from models.review import Review
-
-
-class FileStorage:
+import atexit
+from contextlib import nullcontext
+import gzip
+import io
+import lzma
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import re
+import tempfile
+from json import dumps, loads
+from json.decoder import JSONDecoder, JSONDecodeError
+from models.engine import binary_snapshot
+from models.engine.indexes import REGISTRY_INDEXES, TextIndex
+from models.engine.object_registry import ObjectRegistry
+from models.engine.registry_storage import RegistryStorage
+from models.base_model import registry, set_storage
+
+_WHITESPACE = re.compile(r"\s*")
+_DECODER = JSONDecoder()
+_DURABILITY = ("none", "batch", "always")
+_EXTENSIONS = {"json": ".json", "binary": ".bin"}
+_COMPACT_MIN = 1 << 16
+_COMPRESSION = {"gzip": ".gz", "xz": ".xz"}
+_COMPRESSED = ((b"\x1f\x8b", gzip.open), (b"\xfd7zXZ\x00", lzma.open))
+
+
+def _fsync_dir(path) -> None:
+    """flushes the directory entry changes (rename, creation) of path
+    to the disk, where the platform allows opening directories
+    """
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _open_snapshot(path):
+    """opens the file path for binary reading, decompressing it on the
+    fly when it starts with the gzip or xz magic bytes
+    """
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, opener in _COMPRESSED:
+        if head.startswith(magic):
+            return opener(path, "rb")
+    return open(path, "rb")
+
+
+def _iter_entries(f, chunk_size=1 << 16):
+    """parses the JSON object stored in the file f one entry at a time
+    Only a chunk of the file and the current entry are held in memory.
+    Yields the key, the decoded value and the JSON text of the value
+    """
+    buf = ""
+    pos = 0
+    eof = False
+
+    def more():
+        """drops the consumed text and reads the next chunk,
+        returns False at the end of the file
+        """
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        buf = buf[pos:] + chunk
+        pos = 0
+        eof = not chunk
+        return not eof
+
+    def skip():
+        """moves pos to the next significant character
+        """
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos < len(buf) or not more():
+                return buf[pos:pos + 1]
+
+    def decode():
+        """decodes the JSON value starting at pos, reading more
+        chunks as long as the value is incomplete
+        """
+        nonlocal pos
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(buf, pos)
+            except JSONDecodeError:
+                if not more():
+                    raise
+                continue
+            if end == len(buf) and more():
+                continue
+            start, pos = pos, end
+            return value, buf[start:end]
+
+    if skip() != "{":
+        raise JSONDecodeError("Expecting '{'", buf, pos)
+    pos += 1
+    if skip() == "}":
+        return
+    while True:
+        if buf[pos:pos + 1] != '"':
+            raise JSONDecodeError("Expecting property name enclosed in "
+                                  "double quotes", buf, pos)
+        key, _ = decode()
+        if skip() != ":":
+            raise JSONDecodeError("Expecting ':' delimiter", buf, pos)
+        pos += 1
+        skip()
+        value, text = decode()
+        yield key, value, text
+        char = skip()
+        if char == "}":
+            return
+        if char != ",":
+            raise JSONDecodeError("Expecting ',' delimiter", buf, pos)
+        pos += 1
+        skip()
+
+
+def _split_lines(f):
+    """splits the JSON object stored in the file f as save writes it, one
+    "<class name>.id": {...} entry per line, only decoding the keys
+    Returns the key, None and the JSON text of the value of every entry,
+    or None when the file has another layout
+    """
+    if f.readline() != "{\n":
+        return None
+    entries = []
+    comma = False
+    for line in f:
+        line = line.rstrip()
+        if line == "}":
+            break
+        if entries and not comma:
+            return None
+        comma = line.endswith(",")
+        if comma:
+            line = line[:-1]
+        try:
+            key, end = _DECODER.raw_decode(line)
+        except JSONDecodeError:
+            return None
+        text = line[end + 2:]
+        if type(key) is not str or line[end:end + 2] != ": " or \
+                text[:1] != "{" or text[-1:] != "}":
+            return None
+        entries.append((key, None, text))
+    else:
+        return None
+    if comma or f.read().strip():
+        return None
+    return entries
+
+
+class _Record:
+    """placeholder kept in __objects for an object that has not been
+    created yet in lazy mode: its class and its snapshot fragment
+    (JSON text or binary record)
+    """
+    __slots__ = ("cls", "fragment")
+
+    def __init__(self, cls, fragment) -> None:
+        """Initialization of _Record"""
+        self.cls = cls
+        self.fragment = fragment
+
+    def values(self) -> dict:
+        """returns the dictionary of the object described by the record
+        """
+        if isinstance(self.fragment, bytes):
+            return binary_snapshot.decode_record(self.cls.__name__,
+                                                 self.fragment)[1]
+        return loads(self.fragment)
+
+    def hydrate(self, storage=None):
+        """creates the model instance described by the record, held by
+        the engine storage
+        """
+        obj = self.cls(**self.values())
+        set_storage(obj, storage)
+        return obj
+
+
+class _LazyObjects(ObjectRegistry):
+    """registry of objects by <class name>.id whose values may be
+    _Record placeholders, which are replaced by the real instance the
+    first time they are read. Keys, len and membership never hydrate
+    """
+    def __init__(self, *args, storage=None, **kwargs) -> None:
+        """Initialization of _LazyObjects, same arguments as
+        ObjectRegistry, storage being the engine holding the instances
+        """
+        super().__init__(*args, **kwargs)
+        self.storage = storage
+
+    def __iter__(self):
+        """iterates over the keys. Defined so that dict(), {**objects}
+        and dict.update go through __getitem__ instead of copying the
+        placeholders
+        """
+        return dict.__iter__(self)
+
+    def copy(self) -> dict:
+        """returns a dictionary of the instances, all of them are created
+        """
+        self.hydrate()
+        return dict.copy(self)
+
+    def __getitem__(self, key):
+        """returns the instance stored under key, creating it if needed
+        """
+        value = dict.__getitem__(self, key)
+        if type(value) is _Record:
+            value = value.hydrate(self.storage)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        """returns the instance stored under key or default
+        """
+        return self[key] if key in self else default
+
+    def pop(self, key, *default):
+        """removes key and returns its instance
+        """
+        value = ObjectRegistry.pop(self, key, *default)
+        if type(value) is _Record:
+            value = value.hydrate(self.storage)
+        return value
+
+    def attribute(self, key, attr):
+        """returns the attribute attr of the object stored under key,
+        read from the record of a placeholder without creating it
+        """
+        value = dict.__getitem__(self, key)
+        if type(value) is not _Record:
+            return ObjectRegistry.attribute(self, key, attr)
+        values = value.values()
+        if isinstance(attr, tuple):
+            return tuple(values.get(a, value.cls.default(a)) for a in attr)
+        return values.get(attr, value.cls.default(attr))
+
+    def hydrate(self) -> None:
+        """replaces every placeholder by its instance
+        """
+        for key, value in dict.items(self):
+            if type(value) is _Record:
+                dict.__setitem__(self, key, value.hydrate(self.storage))
+
+    def values(self):
+        """returns the instances, all of them are created
+        """
+        self.hydrate()
+        return dict.values(self)
+
+    def items(self):
+        """returns the (key, instance) pairs, all instances are created
+        """
+        self.hydrate()
+        return dict.items(self)
+
+
+class FileStorage(RegistryStorage):
     """FileStorage class
 
     Attributes:
         __file_path (private, class attribute): string -
                             path to the JSON file (ex: file.json)
-        __objects (private, class attribute): dictionary -
+        __shard_dir (private, class attribute): string -
+                            directory holding one JSON file per class
+                            (ex: file/User.json) in sharded mode,
+                            None when everything goes to __file_path
+        __journal_path (private, class attribute): string -
+                            path to the append-only journal that records
+                            the mutations made since the last snapshot
+                            (ex: file.json.log)
+        __sealed_path (private, class attribute): string -
+                            path the journal is moved to when a compaction
+                            starts, it is removed once the snapshot
+                            holding its records is written
+                            (ex: file.json.log.1)
+        __journal (private, class attribute): boolean -
+                            when True, save appends one record per changed
+                            object to the journal instead of rewriting
+                            the whole JSON file
+        __objects (private, class attribute): ObjectRegistry -
                             empty but will store all objects by
                             <class name>.id (ex: to store a BaseModel
                             object with id=12121212, the key will be
-                            BaseModel.12121212)
+                            BaseModel.12121212), keeping the keys of
+                            each class apart
+        __dirty (private, class attribute): set -
+                            keys created, modified or removed since the
+                            last save, the changes made to __objects
+                            directly included
+        __fragments (private, class attribute): dictionary -
+                            JSON text of every persisted object by key,
+                            grouped by class name, reused by save for
+                            the objects that are not dirty
+        __flusher (private, class attribute): Thread -
+                            background thread writing the saved changes
+                            in write-behind mode, None otherwise
+        __error (private, class attribute): Exception -
+                            error of the last failed write of the
+                            write-behind thread, raised by the next save
+                            or flush, None otherwise
+        __lazy (private, class attribute): boolean -
+                            when True, reload keeps the records as
+                            placeholders that become instances the first
+                            time they are read from __objects
+        __durability (private, class attribute): string -
+                            when the written files are flushed to the
+                            disk with fsync: "none" never, "batch" once
+                            per write, "always" after every journal
+                            record and every rename
+        __resync (private, class attribute): boolean -
+                            set when a write failed, the next write is
+                            then a full snapshot (in journal mode, the
+                            journal is sealed and the changes of the
+                            failed write are appended again)
+        __compact_size (private, class attribute): integer -
+                            journal size (bytes) starting a compaction
+        __compact_ratio (private, class attribute): float -
+                            journal size, relative to the snapshot size,
+                            starting a compaction
+        __compactor (private, class attribute): Thread -
+                            background thread writing the compacted
+                            snapshot, None when none ever started
+        __format (private, class attribute): string -
+                            layout of the written snapshots, "json" or
+                            "binary" (see binary_snapshot), reload
+                            detects the layout of the files it reads
+        __compression (private, class attribute): string -
+                            "gzip" or "xz" when the written files are
+                            compressed (ex: file.json.gz), None otherwise,
+                            reload detects compressed files
+        __text_path (private, class attribute): string -
+                            path the text indexes are written to by
+                            flush, next to the snapshot (ex:
+                            file.json.text), None when they are not kept
+        __migrated (private, class attribute): tuple -
+                            the snapshot (or shard directory) written
+                            with other options and its journals read by
+                            reload, removed once the configured snapshot
+                            is written on disk
 
     Methods:
-        all(self): returns dictionary __objects
+        _objects(self): returns __objects, which RegistryStorage answers
+                    all, count, lookup... from, without creating the
+                    objects of lazy mode when only their keys are needed
         new(self, obj): sets in __objects the obj with key <obj class name>.id
+        delete(self, obj): removes obj from __objects
+        touch(self, obj): marks a stored obj as modified
         save(self): serializes __objects to the JSON file (path: __file_path)
+                    or appends the changes to the journal in journal mode,
+                    in write-behind mode it only schedules the write
+        flush(self): writes the changes scheduled in write-behind mode,
+                    waits for a running compaction and writes the text
+                    indexes
+        close(self): flushes and stops the write-behind thread
+        from_env(cls, environ): creates the FileStorage configured by
+                    the HBNB_STORAGE_* environment variables
         reload(self): deserializes the JSON file to __objects
                     (only if the JSON file (__file_path) exists
-                    otherwise no exception is raised)
+                    otherwise no exception is raised) and replays
+                    the journal on top of it
     """
     __file_path = "file.json"
-    __objects = {}
-    __models = {
-        "BaseModel": BaseModel,
-        "User": User,
-        "State": State,
-        "City": City,
-        "Amenity": Amenity,
-        "Place": Place,
-        "Review": Review
-        }
-
-    def all(self) -> dict:
-        """returns the dictionary __objects
+    __shard_dir = None
+    __journal_path = "file.json.log"
+    __sealed_path = "file.json.log.1"
+    __journal = False
+    __dirty = set()
+    __objects = ObjectRegistry(changed=__dirty, **REGISTRY_INDEXES)
+    __fragments = {}
+    __flusher = None
+    __error = None
+    __lazy = False
+    __durability = "none"
+    __resync = False
+    __format = "json"
+    __compression = None
+    __compact_size = 1 << 24
+    __compact_ratio = 1.0
+    __compactor = None
+    __text_path = None
+    __migrated = ()
+    __models = registry
+
+    def __init__(self, file_path=None, journal=False, sharded=False,
+                 write_behind=None, flush_changes=100, lazy=False,
+                 durability="none",
+                 snapshot_format="json", compression=None,
+                 compact_size=1 << 24, compact_ratio=1.0,
+                 text_index=False) -> None:
+        """Initialization of FileStorage
+        A custom file_path gives the instance its own set of objects,
+        otherwise all instances share the class level __objects.
+        In sharded mode each class is kept in its own file inside the
+        directory named after file_path without its extension.
+        write_behind is the number of seconds between two background
+        writes, a write also starts once flush_changes saves are pending.
+        In lazy mode the objects are only created when first read.
+        durability is one of "none", "batch" or "always".
+        snapshot_format is "json" or "binary".
+        compression is "gzip" or "xz" and adds its extension to file_path,
+        a file_path already ending with .gz or .xz is compressed likewise.
+        In journal mode, the journal is compacted into a new snapshot in
+        the background once it reaches compact_size bytes or
+        compact_ratio times the size of the snapshot (0 disables either)
+        With text_index, the text indexes are written next to the
+        snapshot by flush and read back by reload, which saves tokenizing
+        again the objects that did not change
+        """
+        if durability not in _DURABILITY:
+            raise ValueError("durability must be one of " +
+                             ", ".join(_DURABILITY))
+        if snapshot_format not in _EXTENSIONS:
+            raise ValueError("snapshot_format must be one of " +
+                             ", ".join(_EXTENSIONS))
+        if compression and compression not in _COMPRESSION:
+            raise ValueError("compression must be one of " +
+                             ", ".join(_COMPRESSION))
+        if file_path is not None:
+            self.__file_path = file_path
+            self.__dirty = set()
+            self.__objects = ObjectRegistry(changed=self.__dirty,
+                                            **REGISTRY_INDEXES)
+            self.__fragments = {}
+        for name, suffix in _COMPRESSION.items():
+            if self.__file_path.endswith(suffix):
+                compression = name
+        if compression:
+            self.__compression = compression
+            suffix = _COMPRESSION[compression]
+            if not self.__file_path.endswith(suffix):
+                self.__file_path += suffix
+        self.__journal_path = self.__file_path + ".log"
+        self.__sealed_path = self.__journal_path + ".1"
+        if text_index:
+            self.__text_path = self.__file_path + ".text"
+        self.__journal = journal
+        self.__compact_size = compact_size
+        self.__compact_ratio = compact_ratio
+        self.__unjournaled = set()
+        if sharded:
+            self.__shard_dir = self.__shard_path()
+        if lazy:
+            self.__lazy = True
+            self.__objects = _LazyObjects(self.__objects,
+                                          changed=self.__dirty,
+                                          storage=self,
+                                          **REGISTRY_INDEXES)
+        self.__durability = durability
+        self.__format = snapshot_format
+        self.__mutex = threading.Lock()
+        self.__io_lock = threading.RLock()
+        self.__pending = 0
+        if write_behind:
+            self.__interval = write_behind
+            self.__flush_changes = flush_changes
+            self.__wake = threading.Condition()
+            self.__stopped = False
+            self.__flusher = threading.Thread(target=self.__flush_loop,
+                                              daemon=True)
+            self.__flusher.start()
+            atexit.register(self.flush)
+
+    @classmethod
+    def from_env(cls, environ=os.environ):
+        """returns the FileStorage configured by the HBNB_STORAGE_*
+        environment variables (see models/__init__.py)
+        """
+        return cls(journal=environ.get("HBNB_STORAGE_JOURNAL") == "1",
+                   sharded=environ.get("HBNB_STORAGE_SHARDED") == "1",
+                   write_behind=float(environ.get("HBNB_STORAGE_WRITE_BEHIND",
+                                                  0)),
+                   lazy=environ.get("HBNB_STORAGE_LAZY") == "1",
+                   durability=environ.get("HBNB_STORAGE_DURABILITY", "none"),
+                   snapshot_format=environ.get("HBNB_STORAGE_FORMAT", "json"),
+                   compression=environ.get("HBNB_STORAGE_COMPRESSION"),
+                   compact_size=int(environ.get("HBNB_STORAGE_COMPACT_SIZE",
+                                                1 << 24)),
+                   compact_ratio=float(
+                       environ.get("HBNB_STORAGE_COMPACT_RATIO", 1.0)),
+                   text_index=environ.get("HBNB_STORAGE_TEXT_INDEX") == "1")
+
+    @property
+    def _objects(self):
+        """the ObjectRegistry __objects, queried by RegistryStorage
         """
         return self.__objects
 
     def new(self, obj) -> None:
         """sets in __objects the obj with key <obj class name>.id
         """
-        self.__objects[obj.__class__.__name__ + "." + obj.id] = obj
+        key = obj.__class__.__name__ + "." + obj.id
+        set_storage(obj, self)
+        with self.__mutex:
+            # __objects adds key to __dirty
+            self.__objects[key] = obj
+
+    def delete(self, obj=None) -> None:
+        """removes obj from __objects if it is stored
+        """
+        if obj is None:
+            return
+        key = obj.__class__.__name__ + "." + obj.id
+        with self.__mutex:
+            # dict.get does not create the instance of a placeholder
+            if dict.get(self.__objects, key) is obj:
+                del self.__objects[key]
+
+    def touch(self, obj) -> None:
+        """marks obj as modified since the last save,
+        objects that are not stored are ignored
+        """
+        obj_id = getattr(obj, "id", None)
+        if obj_id is None:
+            return
+        key = obj.__class__.__name__ + "." + obj_id
+        if dict.get(self.__objects, key) is obj:
+            with self.__mutex:
+                self.__dirty.add(key)
+                self.__objects.refresh(key)
 
     def save(self) -> None:
         """serializes __objects to the JSON file (path: __file_path)
+        In journal mode only the objects changed since the last save
+        are appended to the journal (path: __journal_path).
+        In sharded mode only the files of the classes that changed
+        are rewritten, concurrently.
+        In write-behind mode the write is left to the background thread,
+        the error of its last failed write (if any) is raised here
+        """
+        if self.__flusher is None:
+            self.__write()
+            return
+        with self.__wake:
+            self.__pending += 1
+            if self.__pending >= self.__flush_changes:
+                self.__wake.notify()
+        self.__raise_error()
+
+    def flush(self) -> None:
+        """writes the changes saved in write-behind mode right away,
+        then waits for the running compaction (if any) to complete and
+        writes the text indexes that changed
+        The error of the last failed write of the write-behind thread
+        (if any) is then raised
+        """
+        self.__flush_pending()
+        if self.__compactor is not None:
+            self.__compactor.join()
+        self.__write_text_index()
+        self.__raise_error()
+
+    def close(self) -> None:
+        """writes what is pending (see flush) after stopping the
+        write-behind thread, the next saves then write right away
         """
-        save_data = {}
-        for k, v in self.__objects.items():
-            save_data[k] = v.to_dict()
+        flusher = self.__flusher
+        if flusher is not None:
+            with self.__wake:
+                self.__stopped = True
+                self.__wake.notify()
+            flusher.join()
+        self.flush()
+        if flusher is not None:
+            atexit.unregister(self.flush)
+            self.__flusher = None
+
+    def __flush_pending(self) -> None:
+        """writes the changes saved in write-behind mode,
+        does nothing when no save is pending
+        The pending saves are taken under the I/O lock, so a caller
+        finding none also waits for the write of the thread in progress
+        """
+        if self.__flusher is None:
+            return
+        with self.__io_lock:
+            with self.__wake:
+                pending = self.__pending
+                self.__pending = 0
+            if not pending:
+                return
+            try:
+                self.__write()
+            except Exception:
+                with self.__wake:
+                    self.__pending += pending
+                raise
+
+    def __raise_error(self) -> None:
+        """raises, on the thread of the caller, the error of the last
+        failed write of the write-behind thread (if any)
+        """
+        if self.__error is None:
+            return
+        with self.__wake:
+            error, self.__error = self.__error, None
+        if error is not None:
+            raise error
+
+    def __flush_loop(self) -> None:
+        """body of the write-behind thread: groups the saves made
+        during an interval (or up to flush_changes) into one write
+        """
+        failed = False
+        while True:
+            with self.__wake:
+                # after a failed write, the next one waits for the interval
+                self.__wake.wait_for(
+                    lambda: self.__stopped or not failed and
+                    self.__pending >= self.__flush_changes,
+                    self.__interval)
+                if self.__stopped:
+                    return
+            try:
+                self.__flush_pending()
+                failed = False
+            except Exception as e:
+                # the saves stay pending, the error is raised by the next
+                # save or flush
+                failed = True
+                with self.__wake:
+                    self.__error = e
+
+    def __write(self) -> None:
+        """writes the changes to the journal, the shards or the JSON file
+        After a failed write, the next one rewrites the whole snapshot
+        so that no change is lost
+        """
+        with self.__io_lock:
+            with self.__mutex:
+                put, deleted = self.__changes()
+            if self.__journal:
+                self.__write_journal(put, deleted)
+                return
+            resync = self.__resync
+            self.__resync = True
+            if self.__shard_dir is None:
+                self.__write_snapshot(self.__file_path,
+                                      list(self.__fragments.values()))
+            else:
+                self.__write_shards(set(self.__fragments) if resync else
+                                    {k.partition(".")[0]
+                                     for k in put + deleted})
+            self.__resync = False
+            # the snapshot now holds every change, the journal is obsolete
+            for path in (self.__journal_path, self.__sealed_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.__drop_migrated()
+
+    def __drop_migrated(self) -> None:
+        """removes the files read by reload that the snapshot just
+        written replaces (see __migrated)
+        """
+        for path in self.__migrated:
+            if os.path.isdir(path):
+                # the directory of the shards, kept if it holds other files
+                try:
+                    os.rmdir(path)
+                except OSError:
+                    pass
+            elif os.path.exists(path):
+                os.remove(path)
+        self.__migrated = ()
+
+    def __write_journal(self, put, deleted) -> None:
+        """appends the changes to the journal, with the changes of the
+        writes that failed since the last successful one.
+        After a failed append the journal may end with a torn record:
+        it is sealed first so that the new records start a clean file.
+        Starts a compaction when the journal has grown past a threshold
+        """
+        keys = self.__unjournaled
+        keys.update(put, deleted)
+        put = [k for k in keys
+               if k in self.__fragments.get(k.partition(".")[0], ())]
+        deleted = [k for k in keys
+                   if k not in self.__fragments.get(k.partition(".")[0], ())]
+        snapshot = None
+        if self.__resync:
+            if self.__compactor is not None:
+                self.__compactor.join()
+            snapshot = self.__seal()
+            self.__resync = False
+        try:
+            self.__append_journal(put, deleted)
+        except BaseException:
+            self.__resync = True
+            raise
+        finally:
+            if snapshot is not None:
+                self.__start_compaction(snapshot)
+        keys.clear()
+        if self.__needs_compaction():
+            self.__start_compaction(self.__seal())
+
+    def __needs_compaction(self) -> bool:
+        """tells whether the journal has reached the compaction
+        thresholds, never while a compaction is running
+        """
+        if self.__compactor is not None and self.__compactor.is_alive():
+            return False
+        try:
+            size = os.path.getsize(self.__journal_path)
+        except OSError:
+            return False
+        if self.__compact_size and size >= self.__compact_size:
+            return True
+        return bool(self.__compact_ratio) and size >= _COMPACT_MIN and \
+            size >= self.__compact_ratio * self.__snapshot_size()
+
+    def __snapshot_size(self) -> int:
+        """returns the size in bytes of the snapshot file or shards
+        """
+        try:
+            if self.__shard_dir is None:
+                return os.path.getsize(self.__file_path)
+            return sum(f.stat().st_size
+                       for f in os.scandir(self.__shard_dir))
+        except OSError:
+            return 0
+
+    def __seal(self) -> dict:
+        """moves the journal to __sealed_path, so that the following
+        records go to a new journal, and returns a copy of __fragments:
+        the persisted objects at that point, which the compaction writes
+        as the new snapshot. The records of a journal already sealed by
+        an unfinished compaction are kept, a torn record is dropped
+        """
+        if os.path.exists(self.__journal_path):
+            if os.path.exists(self.__sealed_path) or self.__resync:
+                with open(self.__journal_path, "r", encoding="utf-8") as src:
+                    with open(self.__sealed_path, "a",
+                              encoding="utf-8") as dst:
+                        dst.writelines(line for line in src
+                                       if line.endswith("\n"))
+                os.remove(self.__journal_path)
+            else:
+                os.replace(self.__journal_path, self.__sealed_path)
+        with self.__mutex:
+            return {name: {k: self.__convert(k, v) for k, v in shard.items()}
+                    for name, shard in self.__fragments.items()}
+
+    def __convert(self, key, fragment):
+        """returns the fragment in the layout of the snapshot format,
+        fragments read from a file of the other format are converted
+        """
+        if self.__format == "binary" and isinstance(fragment, str):
+            return binary_snapshot.encode_record(key, loads(fragment))
+        if self.__format == "json" and isinstance(fragment, bytes):
+            values = binary_snapshot.decode_record(key.partition(".")[0],
+                                                   fragment)[1]
+            for k in binary_snapshot.DATETIMES:
+                if isinstance(values.get(k), datetime):
+                    values[k] = values[k].isoformat()
+            return dumps(values)
+        return fragment
+
+    def __start_compaction(self, snapshot) -> None:
+        """writes snapshot in a background thread, the console keeps
+        appending to the new journal meanwhile. The thread is not a
+        daemon: an exiting console waits for the snapshot
+        """
+        self.__compactor = threading.Thread(target=self.__compact,
+                                            args=(snapshot,))
+        self.__compactor.start()
+
+    def __compact(self, snapshot) -> None:
+        """writes snapshot (the objects of the last snapshot with the
+        records of the sealed journal applied) then removes the sealed
+        journal. A crash in between only replays records the snapshot
+        already holds; after a failure, the sealed journal is kept and
+        replayed until the next compaction succeeds
+        """
+        try:
+            if self.__shard_dir is None:
+                self.__write_snapshot(self.__file_path,
+                                      list(snapshot.values()))
+            else:
+                self.__write_shards(set(snapshot), snapshot)
+            if os.path.exists(self.__sealed_path):
+                os.remove(self.__sealed_path)
+            self.__drop_migrated()
+        except OSError:
+            return
+        if self.__durability != "none":
+            _fsync_dir(os.path.dirname(self.__sealed_path) or ".")
+
+    def __changes(self) -> tuple:
+        """serializes the objects put since the last save into
+        __fragments and drops the fragments of deleted objects
+        Returns the keys put and deleted, found in __dirty which
+        __objects keeps up to date however it is changed (new, delete
+        or all() used as a dictionary)
+        """
+        objects = self.__objects
+        fragments = self.__fragments
+        put = []
+        deleted = []
+        for k in self.__dirty:
+            if k in objects:
+                put.append(k)
+            elif k in fragments.get(k.partition(".")[0], ()):
+                deleted.append(k)
+        for k in put:
+            fragments.setdefault(k.partition(".")[0], {})[k] = \
+                self.__encode(k, objects[k])
+        for k in deleted:
+            del fragments[k.partition(".")[0]][k]
+        self.__dirty.clear()
+        return put, deleted
+
+    def __encode(self, key, obj):
+        """returns the snapshot fragment of obj: the JSON text of its
+        dictionary or its binary record
+        """
+        if self.__format == "binary":
+            return binary_snapshot.encode_record(key,
+                                                 obj.to_dict(cache=False))
+        return dumps(obj.to_dict(cache=False))
+
+    def __migrate(self, path, journals) -> None:
+        """prepares the reload of the single snapshot path written with
+        other options (in one file instead of shards, with another
+        compression): its journals are added to the list journals to
+        replay and the next save writes the whole configured snapshot,
+        then removes the files read (see __migrated)
+        """
+        if not any(os.path.exists(path + end)
+                   for end in ("", ".log", ".log.1")):
+            return
+        self.__resync = True
+        if path == self.__file_path:
+            # the single file of the sharded mode shares its journals
+            self.__migrated = (path,)
+            return
+        self.__migrated = (path, path + ".log.1", path + ".log")
+        journals[:0] = self.__migrated[1:]
+
+    def __other_snapshot(self) -> str:
+        """returns the path of the snapshot file written with another
+        compression (file.json, file.json.gz or file.json.xz) found
+        with its journals, the configured path when there is none
+        """
+        for path in self.__snapshot_paths():
+            if any(os.path.exists(path + end)
+                   for end in ("", ".log", ".log.1")):
+                return path
+        return self.__file_path
+
+    def __snapshot_paths(self) -> list:
+        """returns the paths the single snapshot file may have been
+        written to: without compression, then with each compression
+        """
+        plain = self.__file_path[:len(self.__file_path) -
+                                 len(self.__suffix())]
+        return [plain] + [plain + s for s in _COMPRESSION.values()]
+
+    def __shard_path(self) -> str:
+        """returns the directory of the shards: __file_path without its
+        compression suffix and its extension (ex: file for file.json.gz)
+        """
+        return os.path.splitext(self.__snapshot_paths()[0])[0]
+
+    def __suffix(self) -> str:
+        """returns the extension added to the compressed files
+        """
+        return _COMPRESSION.get(self.__compression, "")
+
+    def __compress(self, f):
+        """returns a writer compressing into the binary file f,
+        or f itself when compression is off
+        """
+        if self.__compression == "gzip":
+            return gzip.GzipFile(mode="wb", fileobj=f, compresslevel=6)
+        if self.__compression == "xz":
+            return lzma.LZMAFile(f, "wb")
+        return nullcontext(f)
+
+    def __write_snapshot(self, path, shards) -> None:
+        """writes the fragments of the given shards to path, either as
+        a JSON object holding one "<class name>.id": {...} entry per line
+        or as a binary snapshot (see binary_snapshot), streamed through
+        the compressor one entry at a time
+        The file is written next to path then renamed over it, so a
+        crash leaves either the old or the new file, never a torn one
+        """
+        directory = os.path.dirname(path) or "."
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp",
+                                   prefix="." + os.path.basename(path))
         try:
-            with open(self.__file_path, "w", encoding="utf-8") as f:
-                dump(save_data, f)
+            with os.fdopen(fd, "wb") as raw:
+                with self.__compress(raw) as f:
+                    if self.__format == "binary":
+                        binary_snapshot.write_snapshot(f, shards)
+                    else:
+                        sep = "{\n"
+                        for shard in shards:
+                            for k, v in shard.items():
+                                f.write((sep + dumps(k) + ": " + v)
+                                        .encode("utf-8"))
+                                sep = ",\n"
+                        f.write(b"{\n}\n" if sep == "{\n" else b"\n}\n")
+                if self.__durability != "none":
+                    raw.flush()
+                    os.fsync(raw.fileno())
+            os.chmod(tmp, os.stat(path).st_mode if os.path.exists(path)
+                     else 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        if self.__durability == "always":
+            _fsync_dir(directory)
+
+    def __write_text_index(self) -> None:
+        """writes the text indexes to __text_path (if set) when one of
+        them changed, the whole file being replaced at once. The objects
+        are checked against their checksum when the file is read back,
+        so the file may lag behind the snapshot and a failed write is
+        ignored
+        """
+        if self.__text_path is None:
+            return
+        with self.__mutex:
+            indexes = self.__objects.indexes_of(TextIndex)
+            if not any(index.changed for _, _, index in indexes):
+                return
+            text = dumps({name: index.dump() for name, _, index in indexes})
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(
+                dir=os.path.dirname(self.__text_path) or ".", suffix=".tmp",
+                prefix="." + os.path.basename(self.__text_path))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, self.__text_path)
+        except OSError:
+            # the file is a cache: the next reload builds the indexes
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
+
+    def __read_text_index(self) -> None:
+        """provides the text indexes of __text_path (if set and readable)
+        to __objects, which checks them when they are first searched
+        """
+        if self.__text_path is None:
+            return
+        try:
+            with open(self.__text_path, "r", encoding="utf-8") as f:
+                indexes = loads(f.read())
+            for name, data in indexes.items():
+                index = TextIndex.restore(data)
+                self.__objects.restore(name, index.attr, index)
+        except (OSError, ValueError, KeyError, TypeError):
+            # a missing or unreadable file: the indexes are built again
+            return
+
+    def __write_shards(self, names, fragments=None) -> None:
+        """rewrites the files of the named classes in parallel, from
+        fragments (default __fragments), every class is written when
+        the shard directory is new
+        """
+        if fragments is None:
+            fragments = self.__fragments
+        if not os.path.isdir(self.__shard_dir):
+            os.makedirs(self.__shard_dir, exist_ok=True)
+            names = set(fragments)
+        if not names:
+            return
+        ext = _EXTENSIONS[self.__format] + self.__suffix()
+        with ThreadPoolExecutor(min(len(names), os.cpu_count() or 1)) as ex:
+            jobs = [ex.submit(self.__write_snapshot,
+                              os.path.join(self.__shard_dir, name + ext),
+                              [fragments.get(name, {})])
+                    for name in names]
+            for job in jobs:
+                job.result()
+        # drop the shards left by a previous format or compression
+        for name in names:
+            for other in _EXTENSIONS.values():
+                for suffix in ("",) + tuple(_COMPRESSION.values()):
+                    path = os.path.join(self.__shard_dir,
+                                        name + other + suffix)
+                    if other + suffix != ext and os.path.exists(path):
+                        os.remove(path)
+
+    def __append_journal(self, put, deleted) -> None:
+        """appends one put record per changed object and one delete
+        record per removed object to the journal
+        """
+        if not put and not deleted:
+            return
+        records = []
+        for k in put:
+            fragment = self.__fragments[k.partition(".")[0]][k]
+            if not isinstance(fragment, str):
+                fragment = dumps(self.__objects[k].to_dict(cache=False))
+            records.append('{"op": "put", "key": ' + dumps(k) +
+                           ', "value": ' + fragment + "}\n")
+        for k in deleted:
+            records.append(dumps({"op": "delete", "key": k}) + "\n")
+        created = not os.path.exists(self.__journal_path)
+        with open(self.__journal_path, "a", encoding="utf-8") as f:
+            if self.__durability == "always":
+                for record in records:
+                    f.write(record)
+                    f.flush()
+                    os.fsync(f.fileno())
+            else:
+                f.writelines(records)
+                if self.__durability == "batch":
+                    f.flush()
+                    os.fsync(f.fileno())
+        if created and self.__durability == "always":
+            _fsync_dir(os.path.dirname(self.__journal_path) or ".")
+
+    def __replay_journal(self, path, loaded) -> None:
+        """applies the records of the journal at path on top of __objects
+        A torn last record (interrupted write) ends the replay and is
+        cut off so that the next append starts on a clean line
+        """
+        try:
+            with open(path, "r+", encoding="utf-8") as f:
+                while True:
+                    pos = f.tell()
+                    line = f.readline()
+                    if not line:
+                        break
+                    record = None
+                    if line.endswith("\n"):
+                        try:
+                            record = loads(line)
+                        except JSONDecodeError:
+                            pass
+                    if record is None:
+                        f.seek(pos)
+                        f.truncate()
+                        break
+                    self.__apply(record, loaded)
         except IOError:
             pass
 
+    def __apply(self, record, loaded) -> None:
+        """applies a single journal record to __objects
+        """
+        key = record["key"]
+        name = key.partition(".")[0]
+        if record["op"] == "delete":
+            self.__objects.pop(key, None)
+            loaded.get(name, {}).pop(key, None)
+            return
+        text = dumps(record["value"])
+        try:
+            self.__objects[key] = self.__create(name, record["value"], text)
+        except KeyError:
+            return
+        loaded.setdefault(name, {})[key] = text
+
+    def __create(self, name, value, text):
+        """returns the instance of the class called name for the record
+        value, or a placeholder holding its JSON text in lazy mode
+        """
+        if self.__lazy:
+            return _Record(self.__models[name], text)
+        obj = self.__models[name](**value)
+        set_storage(obj, self)
+        return obj
+
+    def __load_file(self, path) -> tuple:
+        """deserializes one snapshot file, streaming it entry by entry so
+        that each object is created as soon as its entry is parsed.
+        A snapshot that cannot be read to the end is ignored as a whole,
+        the errors raised while creating an object are not caught
+        Returns the objects and their fragments grouped by class name
+        """
+        objects = {}
+        loaded = {}
+        try:
+            f = _open_snapshot(path)
+        except IOError:
+            return objects, loaded
+        with f:
+            entries = self.__iter_snapshot(f)
+            while True:
+                try:
+                    k, v, text = next(entries)
+                except StopIteration:
+                    break
+                except (IOError, EOFError, ValueError, lzma.LZMAError):
+                    return {}, {}
+                self.__add(objects, loaded, k, v, text)
+        return objects, loaded
+
+    def __iter_snapshot(self, f):
+        """parses the snapshot file f, recognizing binary snapshots by
+        their first bytes
+        Yields the key, the value and the fragment of every entry. In
+        lazy mode, the values of a JSON file written one entry per line
+        are not decoded (the value yielded is None)
+        """
+        magic = binary_snapshot.MAGIC
+        if f.read(len(magic)) == magic:
+            yield from binary_snapshot.iter_records(f)
+            return
+        f.seek(0)
+        f = io.TextIOWrapper(f, encoding="utf-8")
+        if self.__lazy:
+            entries = _split_lines(f)
+            if entries is not None:
+                yield from entries
+                return
+            f.seek(0)
+        for k, v, text in _iter_entries(f):
+            if "\n" in text:
+                # keep the snapshot layout of one entry per line
+                text = dumps(v)
+            yield k, v, text
+
+    def __add(self, objects, loaded, key, value, text) -> None:
+        """adds the object (or placeholder) of a parsed entry to objects
+        and its JSON text to loaded, entries of unknown classes are skipped
+        """
+        name = key.partition(".")[0]
+        try:
+            objects[key] = self.__create(name, value, text)
+        except KeyError:
+            return
+        loaded.setdefault(name, {})[key] = text
+
+    def __load_shards(self, directory) -> tuple:
+        """deserializes the file of every class inside directory in
+        parallel. Returns the objects and their fragments grouped by
+        class name
+        """
+        objects = {}
+        loaded = {}
+        # one file per class, in the current format when there are two
+        current = _EXTENSIONS[self.__format] + self.__suffix()
+        paths = {}
+        for name, path in self.__shard_files(directory):
+            if name not in paths or os.path.basename(path) == name + current:
+                paths[name] = path
+        if not paths:
+            return objects, loaded
+        # files left in another format or compression: rewrite them all
+        if any(os.path.basename(path) != name + current
+               for name, path in paths.items()):
+            self.__resync = True
+        with ThreadPoolExecutor(min(len(paths), os.cpu_count() or 1)) as ex:
+            results = ex.map(self.__load_file,
+                             [paths[name] for name in sorted(paths)])
+            for shard_objects, shard_loaded in results:
+                objects.update(shard_objects)
+                loaded.update(shard_loaded)
+        return objects, loaded
+
+    def __shard_files(self, directory) -> list:
+        """returns the (class name, path) of the files of the classes
+        inside directory, in every format and compression
+        """
+        try:
+            files = os.listdir(directory)
+        except IOError:
+            return []
+        found = []
+        for f in sorted(files):
+            base = f
+            for suffix in _COMPRESSION.values():
+                if base.endswith(suffix):
+                    base = base[:-len(suffix)]
+            name, ext = os.path.splitext(base)
+            if ext in _EXTENSIONS.values() and name in self.__models:
+                found.append((name, os.path.join(directory, f)))
+        return found
+
     def reload(self) -> None:
         """deserializes the JSON file to __objects (only if the JSON file
         (__file_path) exists ; otherwise, do nothing.
         If the file doesn’t exist, no exception should be raised)
+        The journal (if any) is then replayed on top of the snapshot
         """
-        try:
-            with open(self.__file_path, "r", encoding="utf-8") as f:
-                for k, v in load(f).items():
-                    try:
-                        self.__objects[k] = self.__models[k.split(".")[0]](**v)
-                    except IndexError:
-                        continue
-        except (IOError, JSONDecodeError):
-            pass
+        journals = [self.__sealed_path, self.__journal_path]
+        directory = self.__shard_dir
+        if directory is None and \
+                not any(os.path.exists(path)
+                        for path in self.__snapshot_paths()):
+            # shards written with sharding on, the journals are the
+            # same: the next save writes them into a single file
+            shards = self.__shard_files(self.__shard_path())
+            if shards:
+                directory = self.__shard_path()
+                self.__resync = True
+                self.__migrated = tuple(path for _, path in shards) + \
+                    (directory,)
+        if directory is not None and os.path.isdir(directory):
+            objects, loaded = self.__load_shards(directory)
+        else:
+            path = self.__file_path
+            if self.__shard_dir is not None or not os.path.exists(path):
+                path = self.__other_snapshot()
+            if self.__shard_dir is not None or path != self.__file_path:
+                self.__migrate(path, journals)
+            objects, loaded = self.__load_file(path)
+        self.__objects.update(objects)
+        self.__read_text_index()
+        # a sealed journal is older than the journal that follows it
+        for path in journals:
+            self.__replay_journal(path, loaded)
+        self.__fragments.clear()
+        self.__fragments.update(loaded)
+        fragment_type = bytes if self.__format == "binary" else str
+        for shard in loaded.values():
+            self.__dirty.difference_update(shard)
+            # read in the other format: encoded again by the next save
+            self.__dirty.update(k for k, v in shard.items()
+                                if type(v) is not fragment_type)
+        self.__compact_journal()
+
+    def __compact_journal(self) -> None:
+        """folds the journals found by reload into a new snapshot: in the
+        background in journal mode, once a threshold is reached or when
+        a compaction was interrupted, right away otherwise
+        """
+        sealed = os.path.exists(self.__sealed_path)
+        if not sealed and not os.path.exists(self.__journal_path):
+            return
+        with self.__io_lock:
+            try:
+                if not self.__journal:
+                    self.__compact(self.__seal())
+                elif sealed or self.__needs_compaction():
+                    if self.__compactor is not None:
+                        self.__compactor.join()
+                    self.__start_compaction(self.__seal())
+            except OSError:
+                pass
@@ -0,0 +1,652 @@
+#!/usr/bin/python3
+"""indexes module. Contains the secondary indexes kept by ObjectRegistry
+file name: indexes.py
+"""
+from bisect import bisect_left, bisect_right, insort
+from math import asin, cos, degrees, floor, log, radians, sin, sqrt
+import re
+from zlib import crc32
+
+# indexed attributes by class name: the ids of the related objects
+FOREIGN_KEYS = {
+    "City": ("state_id",),
+    "Place": ("city_id", "user_id"),
+    "Review": ("place_id", "user_id"),
+    }
+
+# attributes kept in sorted order by class name: the range queries
+RANGE_KEYS = {
+    "Place": ("price_by_night", "number_rooms", "number_bathrooms",
+              "max_guest"),
+    }
+
+# (latitude, longitude) attributes by class name: the map queries
+COORDINATES = ("latitude", "longitude")
+SPATIAL_KEYS = {
+    "Place": COORDINATES,
+    }
+
+# text attributes by class name: the full-text searches
+TEXT_KEYS = {
+    "Place": ("name", "description"),
+    "Review": ("text",),
+    "City": ("name",),
+    "State": ("name",),
+    "Amenity": ("name",),
+    }
+
+# attributes kept in columns by class name: the statistics, the numbers
+# to aggregate and the attributes to group them by
+COLUMN_KEYS = {
+    "Place": FOREIGN_KEYS["Place"] + RANGE_KEYS["Place"] + COORDINATES,
+    "Review": FOREIGN_KEYS["Review"],
+    }
+
+# the indexes kept by the storage engines, as ObjectRegistry arguments
+REGISTRY_INDEXES = {
+    "indexes": FOREIGN_KEYS,
+    "ranges": RANGE_KEYS,
+    "spatial": SPATIAL_KEYS,
+    "text": TEXT_KEYS,
+    "columns": COLUMN_KEYS,
+    }
+
+# the words of a text: runs of letters, digits and underscores
+_WORD = re.compile(r"\w+")
+
+# mean radius of the Earth in kilometers
+EARTH_RADIUS = 6371.0088
+
+
+class HashIndex:
+    """HashIndex class, the keys of the objects of one class by the
+    value of one of their attributes. Objects whose value is missing,
+    None or unhashable are left out
+
+    Attributes:
+        attr (public, instance attribute): string -
+                            name of the indexed attribute
+        __keys (private, instance attribute): dictionary -
+                            the keys (as the keys of a dict, in insertion
+                            order) of the objects by attribute value
+        __values (private, instance attribute): dictionary -
+                            the indexed value of every object by key
+
+    Methods:
+        build(self, pairs): indexes every (key, value) pair
+        put(self, key, value): indexes the object key under value
+        discard(self, key): removes the object key from the index
+        get(self, value): returns the keys of the objects having value
+    """
+    def __init__(self, attr) -> None:
+        """Initialization of HashIndex"""
+        self.attr = attr
+        self.__keys = {}
+        self.__values = {}
+
+    def build(self, pairs) -> None:
+        """indexes the object of every (key, value) pair of pairs
+        """
+        for key, value in pairs:
+            self.put(key, value)
+
+    def put(self, key, value) -> None:
+        """indexes the object stored under key under value,
+        replacing its previous value
+        """
+        if key in self.__values:
+            if self.__values[key] == value:
+                return
+            self.discard(key)
+        if value is None:
+            return
+        try:
+            self.__keys.setdefault(value, {})[key] = None
+        except TypeError:
+            return
+        self.__values[key] = value
+
+    def discard(self, key) -> None:
+        """removes the object stored under key from the index
+        """
+        if key not in self.__values:
+            return
+        value = self.__values.pop(key)
+        keys = self.__keys[value]
+        del keys[key]
+        if not keys:
+            del self.__keys[value]
+
+    def get(self, value):
+        """returns the keys of the objects whose attribute is value,
+        raises TypeError if value is unhashable
+        """
+        return self.__keys.get(value, {}).keys()
+
+
+class SortedIndex:
+    """SortedIndex class, the keys of the objects of one class sorted by
+    the value of a numeric attribute, for the range queries. Objects
+    whose value is missing or not a number are left out
+
+    Attributes:
+        attr (public, instance attribute): string -
+                            name of the indexed attribute
+        __sorted (private, instance attribute): list -
+                            the indexed values in ascending order
+        __keys (private, instance attribute): list -
+                            the key of the object of every value of
+                            __sorted, in key order between equal values
+        __values (private, instance attribute): dictionary -
+                            the indexed value of every object by key
+
+    Methods:
+        build(self, pairs): indexes every (key, value) pair at once
+        put(self, key, value): indexes the object key under value
+        discard(self, key): removes the object key from the index
+        get(self, value): returns the keys of the objects having value
+        range(self, low, high): returns the keys of the objects whose
+                    value is between low and high, by ascending value
+        size(self, low, high): returns the number of objects whose value
+                    is between low and high
+        __len__(self): returns the number of indexed objects
+    """
+    def __init__(self, attr) -> None:
+        """Initialization of SortedIndex"""
+        self.attr = attr
+        self.__sorted = []
+        self.__keys = []
+        self.__values = {}
+
+    @staticmethod
+    def indexable(value) -> bool:
+        """tells whether value is a number that can be indexed
+        """
+        return isinstance(value, (int, float)) and value == value
+
+    def __bounds(self, value) -> tuple:
+        """returns the slice of __sorted holding value
+        """
+        return (bisect_left(self.__sorted, value),
+                bisect_right(self.__sorted, value))
+
+    def build(self, pairs) -> None:
+        """indexes the object of every (key, value) pair of pairs with
+        one sort, the index must be empty
+        """
+        entries = sorted((value, key) for key, value in pairs
+                         if self.indexable(value))
+        self.__sorted = [value for value, _ in entries]
+        self.__keys = [key for _, key in entries]
+        self.__values = {key: value for value, key in entries}
+
+    def put(self, key, value) -> None:
+        """indexes the object stored under key under value,
+        replacing its previous value
+        """
+        if key in self.__values:
+            if self.__values[key] == value:
+                return
+            self.discard(key)
+        if not self.indexable(value):
+            return
+        lo, hi = self.__bounds(value)
+        i = bisect_left(self.__keys, key, lo, hi)
+        self.__sorted.insert(i, value)
+        self.__keys.insert(i, key)
+        self.__values[key] = value
+
+    def discard(self, key) -> None:
+        """removes the object stored under key from the index
+        """
+        if key not in self.__values:
+            return
+        lo, hi = self.__bounds(self.__values.pop(key))
+        i = bisect_left(self.__keys, key, lo, hi)
+        del self.__sorted[i]
+        del self.__keys[i]
+
+    def get(self, value) -> list:
+        """returns the keys of the objects whose attribute is value,
+        raises TypeError if value is not a number
+        """
+        if not self.indexable(value):
+            raise TypeError("not a number: " + repr(value))
+        lo, hi = self.__bounds(value)
+        return self.__keys[lo:hi]
+
+    def __slice(self, low, high) -> tuple:
+        """returns the bounds of the slice of __sorted between low and
+        high included (no bound when None)
+        """
+        lo = 0 if low is None else bisect_left(self.__sorted, low)
+        hi = len(self.__sorted) if high is None else \
+            bisect_right(self.__sorted, high)
+        return lo, max(lo, hi)
+
+    def range(self, low=None, high=None) -> list:
+        """returns the keys of the objects whose attribute is between
+        low and high included (no bound when None), by ascending value
+        """
+        lo, hi = self.__slice(low, high)
+        return self.__keys[lo:hi]
+
+    def size(self, low=None, high=None) -> int:
+        """returns the number of objects whose attribute is between
+        low and high included (no bound when None)
+        """
+        lo, hi = self.__slice(low, high)
+        return hi - lo
+
+    def __len__(self) -> int:
+        """returns the number of indexed objects
+        """
+        return len(self.__keys)
+
+
+def distance(point, other) -> float:
+    """returns the great-circle distance in kilometers between two
+    (latitude, longitude) points given in degrees (haversine formula)
+    """
+    lat1, lon1 = map(radians, point)
+    lat2, lon2 = map(radians, other)
+    h = sin((lat2 - lat1) / 2) ** 2 + \
+        cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * asin(min(1.0, sqrt(h)))
+
+
+def in_box(point, south, west, north, east) -> bool:
+    """tells whether the (latitude, longitude) point is inside the box,
+    which crosses the antimeridian when west > east
+    """
+    lat, lon = point
+    if not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lon <= east
+    return lon >= west or lon <= east
+
+
+def radius_box(latitude, longitude, km) -> tuple:
+    """returns the (south, west, north, east) box holding every point
+    within km kilometers of (latitude, longitude)
+    """
+    angle = km / EARTH_RADIUS
+    south = latitude - degrees(angle)
+    north = latitude + degrees(angle)
+    if south <= -90 or north >= 90 or \
+            sin(angle) >= cos(radians(latitude)):
+        # a pole is inside the circle: every longitude
+        return max(south, -90.0), -180.0, min(north, 90.0), 180.0
+    spread = degrees(asin(sin(angle) / cos(radians(latitude))))
+    west = longitude - spread
+    east = longitude + spread
+    if east - west >= 360:
+        return south, -180.0, north, 180.0
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return south, west, north, east
+
+
+class GridIndex:
+    """GridIndex class, the keys of the objects of one class by the
+    cell of a grid of the Earth holding their (latitude, longitude),
+    for the map queries. Objects whose coordinates are missing or not
+    numbers are left out
+
+    Attributes:
+        attr (public, instance attribute): tuple -
+                            names of the latitude and longitude attributes
+        cell (public, instance attribute): float -
+                            side of the cells in degrees
+        __cells (private, instance attribute): dictionary -
+                            the point of every object by key, by cell
+        __points (private, instance attribute): dictionary -
+                            the indexed point of every object by key
+
+    Methods:
+        build(self, pairs): indexes every (key, point) pair
+        put(self, key, value): indexes the object key at the point value
+        discard(self, key): removes the object key from the index
+        get(self, value): returns the keys of the objects at a point
+        box(self, south, west, north, east): returns the keys of the
+                    objects inside a box
+        near(self, latitude, longitude, km): returns the keys of the
+                    objects within km kilometers, nearest first
+    """
+    def __init__(self, attr, cell=0.1) -> None:
+        """Initialization of GridIndex"""
+        self.attr = attr
+        self.cell = cell
+        self.__cells = {}
+        self.__points = {}
+
+    @staticmethod
+    def indexable(value) -> bool:
+        """tells whether value is a (latitude, longitude) pair of numbers
+        that can be indexed
+        """
+        return isinstance(value, tuple) and len(value) == 2 and \
+            all(isinstance(v, (int, float)) and v == v for v in value)
+
+    def __cell(self, point) -> tuple:
+        """returns the cell holding point
+        """
+        return floor(point[0] / self.cell), floor(point[1] / self.cell)
+
+    def build(self, pairs) -> None:
+        """indexes the object of every (key, point) pair of pairs
+        """
+        for key, value in pairs:
+            self.put(key, value)
+
+    def put(self, key, value) -> None:
+        """indexes the object stored under key at the point value,
+        replacing its previous point
+        """
+        if key in self.__points:
+            if self.__points[key] == value:
+                return
+            self.discard(key)
+        if not self.indexable(value):
+            return
+        self.__cells.setdefault(self.__cell(value), {})[key] = value
+        self.__points[key] = value
+
+    def discard(self, key) -> None:
+        """removes the object stored under key from the index
+        """
+        if key not in self.__points:
+            return
+        cell = self.__cell(self.__points.pop(key))
+        points = self.__cells[cell]
+        del points[key]
+        if not points:
+            del self.__cells[cell]
+
+    def get(self, value) -> list:
+        """returns the keys of the objects at the point value,
+        raises TypeError if value is not a point
+        """
+        if not self.indexable(value):
+            raise TypeError("not a point: " + repr(value))
+        points = self.__cells.get(self.__cell(value), {})
+        return [key for key, point in points.items() if point == value]
+
+    def __columns(self, west, east) -> list:
+        """returns the ranges of cell columns covering west to east
+        """
+        first, last = floor(west / self.cell), floor(east / self.cell)
+        if west <= east:
+            return [range(first, last + 1)]
+        return [range(first, floor(180 / self.cell) + 1),
+                range(floor(-180 / self.cell), last + 1)]
+
+    def box(self, south, west, north, east) -> list:
+        """returns the keys of the objects inside the box, which crosses
+        the antimeridian when west > east
+        """
+        rows = range(floor(south / self.cell), floor(north / self.cell) + 1)
+        columns = self.__columns(west, east)
+        if len(rows) * sum(map(len, columns)) > len(self.__cells):
+            # a box larger than the occupied cells: go through them
+            cells = self.__cells.values()
+        else:
+            cells = (self.__cells.get((i, j), {})
+                     for i in rows for span in columns for j in span)
+        return [key for points in cells for key, point in points.items()
+                if in_box(point, south, west, north, east)]
+
+    def near(self, latitude, longitude, km) -> list:
+        """returns the keys of the objects within km kilometers of
+        (latitude, longitude), nearest first
+        """
+        center = (latitude, longitude)
+        found = []
+        for key in self.box(*radius_box(latitude, longitude, km)):
+            d = distance(center, self.__points[key])
+            if d <= km:
+                found.append((d, key))
+        return [key for _, key in sorted(found)]
+
+
+def tokenize(text) -> list:
+    """returns the words of text, case folded
+    """
+    return _WORD.findall(text.casefold())
+
+
+class TextIndex:
+    """TextIndex class, inverted index of the words of the text
+    attributes of the objects of one class, for the full-text searches.
+    The results are ranked with BM25. The objects are numbered so that
+    the occurrences of a word read from a file (see dump and restore)
+    can stay packed in a string until a search needs them
+
+    Attributes:
+        attr (public, instance attribute): tuple -
+                            names of the indexed text attributes
+        changed (public, instance attribute): boolean -
+                            True when the index changed since it was
+                            restored or dumped
+        __postings (private, instance attribute): dictionary -
+                            the number of occurrences of a word in every
+                            object holding it by object number, by word
+                            (a packed string for the restored words that
+                            were not searched yet)
+        __docs (private, instance attribute): dictionary -
+                            the checksum of the text, the number of words
+                            and the distinct words (a string of words when
+                            restored) of every object by key
+        __numbers (private, instance attribute): dictionary -
+                            the number of every object by key
+        __keys (private, instance attribute): list -
+                            the key of every object number, None for the
+                            numbers of the removed objects
+        __words (private, instance attribute): list -
+                            every indexed word in sorted order, for the
+                            prefix searches, None while build runs
+        __total (private, instance attribute): integer -
+                            number of words of all the objects
+
+    Methods:
+        checksum(value): returns the text and checksum of a value
+        build(self, pairs): indexes every (key, value) pair, keeping
+                    the objects of a restored index that did not change
+        put(self, key, value): indexes the words of the object key
+        discard(self, key): removes the object key from the index
+        search(self, query, prefix): returns the keys of the objects
+                    holding every word of query, best match first
+        dump(self): returns the index as a JSON serializable dictionary
+        restore(cls, data): returns the index dumped as data
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, attr) -> None:
+        """Initialization of TextIndex"""
+        self.attr = attr
+        self.changed = False
+        self.__postings = {}
+        self.__docs = {}
+        self.__numbers = {}
+        self.__keys = []
+        self.__words = []
+        self.__total = 0
+
+    @staticmethod
+    def checksum(value) -> tuple:
+        """returns the text of value (a tuple of attribute values, the
+        strings among them are indexed) and its checksum
+        """
+        text = " ".join(v for v in value if isinstance(v, str)) \
+            if isinstance(value, tuple) else ""
+        return text, crc32(text.encode("utf-8", "surrogatepass"))
+
+    def __posting(self, word) -> dict:
+        """returns the occurrences of word by object number, unpacking
+        them first if they were restored
+        """
+        postings = self.__postings.get(word)
+        if isinstance(postings, str):
+            postings = self.__postings[word] = {
+                int(n): int(count) for n, _, count in
+                (entry.partition(":") for entry in postings.split())}
+        return postings
+
+    def build(self, pairs) -> None:
+        """indexes the object of every (key, value) pair of pairs. The
+        objects of a restored index whose text did not change are kept
+        as they are, the others are indexed again
+        """
+        keys = set()
+        # the words are sorted once at the end
+        self.__words = None
+        for key, value in pairs:
+            keys.add(key)
+            self.put(key, value)
+        for key in [k for k in self.__docs if k not in keys]:
+            self.discard(key)
+        self.__words = sorted(self.__postings)
+
+    def put(self, key, value) -> None:
+        """indexes the words of the text attributes value of the object
+        stored under key, replacing its previous words
+        """
+        text, crc = self.checksum(value)
+        if key in self.__docs:
+            if self.__docs[key][0] == crc:
+                return
+            self.discard(key)
+        words = tokenize(text)
+        if not words:
+            return
+        counts = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        n = self.__numbers[key] = len(self.__keys)
+        self.__keys.append(key)
+        for word, count in counts.items():
+            postings = self.__posting(word)
+            if postings is None:
+                postings = self.__postings[word] = {}
+                if self.__words is not None:
+                    insort(self.__words, word)
+            postings[n] = count
+        self.__docs[key] = (crc, len(words), tuple(counts))
+        self.__total += len(words)
+        self.changed = True
+
+    def discard(self, key) -> None:
+        """removes the object stored under key from the index
+        """
+        if key not in self.__docs:
+            return
+        _, length, words = self.__docs.pop(key)
+        n = self.__numbers.pop(key)
+        self.__keys[n] = None
+        self.__total -= length
+        if isinstance(words, str):
+            words = words.split()
+        for word in words:
+            postings = self.__posting(word)
+            del postings[n]
+            if not postings:
+                del self.__postings[word]
+                if self.__words is not None:
+                    del self.__words[bisect_left(self.__words, word)]
+        self.changed = True
+
+    def __matches(self, word, prefix) -> dict:
+        """returns the occurrences of word by object number, with the
+        occurrences of every word starting with word added up when
+        prefix is True
+        """
+        if not prefix:
+            return self.__posting(word) or {}
+        matches = {}
+        i = bisect_left(self.__words, word)
+        while i < len(self.__words) and self.__words[i].startswith(word):
+            for n, count in self.__posting(self.__words[i]).items():
+                matches[n] = matches.get(n, 0) + count
+            i += 1
+        return matches
+
+    def search(self, query, prefix=False) -> list:
+        """returns the keys of the objects holding every word of query
+        (the last one being the start of a word when prefix is True, as
+        typed in a search box), the best BM25 match first
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        words = list(dict.fromkeys(words))
+        matches = [self.__matches(word, prefix and word == words[-1])
+                   for word in words]
+        matches.sort(key=len)
+        found = [n for n in matches[0] if all(n in m for m in matches[1:])]
+        total = len(self.__docs)
+        average = self.__total / total if total else 0
+        scores = []
+        for n in found:
+            key = self.__keys[n]
+            norm = self.k1 * (1 - self.b + self.b *
+                              self.__docs[key][1] / average)
+            score = 0.0
+            for m in matches:
+                idf = log(1 + (total - len(m) + 0.5) / (len(m) + 0.5))
+                score += idf * m[n] * (self.k1 + 1) / (m[n] + norm)
+            scores.append((-score, key))
+        return [key for _, key in sorted(scores)]
+
+    def __renumber(self) -> None:
+        """numbers the objects again from 0, dropping the numbers of
+        the removed objects
+        """
+        numbers = {n: i for i, n in enumerate(self.__numbers.values())}
+        self.__postings = {word: {numbers[n]: count for n, count
+                                  in self.__posting(word).items()}
+                           for word in list(self.__postings)}
+        self.__keys = list(self.__numbers)
+        self.__numbers = {key: i for i, key in enumerate(self.__keys)}
+
+    def dump(self) -> dict:
+        """returns the index as a dictionary that json can write: the
+        keys by number, the checksum, length and words of every object
+        and the "number:occurrences" of every word packed in a string
+        """
+        if len(self.__keys) > 2 * len(self.__numbers):
+            self.__renumber()
+        docs = {}
+        for key, (crc, length, words) in self.__docs.items():
+            docs[self.__numbers[key]] = \
+                (crc, length, words if isinstance(words, str)
+                 else " ".join(words))
+        self.changed = False
+        return {"attr": list(self.attr),
+                "keys": self.__keys,
+                "docs": [docs.get(n) for n in range(len(self.__keys))],
+                "postings": {word: postings if isinstance(postings, str)
+                             else " ".join(str(n) + ":" + str(count)
+                                           for n, count in postings.items())
+                             for word, postings in self.__postings.items()}}
+
+    @classmethod
+    def restore(cls, data):
+        """returns the TextIndex dumped as data by dump, the occurrences
+        of the words stay packed until they are searched
+        """
+        index = cls(tuple(data["attr"]))
+        index.__keys = data["keys"]
+        for n, (key, doc) in enumerate(zip(index.__keys, data["docs"])):
+            if key is None:
+                continue
+            crc, length, words = doc
+            index.__numbers[key] = n
+            index.__docs[key] = (crc, length, words)
+            index.__total += length
+        index.__postings = dict(data["postings"])
+        index.__words = sorted(index.__postings)
+        return index
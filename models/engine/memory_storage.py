@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""memory_storage module. Contains MemoryStorage class
+file name: memory_storage.py
+"""
+from models.engine.indexes import REGISTRY_INDEXES
+from models.engine.object_registry import ObjectRegistry
+from models.engine.registry_storage import RegistryStorage
+from models.base_model import set_storage
+
+
+class MemoryStorage(RegistryStorage):
+    """MemoryStorage class, keeps the objects in memory only: nothing is
+    read or written to the disk and the objects are lost on exit
+
+    Attributes:
+        __objects (private, instance attribute): ObjectRegistry -
+                            the objects by <class name>.id
+
+    Methods:
+        _objects(self): returns __objects, which RegistryStorage answers
+                    all, count, lookup... from
+        new(self, obj): sets in __objects the obj with key
+                    <obj class name>.id
+        delete(self, obj): removes obj from __objects
+        touch(self, obj): updates the indexes of a modified obj
+        save(self): nothing to persist
+        reload(self): nothing to read
+    """
+    def __init__(self) -> None:
+        """Initialization of MemoryStorage"""
+        self.__objects = ObjectRegistry(**REGISTRY_INDEXES)
+
+    @property
+    def _objects(self):
+        """the ObjectRegistry __objects, queried by RegistryStorage
+        """
+        return self.__objects
+
+    def new(self, obj) -> None:
+        """sets in __objects the obj with key <obj class name>.id
+        """
+        set_storage(obj, self)
+        self.__objects[obj.__class__.__name__ + "." + obj.id] = obj
+
+    def delete(self, obj=None) -> None:
+        """removes obj from __objects if it is stored
+        """
+        if obj is None:
+            return
+        key = obj.__class__.__name__ + "." + obj.id
+        if self.__objects.get(key) is obj:
+            del self.__objects[key]
+
+    def touch(self, obj) -> None:
+        """updates the indexes of obj after a modification
+        """
+        key = obj.__class__.__name__ + "." + getattr(obj, "id", "")
+        if self.__objects.get(key) is obj:
+            self.__objects.refresh(key)
+
+    def save(self) -> None:
+        """the objects only live in memory, nothing to persist
+        """
+
+    def reload(self) -> None:
+        """the objects only live in memory, nothing to read
+        """
@@ -0,0 +1,372 @@
+#!/usr/bin/python3
+"""object_registry module. Contains ObjectRegistry class
+file name: object_registry.py
+"""
+from models.engine.columns import ColumnIndex, aggregate, \
+    check_aggregation, numpy
+from models.engine.indexes import GridIndex, HashIndex, SortedIndex, \
+    TextIndex, distance, in_box, radius_box
+
+
+class ObjectRegistry(dict):
+    """ObjectRegistry class, the dictionary of the stored objects by
+    <class name>.id that also keeps the keys of every class apart, so
+    that the objects or the number of objects of one class are found
+    without going through the other classes
+
+    The registry also keeps secondary indexes on attributes of the
+    objects, built the first time they are looked up and then kept up
+    to date as objects are stored, removed or refreshed
+
+    Attributes:
+        __classes (private, instance attribute): dictionary -
+                            the keys of each class by class name, kept
+                            in insertion order as the keys of a dict
+        __indexes (private, instance attribute): dictionary -
+                            the indexes of each class by class name then
+                            by attribute name, None until built
+        __kinds (private, instance attribute): dictionary -
+                            the index class (HashIndex, SortedIndex,
+                            GridIndex, TextIndex or ColumnIndex) of
+                            every (class name, attribute)
+        __restored (private, instance attribute): dictionary -
+                            indexes read from a file by (class name,
+                            attribute), checked and completed by their
+                            first lookup instead of built from scratch
+        __changed (private, instance attribute): set -
+                            receives every key stored or removed, None
+                            when the changes are not recorded
+
+    Methods:
+        keys_of(self, name): returns the keys of the class called name
+        count(self, name): returns the number of objects of a class
+        class_names(self): returns the names of the stored classes
+        add_index(self, name, attr, kind): indexes an attribute of a
+                    class in a HashIndex, a SortedIndex or (for a tuple
+                    of attributes) a GridIndex, a TextIndex or a
+                    ColumnIndex
+        index(self, name, attr): returns the index of an attribute
+        restore(self, name, attr, index): provides an index read from
+                    a file, to be checked by its first lookup
+        indexes_of(self, kind): returns the built or restored indexes
+                    of a kind
+        lookup(self, name, attr, value): returns the keys of the objects
+                    of a class whose attribute is value
+        lookup_range(self, name, attr, low, high): returns the keys of
+                    the objects of a class whose attribute is between
+                    low and high, by ascending value
+        lookup_box(self, name, attrs, south, west, north, east): returns
+                    the keys of the objects of a class inside a box
+        lookup_near(self, name, attrs, latitude, longitude, km): returns
+                    the keys of the objects of a class within km
+                    kilometers of a point, nearest first
+        lookup_text(self, name, attrs, query, prefix): returns the keys
+                    of the objects of a class whose text attributes hold
+                    every word of query, best match first
+        aggregate(self, name, attrs, attr, func, by, q, groups): returns
+                    the sum, mean... of an attribute of the objects of a
+                    class, by value of another attribute
+        refresh(self, key): updates the indexes after the object stored
+                    under key was modified
+        attribute(self, key, attr): returns an attribute (or a tuple of
+                    attributes) of the object stored under key
+    """
+    def __init__(self, *args, indexes=None, ranges=None, spatial=None,
+                 text=None, columns=None, changed=None, **kwargs) -> None:
+        """Initialization of ObjectRegistry, same arguments as dict,
+        indexes gives the attributes kept in a HashIndex by class name,
+        ranges the attributes kept in a SortedIndex, spatial the
+        (latitude, longitude) attributes kept in a GridIndex, text
+        the attributes whose words are kept in a TextIndex and columns
+        the attributes kept in a ColumnIndex (ignored without NumPy).
+        The keys stored or removed, however they are, are added to the
+        set changed if given
+        """
+        super().__init__()
+        self.__classes = {}
+        self.__indexes = {}
+        self.__kinds = {}
+        self.__restored = {}
+        self.__changed = changed
+        for kind, attributes in ((HashIndex, indexes),
+                                 (SortedIndex, ranges)):
+            for name, attrs in (attributes or {}).items():
+                for attr in attrs:
+                    self.add_index(name, attr, kind)
+        # without NumPy the aggregations go through the objects
+        if numpy is None:
+            columns = None
+        for kind, attributes in ((GridIndex, spatial), (TextIndex, text),
+                                 (ColumnIndex, columns)):
+            for name, attrs in (attributes or {}).items():
+                self.add_index(name, tuple(attrs), kind)
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, key, value) -> None:
+        """stores value under key and files key under its class
+        """
+        if not dict.__contains__(self, key):
+            name = key.partition(".")[0]
+            self.__classes.setdefault(name, {})[key] = None
+        dict.__setitem__(self, key, value)
+        if self.__changed is not None:
+            self.__changed.add(key)
+        self.refresh(key)
+
+    def __delitem__(self, key) -> None:
+        """removes key from the objects and from its class
+        """
+        dict.__delitem__(self, key)
+        self.__unfile(key)
+
+    def __ior__(self, other):
+        """self |= other, same as update
+        """
+        self.update(other)
+        return self
+
+    def __unfile(self, key) -> None:
+        """removes key from the keys and the indexes of its class
+        """
+        name = key.partition(".")[0]
+        if self.__changed is not None:
+            self.__changed.add(key)
+        for index in self.__indexes.get(name, {}).values():
+            if index is not None:
+                index.discard(key)
+        keys = self.__classes[name]
+        del keys[key]
+        if not keys:
+            del self.__classes[name]
+
+    def pop(self, key, *default):
+        """removes key and returns its value (or default if given
+        and key is not stored)
+        """
+        if not dict.__contains__(self, key):
+            return dict.pop(self, key, *default)
+        value = dict.pop(self, key)
+        self.__unfile(key)
+        return value
+
+    def popitem(self) -> tuple:
+        """removes and returns the last (key, value) pair
+        """
+        key, value = dict.popitem(self)
+        self.__unfile(key)
+        return key, value
+
+    def clear(self) -> None:
+        """removes every object
+        """
+        if self.__changed is not None:
+            self.__changed.update(dict.keys(self))
+        dict.clear(self)
+        self.__classes.clear()
+        for indexes in self.__indexes.values():
+            for attr in indexes:
+                indexes[attr] = None
+
+    def setdefault(self, key, default=None):
+        """returns the value of key, storing default first if key
+        is not stored
+        """
+        if not dict.__contains__(self, key):
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs) -> None:
+        """stores every (key, value) pair of the arguments, as dict does
+        """
+        if args:
+            other, = args
+            for key, value in (other.items() if hasattr(other, "keys")
+                               else other):
+                self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def keys_of(self, name):
+        """returns the keys of the objects of the class called name
+        """
+        return self.__classes.get(name, {}).keys()
+
+    def count(self, name) -> int:
+        """returns the number of objects of the class called name
+        """
+        return len(self.__classes.get(name, ()))
+
+    def class_names(self) -> list:
+        """returns the names of the classes having objects
+        """
+        return list(self.__classes)
+
+    def add_index(self, name, attr, kind=HashIndex) -> None:
+        """indexes the attribute attr of the objects of the class
+        called name in an index of the class kind, built by its
+        first lookup
+        """
+        self.__indexes.setdefault(name, {})[attr] = None
+        self.__kinds[name, attr] = kind
+
+    def __index(self, name, attr):
+        """returns the index of attr in the class called name, building
+        it if needed, or None if the attribute is not indexed
+        """
+        indexes = self.__indexes.get(name, {})
+        if attr not in indexes:
+            return None
+        index = indexes[attr]
+        if index is None:
+            index = self.__restored.pop((name, attr), None) or \
+                self.__kinds[name, attr](attr)
+            indexes[attr] = index
+            index.build((key, self.attribute(key, attr))
+                        for key in self.keys_of(name))
+        return index
+
+    def index(self, name, attr):
+        """returns the index of attr (an attribute name or a tuple of
+        them) in the class called name, built if needed, None when attr
+        is not indexed
+        """
+        return self.__index(name, attr)
+
+    def restore(self, name, attr, index) -> None:
+        """provides index (an index of attr in the class called name read
+        from a file) to the first lookup of attr, which completes it
+        with the objects that changed instead of building a new one.
+        The index must rebuild what changed in its build method
+        """
+        if (name, attr) in self.__kinds:
+            self.__restored[name, attr] = index
+
+    def indexes_of(self, kind) -> list:
+        """returns the (class name, attribute, index) of every index of
+        the class kind built so far or restored and not looked up yet
+        """
+        return [(name, attr, index)
+                for name, indexes in self.__indexes.items()
+                for attr, index in indexes.items()
+                if isinstance(index, kind)] + \
+            [(name, attr, index)
+             for (name, attr), index in self.__restored.items()
+             if isinstance(index, kind)]
+
+    def lookup(self, name, attr, value) -> list:
+        """returns the keys of the objects of the class called name
+        whose attribute attr equals value, through the index of attr
+        when there is one, by going through the class otherwise
+        """
+        index = self.__index(name, attr)
+        if index is not None:
+            try:
+                return list(index.get(value))
+            except TypeError:
+                pass
+        return [key for key in self.keys_of(name)
+                if self.attribute(key, attr) == value]
+
+    def lookup_range(self, name, attr, low=None, high=None) -> list:
+        """returns the keys of the objects of the class called name
+        whose attribute attr is a number between low and high included
+        (no bound when None), by ascending value, through the SortedIndex
+        of attr when there is one, by going through the class otherwise
+        """
+        index = self.__index(name, attr)
+        if isinstance(index, SortedIndex):
+            return index.range(low, high)
+        found = []
+        for key in self.keys_of(name):
+            value = self.attribute(key, attr)
+            if SortedIndex.indexable(value) and \
+                    (low is None or value >= low) and \
+                    (high is None or value <= high):
+                found.append((value, key))
+        return [key for _, key in sorted(found)]
+
+    def lookup_box(self, name, attrs, south, west, north, east) -> list:
+        """returns the keys of the objects of the class called name whose
+        (latitude, longitude) attributes attrs are inside the box (which
+        crosses the antimeridian when west > east), through the GridIndex
+        of attrs when there is one, by going through the class otherwise
+        """
+        attrs = tuple(attrs)
+        index = self.__index(name, attrs)
+        if isinstance(index, GridIndex):
+            return index.box(south, west, north, east)
+        return [key for key in self.keys_of(name)
+                if GridIndex.indexable(self.attribute(key, attrs)) and
+                in_box(self.attribute(key, attrs), south, west, north, east)]
+
+    def lookup_near(self, name, attrs, latitude, longitude, km) -> list:
+        """returns the keys of the objects of the class called name whose
+        (latitude, longitude) attributes attrs are within km kilometers
+        of (latitude, longitude), nearest first, through the GridIndex of
+        attrs when there is one, by going through the class otherwise
+        """
+        attrs = tuple(attrs)
+        index = self.__index(name, attrs)
+        if isinstance(index, GridIndex):
+            return index.near(latitude, longitude, km)
+        found = []
+        for key in self.lookup_box(name, attrs,
+                                   *radius_box(latitude, longitude, km)):
+            d = distance((latitude, longitude), self.attribute(key, attrs))
+            if d <= km:
+                found.append((d, key))
+        return [key for _, key in sorted(found)]
+
+    def lookup_text(self, name, attrs, query, prefix=False) -> list:
+        """returns the keys of the objects of the class called name whose
+        text attributes attrs hold every word of query (the last one
+        being the start of a word when prefix is True), best match
+        first, through the TextIndex of attrs when there is one, through
+        a TextIndex built for the query otherwise
+        """
+        attrs = tuple(attrs)
+        index = self.__index(name, attrs)
+        if not isinstance(index, TextIndex):
+            index = TextIndex(attrs)
+            index.build((key, self.attribute(key, attrs))
+                        for key in self.keys_of(name))
+        return index.search(query, prefix)
+
+    def aggregate(self, name, attrs, attr, func="sum", by=None, q=50,
+                  groups=None):
+        """returns func (see columns.FUNCTIONS) of the numbers of the
+        attribute attr of the objects of the class called name (the
+        number of objects for count when attr is None): a number, or
+        with by a dictionary of the results by value of the attribute by,
+        each value going through the dictionary groups if given. Through
+        the ColumnIndex of attrs when it holds attr and by, by going
+        through the class otherwise
+        """
+        check_aggregation(attr, func, q)
+        index = self.__index(name, tuple(attrs))
+        if isinstance(index, ColumnIndex) and \
+                {attr, by} - {None} <= set(index.attr):
+            return index.aggregate(attr, func, by, q, groups)
+        return aggregate(((self.attribute(key, by) if by else None,
+                           self.attribute(key, attr) if attr else 0)
+                          for key in self.keys_of(name)),
+                         func, by is not None, q, groups)
+
+    def refresh(self, key) -> None:
+        """updates the built indexes of the class of key with the
+        current attributes of the object stored under key
+        """
+        for attr, index in self.__indexes.get(key.partition(".")[0],
+                                              {}).items():
+            if index is not None:
+                index.put(key, self.attribute(key, attr))
+
+    def attribute(self, key, attr):
+        """returns the attribute attr of the object stored under key,
+        None if it has none. With a tuple of names, returns the tuple
+        of their attributes
+        """
+        obj = dict.__getitem__(self, key)
+        if isinstance(attr, tuple):
+            return tuple(getattr(obj, a, None) for a in attr)
+        return getattr(obj, attr, None)
@@ -0,0 +1,272 @@
+#!/usr/bin/python3
+"""query module. Contains Query class, returned by storage.query(cls)
+file name: query.py
+
+    storage.query(Place).filter(city_id=city.id,
+                                price_by_night__lte=100) \\
+        .order_by("-price_by_night").limit(10)
+
+A filter is <attribute>=<value> or <attribute>__<operator>=<value> with
+an operator of OPERATORS. The query runs when it is iterated, as a
+generator: the objects are created and checked one at a time. On the
+engines that keep their objects in an ObjectRegistry, the keys to check
+come from the most selective index that applies to the filters (or
+that already gives the requested order), the other engines go through
+every object of the class.
+"""
+from math import ceil
+import operator
+from models.engine.base_storage import class_name
+from models.engine.indexes import HashIndex, SortedIndex
+from models.engine.object_registry import ObjectRegistry
+
+# filter operators by name: operator(attribute value, filter value)
+OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda value, values: value in values,
+    }
+
+
+class Query:
+    """Query class, the objects of a class matching filters in a given
+    order. Every method returns a new Query, the query itself only runs
+    when it is iterated
+
+    Attributes:
+        __storage (private, instance attribute): BaseStorage -
+                            the engine holding the objects
+        __name (private, instance attribute): string -
+                            name of the queried class
+        __filters (private, instance attribute): tuple -
+                            the (attribute, operator, value) filters
+        __order (private, instance attribute): tuple -
+                            the (attribute, descending) sort fields
+        __limit (private, instance attribute): integer -
+                            maximum number of objects, None for all
+
+    Methods:
+        filter(self, **filters): returns the query with more filters
+        order_by(self, *fields): returns the query sorted by fields
+        limit(self, count): returns the query stopping after count objects
+        first(self): returns the first object or None
+        explain(self): describes how the objects are found
+        __iter__(self): runs the query, yields the objects one at a time
+    """
+    def __init__(self, storage, cls) -> None:
+        """Initialization of Query, the objects of the class cls (or
+        class name) stored in storage
+        """
+        self.__storage = storage
+        self.__name = class_name(cls)
+        self.__filters = ()
+        self.__order = ()
+        self.__limit = None
+
+    def __copy(self, **changes):
+        """returns a new Query with the given private attributes changed
+        """
+        query = Query(self.__storage, self.__name)
+        query.__filters = self.__filters
+        query.__order = self.__order
+        query.__limit = self.__limit
+        for attr, value in changes.items():
+            setattr(query, "_Query__" + attr, value)
+        return query
+
+    def filter(self, **filters):
+        """returns the query keeping the objects that also match every
+        filter: <attribute>=<value> or <attribute>__<operator>=<value>
+        """
+        added = []
+        for name, value in filters.items():
+            attr, op = name.rsplit("__", 1) if "__" in name else (name, "eq")
+            if op not in OPERATORS:
+                raise ValueError("unknown filter operator {!r}, expected "
+                                 "one of {}".format(op, ", ".join(OPERATORS)))
+            if op == "in":
+                value = tuple(value)
+            added.append((attr, op, value))
+        return self.__copy(filters=self.__filters + tuple(added))
+
+    def order_by(self, *fields):
+        """returns the query sorted by the attributes fields, the first
+        one first, in descending order for a field starting with "-".
+        Objects lacking an attribute come last, equal objects are in
+        the order of their keys, reversed when the first field is
+        descending
+        """
+        return self.__copy(order=tuple((f.lstrip("-"), f.startswith("-"))
+                                       for f in fields))
+
+    def limit(self, count):
+        """returns the query stopping after count objects
+        """
+        if count < 0:
+            raise ValueError("limit must be positive")
+        return self.__copy(limit=count)
+
+    def first(self):
+        """returns the first object of the query, None if there is none
+        """
+        return next(iter(self.limit(1)), None)
+
+    def explain(self) -> str:
+        """describes the plan of the query: the index (or the scan)
+        giving the keys to check and the estimated number of keys
+        """
+        return self.__plan()[0]
+
+    def __iter__(self):
+        """runs the query: yields the matching objects one at a time,
+        in order, up to the limit
+        """
+        if self.__limit == 0:
+            return
+        _, keys, ordered = self.__plan()
+        objects = self.__storage.all()
+        # the objects removed since the plan was made are skipped
+        found = (objects[key] for key in keys()
+                 if key in objects and self.__match(key))
+        if self.__order and not ordered:
+            found = iter(self.__sort(found))
+        for n, obj in enumerate(found, 1):
+            yield obj
+            if n == self.__limit:
+                return
+
+    def __value(self, key, attr):
+        """returns the attribute attr of the object stored under key,
+        read without creating a lazy object when possible
+        """
+        objects = self.__storage.all()
+        if isinstance(objects, ObjectRegistry):
+            return objects.attribute(key, attr)
+        return getattr(objects[key], attr, None)
+
+    def __match(self, key) -> bool:
+        """tells whether the object stored under key matches the filters,
+        a comparison that fails (ex: None < 3) does not match
+        """
+        for attr, op, value in self.__filters:
+            try:
+                if not OPERATORS[op](self.__value(key, attr), value):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    def __sort(self, objects) -> list:
+        """returns objects sorted by the order fields, by key between
+        equal objects, in the direction of the first field
+        """
+        objects = sorted(objects, key=lambda o: o.id,
+                         reverse=self.__order[0][1])
+        for attr, descending in reversed(self.__order):
+            objects.sort(key=lambda o: _sort_key(getattr(o, attr, None),
+                                                 descending),
+                         reverse=descending)
+        return objects
+
+    def __bounds(self, attr):
+        """returns the (low, high) bounds the filters put on the number
+        attr (None when there is no bound), None when the filters on
+        attr cannot be answered by a SortedIndex
+        """
+        low = high = None
+        found = False
+        for name, op, value in self.__filters:
+            if name != attr or op not in ("eq", "lt", "lte", "gt", "gte"):
+                continue
+            if not SortedIndex.indexable(value):
+                return None
+            found = True
+            if op in ("eq", "gt", "gte"):
+                low = value if low is None else max(low, value)
+            if op in ("eq", "lt", "lte"):
+                high = value if high is None else min(high, value)
+        return (low, high) if found else None
+
+    def __candidates(self, objects) -> list:
+        """returns the (estimated number of keys, description, keys) of
+        every index that answers one of the filters
+        """
+        name = self.__name
+        candidates = []
+        for attr in dict.fromkeys(f[0] for f in self.__filters):
+            index = objects.index(name, attr)
+            if isinstance(index, SortedIndex):
+                bounds = self.__bounds(attr)
+                if bounds is not None:
+                    candidates.append((
+                        index.size(*bounds),
+                        "sorted index {}.{} in [{}, {}]".format(
+                            name, attr, *bounds),
+                        lambda index=index, bounds=bounds:
+                            index.range(*bounds)))
+            for a, op, value in self.__filters:
+                if a != attr or not isinstance(index, HashIndex):
+                    continue
+                values = [value] if op == "eq" else \
+                    value if op == "in" else None
+                # None values are not indexed
+                if values is None or None in values:
+                    continue
+                try:
+                    groups = [index.get(v) for v in dict.fromkeys(values)]
+                except TypeError:
+                    continue
+                candidates.append((
+                    sum(map(len, groups)),
+                    "index {}.{} {} {!r}".format(name, attr, op, value),
+                    lambda groups=groups: [k for g in groups for k in g]))
+        return candidates
+
+    def __plan(self) -> tuple:
+        """chooses how to find the objects: returns its description, the
+        function returning the keys to check and whether they come in
+        the query order
+        """
+        name = self.__name
+        objects = self.__storage.all()
+        if not isinstance(objects, ObjectRegistry):
+            return ("scan {}".format(name),
+                    lambda: list(self.__storage.all(name)), False)
+        total = objects.count(name)
+        best = (total, "scan {}".format(name),
+                lambda: list(objects.keys_of(name)))
+        for candidate in self.__candidates(objects):
+            if candidate[0] < best[0]:
+                best = candidate
+        count, description, keys = best
+        plan = ("{} ({} keys)".format(description, count), keys, False)
+        if len(self.__order) != 1:
+            return plan
+        attr, descending = self.__order[0]
+        index = objects.index(name, attr)
+        # every object must be in the index to be found in its order
+        if not isinstance(index, SortedIndex) or len(index) != total:
+            return plan
+        bounds = self.__bounds(attr) or (None, None)
+        size = index.size(*bounds)
+        # keys checked until the limit is reached, the best index
+        # telling how many of the ordered keys match
+        scanned = size if self.__limit is None else \
+            min(size, ceil(self.__limit * total / max(count, 1)))
+        if scanned > count:
+            return plan
+        return ("ordered {}sorted index {}.{} in [{}, {}] ({} keys)".format(
+            "reversed " if descending else "", name, attr, *bounds, scanned),
+            lambda: (reversed if descending else iter)(index.range(*bounds)),
+            True)
+
+
+def _sort_key(value, descending) -> tuple:
+    """returns the sort key of value, placing None last whatever the
+    direction of the sort
+    """
+    return (value is None) != descending, value
@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+"""registry_storage module. Contains RegistryStorage class, the base of
+the engines keeping their objects in an ObjectRegistry
+file name: registry_storage.py
+"""
+from abc import abstractmethod
+from models.engine.base_storage import BaseStorage, class_name, \
+    text_attributes
+from models.engine.indexes import COLUMN_KEYS, COORDINATES, SPATIAL_KEYS
+
+
+class RegistryStorage(BaseStorage):
+    """RegistryStorage class, answers the queries of BaseStorage through
+    the indexes of the ObjectRegistry of the engine (see
+    object_registry.py) instead of going through every object
+
+    Attributes:
+        _objects (protected, property): ObjectRegistry -
+                            the objects by <class name>.id, given by
+                            the engine
+
+    Methods:
+        all(self, cls): returns the dictionary _objects, or the
+                    objects of the class cls
+        count(self, cls): returns the number of objects (of a class)
+        lookup(self, cls, attr, value): returns the objects of a class
+                    whose attribute is value, through the indexes of
+                    indexes.FOREIGN_KEYS
+        lookup_range(self, cls, attr, low, high): returns the objects of
+                    a class whose attribute is between low and high,
+                    through the sorted indexes of indexes.RANGE_KEYS
+        lookup_box(self, cls, south, west, north, east): returns the
+                    objects of a class inside a latitude/longitude box
+        lookup_radius(self, cls, latitude, longitude, km): returns the
+                    objects of a class within km kilometers of a point
+        search(self, cls, query, prefix, attrs): returns the objects of
+                    a class whose text holds the words of query
+        aggregate(self, cls, attr, func, by, q, groups): returns the
+                    sum, mean... of an attribute of a class, by value of
+                    another attribute
+    """
+    @property
+    @abstractmethod
+    def _objects(self):
+        """the ObjectRegistry holding the objects of the engine
+        """
+
+    def all(self, cls=None) -> dict:
+        """returns the dictionary _objects, with a class (or class
+        name) a new dictionary holding the objects of that class only
+        """
+        objects = self._objects
+        if cls is None:
+            return objects
+        return {k: objects[k] for k in objects.keys_of(class_name(cls))}
+
+    def count(self, cls=None) -> int:
+        """returns the number of objects, of the class cls only if given,
+        without reading the objects
+        """
+        if cls is None:
+            return len(self._objects)
+        return self._objects.count(class_name(cls))
+
+    def lookup(self, cls, attr, value) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        attribute attr is value, through the index of attr if any
+        """
+        objects = self._objects
+        return {k: objects[k]
+                for k in objects.lookup(class_name(cls), attr, value)}
+
+    def lookup_range(self, cls, attr, low=None, high=None) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        attribute attr is a number between low and high included (no
+        bound when None), by ascending value, through the sorted index
+        of attr if any
+        """
+        objects = self._objects
+        return {k: objects[k] for k in
+                objects.lookup_range(class_name(cls), attr, low, high)}
+
+    def lookup_box(self, cls, south, west, north, east) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        latitude and longitude are inside the box (crossing the
+        antimeridian when west > east), through the spatial index if any
+        """
+        name = class_name(cls)
+        objects = self._objects
+        return {k: objects[k] for k in objects.lookup_box(
+            name, SPATIAL_KEYS.get(name, COORDINATES),
+            south, west, north, east)}
+
+    def lookup_radius(self, cls, latitude, longitude, km) -> dict:
+        """returns the objects of the class cls (or class name) within
+        km kilometers of (latitude, longitude), nearest first, through
+        the spatial index if any
+        """
+        name = class_name(cls)
+        objects = self._objects
+        return {k: objects[k] for k in objects.lookup_near(
+            name, SPATIAL_KEYS.get(name, COORDINATES),
+            latitude, longitude, km)}
+
+    def search(self, cls, query, prefix=False, attrs=None) -> dict:
+        """returns the objects of the class cls (or class name) whose
+        text attributes attrs (default indexes.TEXT_KEYS) hold every
+        word of query, the last one being the start of a word when
+        prefix is True, best match first, through the text index if any
+        """
+        name = class_name(cls)
+        objects = self._objects
+        return {k: objects[k] for k in objects.lookup_text(
+            name, text_attributes(name, attrs), query, prefix)}
+
+    def aggregate(self, cls, attr, func="sum", by=None, q=50,
+                  groups=None):
+        """returns func (see columns.FUNCTIONS) of the numbers of the
+        attribute attr of the objects of the class cls (or class name),
+        the number of objects for count when attr is None, q being the
+        percentile. With by, returns a dictionary of the results by value
+        of the attribute by, each value going through the dictionary
+        groups if given, through the columns of the class if any
+        """
+        name = class_name(cls)
+        return self._objects.aggregate(name, COLUMN_KEYS.get(name, ()),
+                                       attr, func, by, q, groups)
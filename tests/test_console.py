@@ -86,8 +86,7 @@ class TestConsoleWorking(unittest.TestCase):
         """Tear down instances and variables
         """
         for instance in self.instances:
-            del storage.all()[instance.__class__.__name__ +
-                              "." + instance.id]
+            storage.delete(instance)
         storage.save()
 
     def test_methods(self):
@@ -1129,6 +1128,33 @@ EOF  all  create  destroy  help  quit  show  update''', f_value)
                 HBNBCommand().onecmd(f"destroy {k} {f_value}")
                 self.assertNotIn(key, storage.all())
 
+    def test_do_update_types(self):
+        """test update converts the fields to the type of their default,
+        the fields of the other models to their type and the other
+        attributes to the type of their value
+        """
+        with patch('sys.stdout', new=StringIO()) as f:
+            HBNBCommand().onecmd("create Place")
+            key = "Place." + f.getvalue().strip()
+        for attr, value, expected in (("price_by_night", "10", 10),
+                                      ("latitude", "7", 7.0),
+                                      ("name", "12", "12"),
+                                      ("rating", "4.5", 4.5),
+                                      ("email", "3", "3")):
+            with self.subTest(attr=attr):
+                HBNBCommand().onecmd(f'update {key.replace(".", " ")} '
+                                     f'{attr} "{value}"')
+                found = getattr(storage.all()[key], attr)
+                self.assertEqual(found, expected)
+                self.assertIs(type(found), type(expected))
+        HBNBCommand().onecmd(f'destroy {key.replace(".", " ")}')
+        with patch('sys.stdout', new=StringIO()) as f:
+            HBNBCommand().onecmd("create BaseModel")
+            key = "BaseModel." + f.getvalue().strip()
+        HBNBCommand().onecmd(f'update {key.replace(".", " ")} user_id "12"')
+        self.assertEqual(storage.all()[key].user_id, "12")
+        HBNBCommand().onecmd(f'destroy {key.replace(".", " ")}')
+
     def test_do_update_BaseModel(self):
         """test update BaseModel
         """
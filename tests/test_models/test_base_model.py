@@ -6,16 +6,19 @@ import os
 from time import sleep
 from datetime import datetime
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from contextlib import redirect_stdout
 from io import StringIO
 import inspect  # test function and module doc string
 import re
+import pickle
 from json import load  # , dump # to test the de/serialization
 import pycodestyle as pep8
 from models.base_model import BaseModel
 import models.base_model as base_model
+from models.place import Place
 from models import storage
+from models.engine.file_storage import FileStorage
 
 
 class TestBaseModelDocPep8(unittest.TestCase):
@@ -57,7 +60,10 @@ class TestBaseModelClassWorking(unittest.TestCase):
     """unittest class for BaseModel class when everything works"""
     def setUp(self) -> None:
         """Set up instances and variables"""
-        self.__file_path = storage._FileStorage__file_path
+        # the content of the file is only checked with FileStorage
+        self.__file_path = None
+        if isinstance(storage, FileStorage):
+            self.__file_path = storage._FileStorage__file_path
         self.instances = [BaseModel()]
         self.instances.append(BaseModel())
         self.id_pattern = re.compile(r'^[0-9a-fA-F]{8}-' +
@@ -126,7 +132,7 @@ class TestBaseModelClassWorking(unittest.TestCase):
         # test correct values represented
         self.assertEqual(match.group(1), base.__class__.__name__)
         self.assertEqual(match.group(2), base.id)
-        self.assertEqual(match.group(3), str(base.__dict__))
+        self.assertEqual(match.group(3), str(base.attributes()))
         # test same class instance has same value
         self.assertEqual(match.group(1), new.__class__.__name__)
         with redirect_stdout(StringIO()) as f:
@@ -137,7 +143,7 @@ class TestBaseModelClassWorking(unittest.TestCase):
         """test the to_dict method of the instance of BaseModel
         """
         base = self.instances[0]
-        dic = base.__dict__
+        dic = base.attributes()
         to_dic = base.to_dict()
         for k, v in dic.items():
             if k not in ["created_at", "updated_at"]:
@@ -212,7 +218,7 @@ class TestBaseModelClassWorking(unittest.TestCase):
             self.fail()
 
     def test_saving(self) -> None:
-        """test the FileStorage saving of the instance of BaseModel
+        """test the storage saving of the instance of BaseModel
         """
         base = self.instances[0]
         key = base.__class__.__name__ + "." + base.id
@@ -227,39 +233,229 @@ class TestBaseModelClassWorking(unittest.TestCase):
         self.assertTrue(base in storage.all().values())
         self.assertTrue(hasattr(storage.all()[base.__class__.__name__ +
                                               "." + base.id], "updated_at"))
-        try:
+        if self.__file_path is not None:
             self.assertTrue(os.path.exists(self.__file_path))
             with open(self.__file_path, "r", encoding="utf-8") as f:
                 content = load(f)
-        except IOError:
-            pass
-        self.assertIn(key, content)
-        self.assertEqual(content[key], base.to_dict())
+            self.assertIn(key, content)
+            self.assertEqual(content[key], base.to_dict())
 
     def test_deleting(self) -> None:
-        """test the FileStorage deleting of the instance of BaseModel
+        """test the storage deleting of the instance of BaseModel
         """
         # test deleting
         new2 = BaseModel()
         new2.save()
-        try:
+        key = new2.__class__.__name__ + "." + new2.id
+        self.assertIn(key, storage.all())
+        if self.__file_path is not None:
             with open(self.__file_path, "r", encoding="utf-8") as f:
-                content = load(f).values()
-        except IOError:
-            pass
-        self.assertTrue(new2.to_dict() in content)
-        del storage.all()[new2.__class__.__name__ +
-                          "." + new2.id]
+                self.assertIn(new2.to_dict(), load(f).values())
+        storage.delete(new2)
         storage.save()
-        try:
+        self.assertNotIn(key, storage.all())
+        if self.__file_path is not None:
             with open(self.__file_path, "r", encoding="utf-8") as f:
-                content = load(f).values()
-        except IOError:
-            pass
-        self.assertFalse(new2.to_dict() in content)
+                self.assertNotIn(new2.to_dict(), load(f).values())
 
     def tearDown(self) -> None:
         """Tear down instances and variables"""
         for instance in self.instances:
-            del storage.all()[f"{instance.__class__.__name__}.{instance.id}"]
+            storage.delete(instance)
         storage.save()
+
+
+class TestBaseModelLayout(unittest.TestCase):
+    """unittest class for the slots of the fields of the models"""
+    def setUp(self) -> None:
+        """Set up a place and patch the storage"""
+        patcher = patch("models.storage")
+        self.storage = patcher.start()
+        self.addCleanup(patcher.stop)
+        now = datetime.now().isoformat()
+        self.place = Place(id="1", created_at=now, updated_at=now,
+                           name="Loft", extra="value")
+
+    def test_slots(self) -> None:
+        """Test the fields are slots and the other attributes are in
+        __dict__"""
+        self.assertIn("name", Place.__slots__)
+        self.assertIn("id", BaseModel.__slots__)
+        self.assertEqual(self.place.__dict__, {"extra": "value"})
+        self.assertEqual(vars(BaseModel(id="2")), {})
+        self.assertEqual(list(self.place.attributes()),
+                         ["id", "created_at", "updated_at", "name", "extra"])
+
+    def test_defaults(self) -> None:
+        """Test the fields never set read as their default"""
+        self.assertEqual(self.place.max_guest, 0)
+        self.assertEqual(Place.default("amenity_ids"), [])
+        self.assertIsNone(Place.default("extra"))
+        self.assertNotIn("max_guest", self.place.to_dict())
+        self.place.max_guest = 0
+        self.assertEqual(self.place.to_dict()["max_guest"], 0)
+        del self.place.max_guest
+        self.assertNotIn("max_guest", self.place.to_dict())
+        self.assertEqual(self.place.max_guest, 0)
+        with self.assertRaises(AttributeError):
+            del self.place.max_guest
+        with self.assertRaises(AttributeError):
+            self.place.missing
+
+    def test_owner(self) -> None:
+        """Test the changes go to the engine holding the instance"""
+        engine = MagicMock()
+        base_model.set_storage(self.place, engine)
+        self.place.name = "Villa"
+        del self.place.name
+        self.assertEqual(engine.touch.call_count, 2)
+        engine.touch.assert_called_with(self.place)
+        self.storage.touch.assert_not_called()
+        copy = pickle.loads(pickle.dumps(self.place))
+        copy.name = "Copy"
+        self.storage.touch.assert_called_once_with(copy)
+
+    def test_extra(self) -> None:
+        """Test the attributes that are not fields"""
+        self.place.other = 1
+        self.storage.touch.assert_called_with(self.place)
+        self.assertEqual(self.place.to_dict()["other"], 1)
+        del self.place.other
+        del self.place.extra
+        self.assertFalse(hasattr(self.place, "extra"))
+        self.assertEqual(self.place.__dict__, {})
+        with self.assertRaises(AttributeError):
+            del self.place.extra
+
+    def test_subclass(self) -> None:
+        """Test the fields of a subclass add to the inherited ones"""
+        self.addCleanup(base_model.registry.pop, "Villa", None)
+
+        class Villa(Place):
+            """model defined by the test"""
+            pools = 1
+
+            def describe(self) -> str:
+                """returns the name and the pools of the villa"""
+                return "{} ({})".format(self.name, self.pools)
+
+        villa = Villa(id="2", name="Sun")
+        self.assertEqual(Villa.__slots__, ("pools",))
+        self.assertEqual(villa.describe(), "Sun (1)")
+        villa.pools = 2
+        self.assertEqual(villa.attributes(),
+                         {"id": "2", "name": "Sun", "pools": 2})
+
+    def test_registry(self) -> None:
+        """Test every model is registered with the types of its fields"""
+        self.assertLessEqual({"BaseModel", "User", "State", "City",
+                              "Amenity", "Place", "Review"},
+                             set(base_model.registry))
+        self.assertIs(base_model.registry["Place"], Place)
+        self.assertEqual(Place._schema["max_guest"], int)
+        self.assertEqual(Place.coercer("latitude")("1"), 1.0)
+        self.assertEqual(Place.coercer("name")(2), "2")
+        self.assertIsNone(Place.coercer("amenity_ids"))
+        self.assertIs(BaseModel.coercer("id", str), str)
+        self.assertIs(BaseModel.coercer("user_id", int), str)
+        self.assertIs(Place.coercer("email"), str)
+        self.assertIs(BaseModel.coercer("price_by_night"), int)
+        self.assertIs(BaseModel.coercer("rating", float), float)
+
+    def test_pickle(self) -> None:
+        """Test pickle and copy keep the attributes set"""
+        copy = pickle.loads(pickle.dumps(self.place))
+        self.assertEqual(copy.to_dict(), self.place.to_dict())
+        self.assertEqual(copy.extra, "value")
+
+    def test_to_dict_cache(self) -> None:
+        """Test to_dict is built once and again after every change"""
+        self.assertEqual(self.place.to_dict(cache=False)["name"], "Loft")
+        self.assertIsNone(self.place._BaseModel__cache)
+        cache = self.place.to_dict()
+        self.assertIs(self.place._BaseModel__cache["name"], cache["name"])
+        cache["name"] = "Barn"
+        self.assertEqual(self.place.to_dict()["name"], "Loft")
+        built = self.place._BaseModel__cache
+        self.place.to_dict()
+        self.assertIs(self.place._BaseModel__cache, built)
+        self.place.name = "Barn"
+        self.assertEqual(self.place.to_dict()["name"], "Barn")
+        del self.place.extra
+        self.assertNotIn("extra", self.place.to_dict())
+        self.place.__dict__["extra"] = "again"
+        self.assertEqual(self.place.to_dict()["extra"], "again")
+        self.place.updated_at = datetime(2020, 1, 1)
+        self.assertEqual(self.place.to_dict()["updated_at"],
+                         "2020-01-01T00:00:00")
+        copy = pickle.loads(pickle.dumps(self.place))
+        self.assertIsNone(copy._BaseModel__cache)
+
+    def test_str_cache(self) -> None:
+        """Test __str__ is built once and again after every change"""
+        text = str(self.place)
+        self.assertIs(str(self.place), text)
+        self.place.name = "Barn"
+        self.assertIn("'name': 'Barn'", str(self.place))
+        self.assertIsNot(str(self.place), text)
+        del self.place.name
+        self.assertNotIn("'name'", str(self.place))
+        self.place.__dict__["extra"] = "again"
+        self.assertIn("'extra': 'again'", str(self.place))
+
+
+class TestBaseModelLazyDatetimes(unittest.TestCase):
+    """unittest class for the dates parsed when first read"""
+    def setUp(self) -> None:
+        """Set up a place read in lazy mode"""
+        for patcher in (patch("models.storage"),
+                        patch("models.base_model.lazy_datetimes", True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.created = "2017-09-28T21:05:54.119427"
+        self.updated = "2017-09-28T21:05:54.119572"
+        self.place = Place(id="1", created_at=self.created,
+                           updated_at=self.updated, name="Loft")
+
+    def stored(self, name):
+        """returns the value of the slot of created_at or updated_at"""
+        return BaseModel.__dict__[name].slot.__get__(self.place)
+
+    def test_kept(self) -> None:
+        """Test the strings are kept and written back unchanged"""
+        self.assertEqual(self.stored("created_at"), self.created)
+        expected = {"id": "1", "created_at": self.created,
+                    "updated_at": self.updated, "name": "Loft",
+                    "__class__": "Place"}
+        self.assertEqual(self.place.to_dict(), expected)
+        self.assertEqual(pickle.loads(pickle.dumps(self.place)).to_dict(),
+                         expected)
+        self.assertEqual(self.stored("updated_at"), self.updated)
+
+    def test_parsed(self) -> None:
+        """Test the strings are parsed when first read"""
+        self.assertEqual(self.place.created_at,
+                         datetime.fromisoformat(self.created))
+        self.assertIsInstance(self.stored("created_at"), datetime)
+        self.assertEqual(self.stored("updated_at"), self.updated)
+        self.assertEqual(self.place.to_dict()["created_at"], self.created)
+        self.assertEqual(str(self.place), "[Place] (1) {}".format({
+            "id": "1", "created_at": datetime.fromisoformat(self.created),
+            "updated_at": datetime.fromisoformat(self.updated),
+            "name": "Loft"}))
+        self.place.updated_at = "today"
+        self.assertEqual(self.place.updated_at, "today")
+
+    def test_eager(self) -> None:
+        """Test the strings are parsed by __init__ otherwise"""
+        with patch("models.base_model.lazy_datetimes", False):
+            place = Place(id="1", created_at=self.created)
+        self.assertIsInstance(BaseModel.__dict__["created_at"].slot
+                              .__get__(place), datetime)
+        self.assertNotIn("created_at", Place(id="2").attributes())
+        with self.assertRaises(AttributeError):
+            Place(id="2").created_at
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,6 +17,7 @@ from models.city import City
 from models.base_model import BaseModel
 import models.city as city_model
 from models import storage
+from models.engine.file_storage import FileStorage
 
 
 class TestCityDocPep8(unittest.TestCase):
@@ -58,7 +59,10 @@ class TestCityClassWorking(unittest.TestCase):
     """unittest class for City class when everything works"""
     def setUp(self) -> None:
         """Set up instances and variables"""
-        self.__file_path = storage._FileStorage__file_path
+        # the content of the file is only checked with FileStorage
+        self.__file_path = None
+        if isinstance(storage, FileStorage):
+            self.__file_path = storage._FileStorage__file_path
         self.instances = [City()]
         self.instances.append(City())
         self.id_pattern = re.compile(r'^[0-9a-fA-F]{8}-' +
@@ -134,7 +138,7 @@ class TestCityClassWorking(unittest.TestCase):
         # test correct values represented
         self.assertEqual(match.group(1), city.__class__.__name__)
         self.assertEqual(match.group(2), city.id)
-        self.assertEqual(match.group(3), str(city.__dict__))
+        self.assertEqual(match.group(3), str(city.attributes()))
         # test same class instance has same value
         self.assertEqual(match.group(1), new.__class__.__name__)
         with redirect_stdout(StringIO()) as f:
@@ -145,7 +149,7 @@ class TestCityClassWorking(unittest.TestCase):
         """test the to_dict method of the instance of City
         """
         city = self.instances[0]
-        dic = city.__dict__
+        dic = city.attributes()
         to_dic = city.to_dict()
         for k, v in dic.items():
             if k not in ["created_at", "updated_at"]:
@@ -220,7 +224,7 @@ class TestCityClassWorking(unittest.TestCase):
             self.fail()
 
     def test_saving(self) -> None:
-        """test the FileStorage saving of the instance of City
+        """test the storage saving of the instance of City
         """
         city = self.instances[0]
 
@@ -236,40 +240,33 @@ class TestCityClassWorking(unittest.TestCase):
         self.assertTrue(city in storage.all().values())
         self.assertTrue(hasattr(storage.all()[city.__class__.__name__ +
                                               "." + city.id], "updated_at"))
-        try:
+        if self.__file_path is not None:
             self.assertTrue(os.path.exists(self.__file_path))
             with open(self.__file_path, "r", encoding="utf-8") as f:
                 content = load(f)
-        except IOError:
-            pass
-        self.assertIn(key, content)
-        self.assertEqual(content[key], city.to_dict())
+            self.assertIn(key, content)
+            self.assertEqual(content[key], city.to_dict())
 
     def test_deleting(self) -> None:
-        """test the FileStorage deleting of the instance of City
+        """test the storage deleting of the instance of City
         """
         # test deleting
         new2 = City()
         new2.save()
-        try:
+        key = new2.__class__.__name__ + "." + new2.id
+        self.assertIn(key, storage.all())
+        if self.__file_path is not None:
             with open(self.__file_path, "r", encoding="utf-8") as f:
-                content = load(f).values()
-        except IOError:
-            pass
-        self.assertTrue(new2.to_dict() in content)
-        del storage.all()[new2.__class__.__name__ +
-                          "." + new2.id]
+                self.assertIn(new2.to_dict(), load(f).values())
+        storage.delete(new2)
         storage.save()
-        try:
+        self.assertNotIn(key, storage.all())
+        if self.__file_path is not None:
             with open(self.__file_path, "r", encoding="utf-8") as f:
-                content = load(f).values()
-        except IOError:
-            pass
-        self.assertFalse(new2.to_dict() in content)
+                self.assertNotIn(new2.to_dict(), load(f).values())
 
     def tearDown(self) -> None:
         """Tear down instances and variables"""
         for instance in self.instances:
-            del storage.all()[instance.__class__.__name__ +
-                              "." + instance.id]
+            storage.delete(instance)
         storage.save()
@@ -0,0 +1,339 @@
+#!/usr/bin/python3
+"""Unittest for the storage interface and the engine registry
+file name: test_base_storage.py
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from io import StringIO
+from datetime import datetime
+import inspect  # test function and module doc string
+import pycodestyle as pep8
+import models.engine.base_storage as base_storage
+from models.engine.base_storage import BaseStorage
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.engine.memory_storage import MemoryStorage
+from models.place import Place
+from models.user import User
+from console import HBNBCommand
+
+
+class TestBaseStorageDocPep8(unittest.TestCase):
+    """unittest class for base_storage documentation and pep8
+    conformaty"""
+    def test_pep8_base(self):
+        """Test that the base_storage module conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['models/engine/base_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_test_base(self):
+        """Test that the test_base_storage conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['tests/test_models/test_engine/' +
+                                    'test_base_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_module_docstring(self):
+        """test module documentation"""
+        self.assertTrue(len(base_storage.__doc__) > 0)
+
+    def test_func_docstrings(self):
+        """Tests for the presence of docstrings in all functions"""
+        funcs = inspect.getmembers(base_storage, inspect.isfunction)
+        funcs.extend(inspect.getmembers(BaseStorage, inspect.isfunction))
+        for func in funcs:
+            self.assertTrue(len(str(func[1].__doc__)) > 0)
+
+
+class TestRegistry(unittest.TestCase):
+    """unittest class for the engine registry"""
+    def setUp(self) -> None:
+        """Set up a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.environ = {"HBNB_STORAGE_DB":
+                        os.path.join(self.tmp.name, "file.db")}
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_interface(self):
+        """Test the interface cannot be instantiated"""
+        with self.assertRaises(TypeError):
+            BaseStorage()
+
+    def test_engines(self):
+        """Test every built-in engine is registered"""
+        self.assertEqual(base_storage.engines(), ["db", "file", "memory"])
+        for name, cls in (("db", DBStorage), ("file", FileStorage),
+                          ("memory", MemoryStorage)):
+            self.assertIs(base_storage.get_engine(name), cls)
+
+    def test_create(self):
+        """Test the engine is chosen by HBNB_STORAGE_ENGINE"""
+        self.assertIsInstance(base_storage.create(environ={}), FileStorage)
+        engine = base_storage.create(environ=self.environ |
+                                     {"HBNB_STORAGE_ENGINE": "db"})
+        self.assertIsInstance(engine, DBStorage)
+        engine.close()
+        self.assertIsInstance(base_storage.create("memory"), MemoryStorage)
+        with self.assertRaises(ValueError):
+            base_storage.create("nosql")
+
+    def test_file_options(self):
+        """Test the file engine reads its options from the environment"""
+        path = os.path.join(self.tmp.name, "file.json")
+        with patch.object(FileStorage, "_FileStorage__file_path", path):
+            engine = base_storage.create(
+                "file", {"HBNB_STORAGE_COMPRESSION": "gzip"})
+        self.assertEqual(engine._FileStorage__file_path, path + ".gz")
+
+    def test_register(self):
+        """Test a custom engine can be registered"""
+        class Custom(MemoryStorage):
+            """engine registered by the test"""
+        base_storage.register("custom", Custom)
+        self.addCleanup(base_storage._engines.pop, "custom")
+        self.assertIsInstance(base_storage.create("custom"), Custom)
+
+
+class ScanStorage(MemoryStorage):
+    """MemoryStorage answering the lookups with the BaseStorage scans"""
+    lookup = BaseStorage.lookup
+    lookup_range = BaseStorage.lookup_range
+    aggregate = BaseStorage.aggregate
+
+
+class TestEngineContract(unittest.TestCase):
+    """unittest class for the behavior every engine shares"""
+    def setUp(self) -> None:
+        """Set up one engine of each kind"""
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "file")
+        self.engines = {"memory": MemoryStorage,
+                        "file": lambda: FileStorage(path + ".json"),
+                        "db": lambda: DBStorage(path + ".db"),
+                        "scan": ScanStorage}
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_contract(self):
+        """Test new, touch, delete, save and reload"""
+        now = datetime.now().isoformat()
+        for name, factory in self.engines.items():
+            with self.subTest(engine=name):
+                engine = factory()
+                with patch("models.storage", engine):
+                    user = User(id="1", created_at=now, updated_at=now)
+                    other = User(id="2", created_at=now, updated_at=now)
+                    engine.new(user)
+                    engine.new(other)
+                    user.email = "a@b.c"
+                    engine.delete(other)
+                    engine.save()
+                    engine.flush()
+                    self.assertIs(engine.all()["User.1"], user)
+                    self.assertNotIn("User.2", engine.all())
+                    engine.close()
+                if name in ("memory", "scan"):
+                    continue
+                engine = factory()
+                engine.reload()
+                self.assertEqual(list(engine.all()), ["User.1"])
+                self.assertEqual(engine.all()["User.1"].email, "a@b.c")
+                engine.close()
+
+    def test_console(self):
+        """Test the console only relies on the interface"""
+        for name, factory in self.engines.items():
+            with self.subTest(engine=name):
+                engine = factory()
+                with patch("models.storage", engine), \
+                        patch("console.storage", engine), \
+                        patch("sys.stdout", new=StringIO()) as f:
+                    HBNBCommand().onecmd("create User")
+                    uid = f.getvalue().strip()
+                    HBNBCommand().onecmd("update User " + uid + " age 3")
+                    HBNBCommand().onecmd("show User " + uid)
+                    self.assertIn("'age': 3", f.getvalue())
+                    HBNBCommand().onecmd("destroy User " + uid)
+                    self.assertEqual(len(engine.all()), 0)
+                engine.close()
+
+    def test_lookup_range(self):
+        """Test the range lookups follow the console updates"""
+        for name, factory in self.engines.items():
+            with self.subTest(engine=name):
+                engine = factory()
+                with patch("models.storage", engine), \
+                        patch("console.storage", engine), \
+                        patch("sys.stdout", new=StringIO()) as f:
+                    for price in (120, 80, 100, 80):
+                        HBNBCommand().onecmd("create Place")
+                        uid = f.getvalue().split()[-1]
+                        HBNBCommand().onecmd("update Place " + uid +
+                                             " price_by_night " +
+                                             str(price))
+                    if name == "db":
+                        engine.save()
+                    found = engine.lookup_range(Place, "price_by_night",
+                                                80, 100)
+                    self.assertEqual([p.price_by_night
+                                      for p in found.values()],
+                                     [80, 80, 100])
+                    self.assertEqual(len(engine.lookup_range(
+                        "Place", "price_by_night", low=101)), 1)
+                    HBNBCommand().onecmd("update Place " + uid +
+                                         " price_by_night 200")
+                    self.assertEqual([p.price_by_night for p in
+                                      engine.lookup_range(
+                                          Place, "price_by_night",
+                                          high=110).values()],
+                                     [80, 100])
+                    self.assertEqual(list(engine.lookup(
+                        Place, "price_by_night", 200)),
+                        ["Place." + uid])
+                engine.close()
+
+    def test_unset_fields(self):
+        """Test the lookups read the fields never set as their default"""
+        now = datetime.now().isoformat()
+        for name, factory in self.engines.items():
+            with self.subTest(engine=name):
+                engine = factory()
+                with patch("models.storage", engine):
+                    unset = Place(id="1", created_at=now, updated_at=now)
+                    priced = Place(id="2", created_at=now, updated_at=now,
+                                   price_by_night=5, city_id="c1",
+                                   latitude=40.0, longitude=3.0)
+                    engine.new(unset)
+                    engine.new(priced)
+                    for saved in (False, True):
+                        if saved:
+                            engine.save()
+                            engine.reload()
+                        self.assertEqual(sorted(engine.lookup_range(
+                            Place, "price_by_night", 0, 10)),
+                            ["Place.1", "Place.2"])
+                        self.assertEqual(list(engine.lookup(
+                            Place, "city_id", "")), ["Place.1"])
+                        self.assertEqual(list(engine.lookup(
+                            Place, "price_by_night", 0)), ["Place.1"])
+                        self.assertEqual(list(engine.lookup_box(
+                            Place, -1, -1, 1, 1)), ["Place.1"])
+                        self.assertEqual(len(engine.lookup_range(
+                            Place, "price_by_night", 1)), 1)
+                engine.close()
+
+    def test_lookup_radius(self):
+        """Test the map lookups follow the console updates"""
+        points = {"paris": (48.8566, 2.3522), "versailles": (48.8049, 2.1204),
+                  "london": (51.5074, -0.1278)}
+        for name, factory in self.engines.items():
+            with self.subTest(engine=name):
+                engine = factory()
+                ids = {}
+                with patch("models.storage", engine), \
+                        patch("console.storage", engine), \
+                        patch("sys.stdout", new=StringIO()) as f:
+                    for place, (lat, lon) in points.items():
+                        HBNBCommand().onecmd("create Place")
+                        ids[place] = "Place." + f.getvalue().split()[-1]
+                        for attr, value in (("latitude", lat),
+                                            ("longitude", lon)):
+                            HBNBCommand().onecmd("update Place " +
+                                                 ids[place][6:] + " " +
+                                                 attr + " " + str(value))
+                    if name == "db":
+                        engine.save()
+                    self.assertEqual(list(engine.lookup_radius(
+                        Place, 48.8, 2.1, 30)),
+                        [ids["versailles"], ids["paris"]])
+                    self.assertEqual(sorted(engine.lookup_box(
+                        "Place", 48, -1, 52, 3)), sorted(ids.values()))
+                    HBNBCommand().onecmd("update Place " +
+                                         ids["london"][6:] +
+                                         " latitude 48.9")
+                    HBNBCommand().onecmd("update Place " +
+                                         ids["london"][6:] +
+                                         " longitude 2.3")
+                    self.assertEqual(list(engine.lookup_radius(
+                        Place, 48.9, 2.3, 1)), [ids["london"]])
+                    self.assertEqual(sorted(engine.lookup_box(
+                        Place, 48, 2, 49, 3)), sorted(ids.values()))
+                engine.close()
+
+    def test_search(self):
+        """Test the text searches follow the console updates"""
+        for name, factory in self.engines.items():
+            with self.subTest(engine=name):
+                engine = factory()
+                ids = []
+                with patch("models.storage", engine), \
+                        patch("console.storage", engine), \
+                        patch("sys.stdout", new=StringIO()) as f:
+                    for text in ("Pool house", "Garden loft"):
+                        HBNBCommand().onecmd("create Place")
+                        ids.append("Place." + f.getvalue().split()[-1])
+                        HBNBCommand().onecmd("update Place " + ids[-1][6:] +
+                                             ' name "' + text + '"')
+                    if name == "db":
+                        engine.save()
+                    self.assertEqual(list(engine.search(Place, "pool")),
+                                     ids[:1])
+                    HBNBCommand().onecmd("update Place " + ids[0][6:] +
+                                         ' description "garden view"')
+                    self.assertEqual(sorted(engine.search(
+                        "Place", "gar", prefix=True)), sorted(ids))
+                    self.assertEqual(list(engine.search(
+                        Place, "garden", attrs=("description",))), ids[:1])
+                    with self.assertRaises(ValueError):
+                        engine.search(User, "betty")
+                engine.close()
+
+    def test_aggregate(self):
+        """Test the aggregations follow the console updates"""
+        for name, factory in self.engines.items():
+            with self.subTest(engine=name):
+                engine = factory()
+                ids = []
+                with patch("models.storage", engine), \
+                        patch("console.storage", engine), \
+                        patch("sys.stdout", new=StringIO()) as f:
+                    for city, price in (("c1", 80), ("c1", 120), ("c2", 60)):
+                        HBNBCommand().onecmd("create Place")
+                        ids.append(f.getvalue().split()[-1])
+                        HBNBCommand().onecmd("update Place " + ids[-1] +
+                                             " city_id " + city)
+                        HBNBCommand().onecmd("update Place " + ids[-1] +
+                                             " price_by_night " + str(price))
+                    if name == "db":
+                        engine.save()
+                    self.assertEqual(engine.aggregate(
+                        Place, "price_by_night", "mean", by="city_id"),
+                        {"c1": 100.0, "c2": 60.0})
+                    HBNBCommand().onecmd("update Place " + ids[2] +
+                                         " city_id c1")
+                    HBNBCommand().onecmd("destroy Place " + ids[0])
+                    self.assertEqual(engine.aggregate(
+                        "Place", None, "count", by="city_id",
+                        groups={"c1": "s1"}), {"s1": 2})
+                    self.assertEqual(engine.aggregate(
+                        Place, "price_by_night", "percentile", q=25), 75.0)
+                    self.assertEqual(engine.aggregate(
+                        Place, "price_by_night", "max"), 120.0)
+                    self.assertIsNone(engine.aggregate(User, "email", "min"))
+                    with self.assertRaises(ValueError):
+                        engine.aggregate(Place, "price_by_night", "median")
+                engine.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
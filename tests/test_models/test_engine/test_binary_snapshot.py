@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+"""Unittest for the binary snapshot layout
+file name: test_binary_snapshot.py
+"""
+import unittest
+from io import BytesIO
+from datetime import datetime
+import inspect  # test function and module doc string
+import pycodestyle as pep8
+import models.engine.binary_snapshot as binary_snapshot
+from models.engine.binary_snapshot import DATETIMES, MAGIC, \
+    encode_record, decode_record, iter_records, write_snapshot
+
+
+class TestBinarySnapshotDocPep8(unittest.TestCase):
+    """unittest class for binary_snapshot documentation and pep8
+    conformaty"""
+    def test_pep8_base(self):
+        """Test that the binary_snapshot module conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['models/engine/binary_snapshot.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_test_base(self):
+        """Test that the test_binary_snapshot conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['tests/test_models/test_engine/' +
+                                    'test_binary_snapshot.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_module_docstring(self):
+        """test module documentation"""
+        self.assertTrue(len(binary_snapshot.__doc__) > 0)
+
+    def test_func_docstrings(self):
+        """Tests for the presence of docstrings in all functions"""
+        for func in inspect.getmembers(binary_snapshot, inspect.isfunction):
+            self.assertTrue(len(str(func[1].__doc__)) > 0)
+
+
+class TestBinarySnapshotRecords(unittest.TestCase):
+    """unittest class for the encoding and decoding of records"""
+    def setUp(self) -> None:
+        """Set up a dictionary holding every kind of value"""
+        self.id = "51b8ee47-5862-4acb-9151-ebab771ce9bd"
+        self.values = {"id": self.id, "__class__": "Place",
+                       "created_at": "2017-09-28T21:05:54.119427",
+                       "updated_at": "1969-12-31T23:59:59.999999",
+                       "city_id": "c1644a9d-f2aa-46bf-85d8-a24c816c0107",
+                       "user_id": "1", "name": "Ré", "number_rooms": 4,
+                       "max_guest": 1 << 40, "latitude": 0.5,
+                       "big": 1 << 70, "flag": True, "none": None,
+                       "amenity_ids": ["a", "b"]}
+
+    def decoded(self, name, record) -> tuple:
+        """returns the key and values of record, with the datetimes as
+        ISO strings"""
+        key, values = decode_record(name, record)
+        for column in DATETIMES:
+            if isinstance(values.get(column), datetime):
+                values[column] = values[column].isoformat()
+        return key, values
+
+    def test_round_trip(self):
+        """Test a record decodes to the values it was encoded from"""
+        record = encode_record("Place." + self.id, self.values)
+        self.assertEqual(self.decoded("Place", record),
+                         ("Place." + self.id, self.values))
+        values = decode_record("Place", record)[1]
+        self.assertIsInstance(values["created_at"], datetime)
+        self.assertIs(type(values["flag"]), bool)
+        self.assertIs(type(values["latitude"]), float)
+
+    def test_keys(self):
+        """Test the keys that are not <class name>.id are kept"""
+        for key, values in (("Place.x", {"id": self.id}),
+                            ("Place.1", {"id": 1}), ("Place.", {}),
+                            ("Nothing.é", {"id": "é", "a": 1})):
+            with self.subTest(key=key):
+                record = encode_record(key, values)
+                self.assertEqual(decode_record(key.partition(".")[0],
+                                               record), (key, values))
+
+    def test_empty_list(self):
+        """Test an empty list is stored without text"""
+        values = {"id": self.id, "amenity_ids": []}
+        record = encode_record("Place." + self.id, values)
+        self.assertEqual(decode_record("Place", record)[1], values)
+        self.assertEqual(len(record),
+                         4 + binary_snapshot.table("Place").struct.size)
+
+    def test_other_dates(self):
+        """Test the dates that are not naive ISO datetimes are kept as
+        they are"""
+        aware = "2017-09-28T21:05:54.119427+02:00"
+        for value, expected in (("today", "today"), (aware, aware),
+                                (datetime.fromisoformat(aware), aware)):
+            with self.subTest(value=value):
+                record = encode_record("Place.k", {"created_at": value})
+                self.assertEqual(decode_record("Place", record),
+                                 ("Place.k", {"created_at": expected}))
+
+    def test_table(self):
+        """Test the columns of a class are grouped by kind"""
+        columns = binary_snapshot.table("Place").columns
+        self.assertEqual(columns[:3], (("id", "u"), ("city_id", "u"),
+                                       ("user_id", "u")))
+        self.assertEqual(columns[-2:], (("amenity_ids", "l"),
+                                        ("__class__", "c")))
+        self.assertIn(("number_rooms", "i"), columns)
+        self.assertIn(("latitude", "f"), columns)
+        self.assertIn(("name", "s"), columns)
+        self.assertEqual(binary_snapshot.table("Nothing").columns,
+                         (("id", "u"), ("created_at", "d"),
+                          ("updated_at", "d"), ("__class__", "c")))
+
+    def test_compact(self):
+        """Test the columns are stored in the fixed part of the record"""
+        record = encode_record("Place." + self.id,
+                               {"id": self.id, "number_rooms": 4,
+                                "name": "Loft", "__class__": "Place"})
+        tab = binary_snapshot.table("Place")
+        self.assertEqual(len(record), 4 + tab.struct.size + 4)
+        self.assertEqual(record[4 + tab.struct.size:], b"Loft")
+
+    def test_snapshot(self):
+        """Test the records of a snapshot are read one after the other"""
+        places = {"Place." + self.id: encode_record("Place." + self.id,
+                                                    self.values)}
+        others = {"Nothing.a": encode_record("Nothing.a", {"id": "a"}),
+                  "Nothing.b": encode_record("Nothing.b", {})}
+        f = BytesIO()
+        write_snapshot(f, [places, {}, others])
+        self.assertEqual(f.getvalue().count(b"number_rooms"), 1)
+        f.seek(len(MAGIC))
+        records = list(iter_records(f))
+        self.assertEqual([k for k, _, _ in records],
+                         ["Place." + self.id, "Nothing.a", "Nothing.b"])
+        self.assertEqual(records[2][1], {})
+        self.assertEqual([r for _, _, r in records],
+                         list(places.values()) + list(others.values()))
+
+    def test_other_table(self):
+        """Test the records written with another table are encoded
+        again"""
+        tab = binary_snapshot._Table("Place", [("id", "u"),
+                                               ("name", "s")])
+        record = tab.struct.pack(0xffff, 3, bytes(16), 4) + b"Loft"
+        f = BytesIO(b"\x01\x00" + tab.encode() +
+                    b"\x00\x00\x01\x00\x00\x00" +
+                    len(record).to_bytes(4, "little") + record)
+        key, values, data = next(iter_records(f))
+        self.assertEqual(values, {"id": "00000000-0000-0000-0000-"
+                                        "000000000000", "name": "Loft"})
+        self.assertEqual(data, encode_record(key, values))
+
+    def test_torn_snapshot(self):
+        """Test a torn or corrupted snapshot raises ValueError"""
+        f = BytesIO()
+        write_snapshot(f, [{"Place.a": encode_record("Place.a",
+                                                     self.values)}])
+        data = f.getvalue()[len(MAGIC):]
+        for broken in (data[:-1], data[:-40], data[:3],
+                       data[:2] + b"\xff" * 9,
+                       b"\x00\x00\x05\x00\x01\x00\x00\x00"):
+            with self.subTest(broken=broken), \
+                    self.assertRaises(ValueError):
+                list(iter_records(BytesIO(broken)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/python3
+"""Unittest for the columns module
+file name: test_columns.py
+"""
+import random
+import unittest
+import inspect  # test function and module doc string
+import pycodestyle as pep8
+from models.engine.columns import ColumnIndex, aggregate, numpy
+import models.engine.columns as columns
+
+
+class TestColumnsDocPep8(unittest.TestCase):
+    """unittest class for the columns module
+    documentation and pep8 conformaty"""
+    def test_pep8_base(self):
+        """Test that the columns module conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['models/engine/columns.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_test_base(self):
+        """Test that the test_columns conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['tests/test_models/test_engine/' +
+                                    'test_columns.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_module_docstring(self):
+        """test module documentation"""
+        self.assertTrue(len(columns.__doc__) > 0)
+
+    def test_class_docstring(self):
+        """test class documentation"""
+        self.assertTrue(len(str(ColumnIndex.__doc__)) > 0)
+
+    def test_func_docstrings(self):
+        """Tests for the presence of docstrings in all functions"""
+        for func in inspect.getmembers(columns, inspect.isfunction) + \
+                inspect.getmembers(ColumnIndex, inspect.isfunction):
+            self.assertTrue(len(str(func[1].__doc__)) > 0)
+
+
+class TestAggregate(unittest.TestCase):
+    """unittest class for the aggregations going through the pairs"""
+    def setUp(self) -> None:
+        """Set up (city, price) pairs"""
+        self.pairs = [("c1", 80), ("c1", 120), ("c2", 60), ("c2", None),
+                      (None, 10), ("c3", "free"), ("c2", 100.5)]
+
+    def test_functions(self):
+        """Test every function, grouped or not"""
+        found = {func: aggregate(self.pairs, func, grouped=True)
+                 for func in columns.FUNCTIONS}
+        self.assertEqual(found, {
+            "count": {"c1": 2, "c2": 2},
+            "sum": {"c1": 200.0, "c2": 160.5},
+            "mean": {"c1": 100.0, "c2": 80.25},
+            "min": {"c1": 80.0, "c2": 60.0},
+            "max": {"c1": 120.0, "c2": 100.5},
+            "percentile": {"c1": 100.0, "c2": 80.25},
+            })
+        self.assertEqual(aggregate(self.pairs, "sum"), 370.5)
+        self.assertEqual(aggregate(self.pairs, "percentile", q=75), 100.5)
+        self.assertIsNone(aggregate([], "mean"))
+        self.assertEqual(aggregate([], "count"), 0)
+
+    def test_groups(self):
+        """Test the groups go through the dictionary groups"""
+        self.assertEqual(aggregate(self.pairs + [([], 1)], "max", True,
+                                   groups={"c1": "s", "c2": "s"}),
+                         {"s": 120.0})
+
+    def test_errors(self):
+        """Test the invalid aggregations"""
+        for attr, func, q in (("a", "median", 50), (None, "sum", 50),
+                              ("a", "percentile", 101)):
+            with self.assertRaises(ValueError):
+                columns.check_aggregation(attr, func, q)
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestColumnIndex(unittest.TestCase):
+    """unittest class for ColumnIndex class"""
+    def setUp(self) -> None:
+        """Set up random rows of (city, rooms, price) and their index"""
+        self.attrs = ("city_id", "number_rooms", "price_by_night")
+        self.random = random.Random(4)
+        self.rows = {"Place." + str(i): self.row() for i in range(500)}
+        self.index = ColumnIndex(self.attrs)
+        self.index.build(self.rows.items())
+
+    def row(self) -> tuple:
+        """returns random values of city, rooms and price"""
+        return (self.random.choice(["c1", "c2", "c3", None, ["c4"]]),
+                self.random.randint(0, 4),
+                self.random.choice([self.random.uniform(0, 500), None,
+                                    "free", float("nan"),
+                                    self.random.randint(0, 500)]))
+
+    def check(self) -> None:
+        """checks the index agrees with aggregate on every function"""
+        for func in columns.FUNCTIONS:
+            for attr in ("price_by_night", "number_rooms"):
+                for by in (None, "city_id", "number_rooms"):
+                    with self.subTest(func=func, attr=attr, by=by):
+                        i, j = (self.attrs.index(attr),
+                                self.attrs.index(by) if by else None)
+                        expected = aggregate(
+                            ((v[j] if by else None, v[i])
+                             for v in self.rows.values()),
+                            func, by is not None, q=90)
+                        found = self.index.aggregate(attr, func, by, q=90)
+                        if by is None:
+                            found, expected = {0: found}, {0: expected}
+                        self.assertEqual(list(found), list(expected))
+                        for group, value in expected.items():
+                            self.assertAlmostEqual(found[group], value)
+
+    def test_aggregate(self):
+        """Test the index agrees with the aggregations of the rows"""
+        self.check()
+        self.assertEqual(self.index.aggregate(None, "count"), 500)
+        self.assertEqual(
+            self.index.aggregate(None, "count", "city_id",
+                                 groups={"c1": "s1", "c2": "s1"}),
+            {"s1": sum(v[0] in ("c1", "c2") for v in self.rows.values())})
+
+    def test_updates(self):
+        """Test the index follows the changes and reuses the rows"""
+        for _ in range(2000):
+            key = "Place." + str(self.random.randrange(600))
+            if self.random.random() < 0.3:
+                self.rows.pop(key, None)
+                self.index.discard(key)
+            else:
+                self.rows[key] = self.row()
+                self.index.put(key, self.rows[key])
+        self.assertEqual(len(self.index), len(self.rows))
+        self.check()
+
+    def test_compact(self):
+        """Test the values no object holds anymore are dropped"""
+        index = ColumnIndex(("price_by_night",))
+        for price in range(1000):
+            index.put("Place.1", (price,))
+        self.assertEqual(index.aggregate("price_by_night", "sum"), 999.0)
+        self.assertLess(len(index._ColumnIndex__values[0]), 100)
+
+    def test_errors(self):
+        """Test the invalid aggregations"""
+        with self.assertRaises(ValueError):
+            self.index.aggregate("price_by_night", "median")
+        with self.assertRaises(ValueError):
+            self.index.aggregate(None, "mean")
+
+
+if __name__ == '__main__':
+    unittest.main()
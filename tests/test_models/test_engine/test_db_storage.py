@@ -0,0 +1,252 @@
+#!/usr/bin/python3
+"""Unittest for DBStorage class
+file name: test_db_storage.py
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from io import StringIO
+from datetime import datetime
+import inspect  # test function and module doc string
+import pycodestyle as pep8
+from models.engine.db_storage import DBStorage
+import models.engine.db_storage as db_storage
+from models.base_model import BaseModel
+from models.city import City
+from models.place import Place
+from console import HBNBCommand
+
+
+class TestDBStorageDocPep8(unittest.TestCase):
+    """unittest class for DBStorage class
+    documentation and pep8 conformaty"""
+    def test_pep8_base(self):
+        """Test that the db_storage module conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['models/engine/db_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_test_base(self):
+        """Test that the test_db_storage conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['tests/test_models/test_engine/' +
+                                    'test_db_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_module_docstring(self):
+        """test module documentation"""
+        self.assertTrue(len(db_storage.__doc__) > 0)
+
+    def test_class_docstring(self):
+        """test class documentation"""
+        self.assertTrue(len(str(DBStorage.__doc__)) > 0)
+
+    def test_func_docstrings(self):
+        """Tests for the presence of docstrings in all functions"""
+        for func in inspect.getmembers(DBStorage, inspect.isfunction):
+            self.assertTrue(len(str(func[1].__doc__)) > 0)
+
+
+class TestDBStorage(unittest.TestCase):
+    """unittest class for DBStorage class"""
+    def setUp(self) -> None:
+        """Set up a storage in a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.db")
+        self.storage = DBStorage(self.path)
+        # the models report their changes to models.storage
+        patcher = patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        now = datetime.now().isoformat()
+        self.places = [Place(id=str(i), created_at=now, updated_at=now,
+                             city_id="c" + str(i % 3), price_by_night=i)
+                       for i in range(6)]
+        for place in self.places:
+            self.storage.new(place)
+        self.city = City(id="c0", created_at=now, updated_at=now,
+                         name="Paris")
+        self.storage.new(self.city)
+        self.storage.save()
+
+    def tearDown(self) -> None:
+        """Close the storage and remove the temporary directory"""
+        self.storage.close()
+        self.tmp.cleanup()
+
+    def rows(self) -> dict:
+        """returns the data of every row by key"""
+        with sqlite3.connect(self.path) as conn:
+            return dict(conn.execute("SELECT key, data FROM objects"))
+
+    def test_save(self):
+        """Test save writes one row per object"""
+        self.assertEqual(len(self.rows()), 7)
+        self.assertIn('"price_by_night": 3', self.rows()["Place.3"])
+
+    def test_reload(self):
+        """Test another storage reads the saved objects"""
+        fs = DBStorage(self.path)
+        fs.reload()
+        self.assertEqual({k: v.to_dict() for k, v in fs.all().items()},
+                         {k: v.to_dict()
+                          for k, v in self.storage.all().items()})
+        fs.close()
+
+    def test_lookup_reads_one_row(self):
+        """Test a lookup by key does not read the whole table"""
+        fs = DBStorage(self.path)
+        fs.reload()
+        self.assertEqual(fs.all()["Place.2"].price_by_night, 2)
+        self.assertTrue("City.c0" in fs.all())
+        self.assertFalse("City.c9" in fs.all())
+        self.assertEqual(dict.__len__(fs.all()), 2)
+        self.assertIs(fs.all()["Place.2"], fs.all()["Place.2"])
+        fs.close()
+
+    def test_count(self):
+        """Test count reads no row and sees the unsaved changes"""
+        fs = DBStorage(self.path)
+        self.assertEqual(fs.count(), 7)
+        self.assertEqual(fs.count(Place), 6)
+        self.assertEqual(fs.count("City"), 1)
+        self.assertEqual(fs.count("Nothing"), 0)
+        self.assertEqual(dict.__len__(fs.all()), 0)
+        place = fs.all()["Place.1"]
+        place.name = "Loft"
+        fs.delete(fs.all()["Place.2"])
+        fs.new(Place(id="9"))
+        self.assertEqual(fs.count(Place), 6)
+        self.assertEqual(fs.count(), 7)
+        fs.delete(fs.all()["Place.9"])
+        self.assertEqual(fs.count(Place), 5)
+        fs.save()
+        self.assertEqual(fs.count(Place), 5)
+        self.assertEqual(fs.count(), 6)
+        fs.close()
+
+    def test_update(self):
+        """Test a modification is written by the next save only"""
+        fs = DBStorage(self.path)
+        place = fs.all()["Place.1"]
+        place.name = "Loft"
+        self.assertNotIn("Loft", self.rows()["Place.1"])
+        fs.save()
+        self.assertIn("Loft", self.rows()["Place.1"])
+        fs.close()
+
+    def test_delete(self):
+        """Test a deleted object disappears from the storage"""
+        self.storage.delete(self.places[0])
+        self.assertNotIn("Place.0", self.storage.all())
+        self.storage.save()
+        self.assertNotIn("Place.0", self.rows())
+        self.storage.reload()
+        self.assertNotIn("Place.0", self.storage.all())
+        self.assertEqual(len(self.storage.all()), 6)
+
+    def test_filters(self):
+        """Test the class and attribute filters"""
+        self.assertEqual(sorted(self.storage.all(Place)),
+                         ["Place." + str(i) for i in range(6)])
+        self.assertEqual(list(self.storage.all("City")), ["City.c0"])
+        self.assertEqual(sorted(self.storage.all(Place, city_id="c1")),
+                         ["Place.1", "Place.4"])
+        self.assertEqual(list(self.storage.all(name="Paris")), ["City.c0"])
+        with self.assertRaises(ValueError):
+            self.storage.all(Place, **{'a") OR 1 --': 1})
+
+    def test_filters_unsaved(self):
+        """Test the filters see the changes that are not saved yet"""
+        self.places[1].city_id = "c2"
+        self.storage.delete(self.places[5])
+        now = datetime.now().isoformat()
+        self.storage.new(Place(id="new", created_at=now, updated_at=now,
+                               city_id="c2"))
+        self.assertEqual(sorted(self.storage.all(Place, city_id="c2")),
+                         ["Place.1", "Place.2", "Place.new"])
+
+    def test_lookup(self):
+        """Test lookup selects the objects through an index"""
+        self.assertEqual(sorted(self.storage.lookup(Place, "city_id", "c1")),
+                         ["Place.1", "Place.4"])
+        self.places[1].city_id = "c2"
+        self.assertEqual(list(self.storage.lookup(Place, "city_id", "c1")),
+                         ["Place.4"])
+        with sqlite3.connect(self.path) as conn:
+            plan = conn.execute("EXPLAIN QUERY PLAN SELECT key FROM objects "
+                                "WHERE class = ? AND "
+                                "json_extract(data, '$.city_id') IS ?",
+                                ("Place", "c1")).fetchall()
+        self.assertIn("objects_city_id", plan[0][-1])
+
+    def test_lookup_range(self):
+        """Test lookup_range selects the objects through an index"""
+        self.places[4].price_by_night = 0
+        self.assertEqual(list(self.storage.lookup_range(Place,
+                                                        "price_by_night",
+                                                        high=2)),
+                         ["Place.0", "Place.4", "Place.1", "Place.2"])
+        with sqlite3.connect(self.path) as conn:
+            plan = conn.execute("EXPLAIN QUERY PLAN SELECT key FROM objects "
+                                "WHERE class = ? AND "
+                                "json_extract(data, '$.max_guest') >= ?",
+                                ("Place", 2)).fetchall()
+        self.assertIn("objects_max_guest", plan[0][-1])
+
+    def test_lookup_box(self):
+        """Test lookup_box selects the objects through an index"""
+        self.places[0].latitude = 48.85
+        self.places[0].longitude = 2.35
+        self.places[1].latitude = 48.85
+        self.places[1].longitude = 179.5
+        self.storage.save()
+        self.places[2].latitude = 48.9
+        self.places[2].longitude = -179.5
+        self.assertEqual(list(self.storage.lookup_box(Place, 48, 2, 49, 3)),
+                         ["Place.0"])
+        self.assertEqual(sorted(self.storage.lookup_box(Place, 48, 179,
+                                                        49, -179)),
+                         ["Place.1", "Place.2"])
+        self.assertEqual(list(self.storage.lookup_radius(Place, 48.85, 2.36,
+                                                         5)), ["Place.0"])
+        with sqlite3.connect(self.path) as conn:
+            plan = conn.execute("EXPLAIN QUERY PLAN SELECT key FROM objects "
+                                "WHERE class = ? AND "
+                                "json_extract(data, '$.latitude') "
+                                "BETWEEN ? AND ?",
+                                ("Place", 48, 49)).fetchall()
+        self.assertIn("objects_latitude", plan[0][-1])
+
+    def test_failed_save(self):
+        """Test the changes of a failed save are kept"""
+        self.places[0].name = "Loft"
+        with patch.object(self.storage, "_DBStorage__conn") as conn:
+            conn.__enter__.side_effect = sqlite3.OperationalError("locked")
+            with self.assertRaises(sqlite3.OperationalError):
+                self.storage.save()
+        self.storage.save()
+        self.assertIn("Loft", self.rows()["Place.0"])
+
+    def test_console(self):
+        """Test the console commands on top of DBStorage"""
+        with patch("console.storage", self.storage):
+            with patch("sys.stdout", new=StringIO()) as f:
+                HBNBCommand().onecmd("create BaseModel")
+            key = "BaseModel." + f.getvalue().strip()
+            self.assertIn(key, self.rows())
+            HBNBCommand().onecmd('update Place 3 name "Loft"')
+            self.assertIn("Loft", self.rows()["Place.3"])
+            with patch("sys.stdout", new=StringIO()) as f:
+                HBNBCommand().onecmd(HBNBCommand().precmd("Place.count()"))
+            self.assertEqual(f.getvalue(), "6\n")
+            HBNBCommand().onecmd("destroy " + key.replace(".", " "))
+            self.assertNotIn(key, self.rows())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,16 +3,27 @@
 file name: test_file_storage.py
 """
 import os
+import shutil
+import tempfile
+import threading
+from time import sleep
 import unittest
 from unittest.mock import patch
-from json import load
+from io import StringIO
+from json import dump, dumps, load, loads
+from json.decoder import JSONDecodeError
+from datetime import datetime
 import inspect  # test function and module doc string
 # import pep8  # test pep8 conformance
 import pycodestyle as pep8
 from models.engine.file_storage import FileStorage
 import models.engine.file_storage as file_storage
+import models.engine.indexes as indexes
 from models import storage
 from models.base_model import BaseModel
+from models.user import User
+from models.place import Place
+from models.review import Review
 from console import HBNBCommand
 
 
@@ -53,6 +64,8 @@ class TestBaseModelDocPep8(unittest.TestCase):
 
 
 # TODO: Test cases for FS
+@unittest.skipUnless(isinstance(storage, FileStorage),
+                     "models.storage is not a FileStorage")
 class TestFileStorageClassWorking(unittest.TestCase):
     """unittest class for FileStorage class when everything works"""
     def setUp(self) -> None:
@@ -74,7 +87,7 @@ class TestFileStorageClassWorking(unittest.TestCase):
 
     def test_all(self):
         """Test all"""
-        self.assertEqual(type(storage.all()), dict)
+        self.assertIsInstance(storage.all(), dict)
         self.instances.append(BaseModel())
         storage.save()
         self.assertTrue(self.instances[0] in storage.all().values())
@@ -138,3 +151,1135 @@ class TestFileStorageClassWorking(unittest.TestCase):
             del storage.all()[instance.__class__.__name__ +
                               "." + instance.id]
         storage.save()
+
+
+class TestFileStorageJournal(unittest.TestCase):
+    """unittest class for the append-only journal of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a journaled storage in a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        self.storage = FileStorage(self.path, journal=True)
+        now = datetime.now().isoformat()
+        self.obj = BaseModel(id="1234", created_at=now, updated_at=now)
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def journal(self) -> list:
+        """returns the records of the journal"""
+        with open(self.path + ".log", "r", encoding="utf-8") as f:
+            return [loads(line) for line in f]
+
+    def test_save_appends(self):
+        """Test save appends one record per change only"""
+        self.storage.new(self.obj)
+        self.storage.save()
+        self.storage.save()
+        records = self.journal()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["op"], "put")
+        self.assertEqual(records[0]["value"], self.obj.to_dict())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_touch_and_delete(self):
+        """Test modified and deleted objects are journaled"""
+        self.storage.new(self.obj)
+        self.storage.save()
+        self.obj.name = "Betty"
+        self.storage.save()
+        self.storage.delete(self.obj)
+        self.storage.save()
+        ops = [record["op"] for record in self.journal()]
+        self.assertEqual(ops, ["put", "put", "delete"])
+        self.assertEqual(self.journal()[1]["value"]["name"], "Betty")
+
+    def test_raw_delete(self):
+        """Test keys removed straight from all() are journaled"""
+        self.storage.new(self.obj)
+        self.storage.save()
+        del self.storage.all()["BaseModel." + self.obj.id]
+        self.storage.save()
+        self.assertEqual(self.journal()[-1],
+                         {"op": "delete", "key": "BaseModel." + self.obj.id})
+
+    def test_reload_replays(self):
+        """Test reload replays the journal on top of the snapshot"""
+        other = BaseModel(**self.obj.to_dict())
+        other.id = "other"
+        snapshot = FileStorage(self.path)
+        snapshot.new(self.obj)
+        snapshot.new(other)
+        snapshot.save()
+        self.storage.reload()
+        self.obj.name = "Betty"
+        self.storage.new(self.obj)
+        self.storage.delete(self.storage.all()["BaseModel.other"])
+        self.storage.save()
+        fresh = FileStorage(self.path, journal=True)
+        fresh.reload()
+        self.assertEqual(list(fresh.all()), ["BaseModel." + self.obj.id])
+        self.assertEqual(fresh.all()["BaseModel." + self.obj.id].name,
+                         "Betty")
+
+    def test_torn_record(self):
+        """Test a torn last record is ignored and cut off"""
+        self.storage.new(self.obj)
+        self.storage.save()
+        with open(self.path + ".log", "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "key": "BaseModel.x", "val')
+        fresh = FileStorage(self.path, journal=True)
+        fresh.reload()
+        self.assertEqual(list(fresh.all()), ["BaseModel." + self.obj.id])
+        self.assertEqual(len(self.journal()), 1)
+
+    def test_snapshot_save_drops_journal(self):
+        """Test a full save makes the journal obsolete"""
+        self.storage.new(self.obj)
+        self.storage.save()
+        snapshot = FileStorage(self.path)
+        snapshot.reload()
+        snapshot.save()
+        self.assertFalse(os.path.exists(self.path + ".log"))
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertIn("BaseModel." + self.obj.id, load(f))
+
+
+class TestFileStorageDirty(unittest.TestCase):
+    """unittest class for the dirty tracking of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a storage holding a few objects"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        self.storage = FileStorage(self.path)
+        now = datetime.now().isoformat()
+        self.objs = [BaseModel(id=str(i), created_at=now, updated_at=now)
+                     for i in range(5)]
+        for obj in self.objs:
+            self.storage.new(obj)
+        self.storage.save()
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def content(self) -> dict:
+        """returns the content of the JSON file"""
+        with open(self.path, "r", encoding="utf-8") as f:
+            return load(f)
+
+    def test_clean_save(self):
+        """Test saving an unchanged store serializes nothing"""
+        with patch.object(BaseModel, "to_dict") as to_dict:
+            self.storage.save()
+            to_dict.assert_not_called()
+        self.assertEqual(len(self.content()), 5)
+
+    def test_dirty_save(self):
+        """Test only the touched object is serialized again"""
+        self.objs[2].name = "Betty"
+        with patch.object(BaseModel, "to_dict",
+                          autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            self.storage.save()
+            to_dict.assert_called_once_with(self.objs[2], cache=False)
+        self.assertIsNone(self.objs[2]._BaseModel__cache)
+        self.assertEqual(self.content()["BaseModel.2"]["name"], "Betty")
+
+    def test_deleted_save(self):
+        """Test deleted objects leave the file"""
+        self.storage.delete(self.objs[0])
+        del self.storage.all()["BaseModel.1"]
+        self.storage.save()
+        self.assertEqual(sorted(self.content()),
+                         ["BaseModel.2", "BaseModel.3", "BaseModel.4"])
+
+    def test_raw_replace(self):
+        """Test a key removed from all() and another one added directly,
+        which leave the number of objects unchanged, are both saved"""
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                storage = FileStorage(self.path, journal=journal)
+                storage.reload()
+                objects = storage.all()
+                extra = BaseModel(**dict(self.objs[0].to_dict(),
+                                         id="new" + str(journal)))
+                key = "BaseModel." + extra.id
+                del objects[next(k for k in objects if k != key)]
+                objects[key] = extra
+                storage.save()
+                expected = sorted(objects)
+                fresh = FileStorage(self.path)
+                fresh.reload()
+                self.assertEqual(sorted(fresh.all()), expected)
+
+    def test_reload_is_clean(self):
+        """Test reloaded objects are not serialized again"""
+        fresh = FileStorage(self.path)
+        fresh.reload()
+        with patch.object(BaseModel, "to_dict") as to_dict:
+            fresh.save()
+            to_dict.assert_not_called()
+        self.assertEqual(self.content(),
+                         {k: v.to_dict() for k, v in fresh.all().items()})
+
+
+class TestFileStorageSharded(unittest.TestCase):
+    """unittest class for the per class files of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a sharded storage holding a User and a Review"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        self.dir = os.path.join(self.tmp.name, "file")
+        self.storage = FileStorage(self.path, sharded=True)
+        now = datetime.now().isoformat()
+        self.user = User(id="u", created_at=now, updated_at=now)
+        self.review = Review(id="r", created_at=now, updated_at=now)
+        self.storage.new(self.user)
+        self.storage.new(self.review)
+        self.storage.save()
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_layout(self):
+        """Test each class has its own file"""
+        self.assertEqual(sorted(os.listdir(self.dir)),
+                         ["Review.json", "User.json"])
+        self.assertFalse(os.path.exists(self.path))
+        with open(os.path.join(self.dir, "User.json"),
+                  "r", encoding="utf-8") as f:
+            self.assertEqual(load(f), {"User.u": self.user.to_dict()})
+
+    def test_migration(self):
+        """Test a single snapshot file is read then split into shards"""
+        for compression in (None, "gzip"):
+            with self.subTest(compression=compression):
+                shutil.rmtree(self.dir)
+                single = FileStorage(self.path, compression=compression)
+                single.new(self.user)
+                single.new(self.review)
+                single.save()
+                fs = FileStorage(self.path, sharded=True,
+                                 compression=compression)
+                fs.reload()
+                self.assertEqual(sorted(fs.all()), ["Review.r", "User.u"])
+                fs.save()
+                suffix = ".gz" if compression else ""
+                self.assertEqual(sorted(os.listdir(self.dir)),
+                                 ["Review.json" + suffix,
+                                  "User.json" + suffix])
+                self.assertEqual(os.listdir(self.tmp.name), ["file"])
+
+    def test_unsharded(self):
+        """Test the shards are read then merged into a single file"""
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                fs = FileStorage(self.path, journal=journal)
+                fs.reload()
+                self.assertEqual(sorted(fs.all()), ["Review.r", "User.u"])
+                fs.delete(fs.all()["Review.r"])
+                fs.save()
+                fs.flush()
+                self.assertFalse(os.path.exists(self.dir))
+                fs = FileStorage(self.path, sharded=True)
+                fs.reload()
+                self.assertEqual(sorted(fs.all()), ["User.u"])
+                fs.new(self.review)
+                fs.save()
+                self.assertEqual(sorted(os.listdir(self.dir)),
+                                 ["Review.json", "User.json"])
+        with open(os.path.join(self.dir, "notes.txt"), "w") as f:
+            f.write("kept")
+        fs = FileStorage(self.path)
+        fs.reload()
+        fs.save()
+        self.assertEqual(os.listdir(self.dir), ["notes.txt"])
+
+    def test_only_changed_shard_written(self):
+        """Test a Review edit only rewrites Review.json"""
+        user_file = os.path.join(self.dir, "User.json")
+        os.utime(user_file, ns=(0, 0))
+        self.review.text = "Great"
+        self.storage.save()
+        self.assertEqual(os.stat(user_file).st_mtime_ns, 0)
+        with open(os.path.join(self.dir, "Review.json"),
+                  "r", encoding="utf-8") as f:
+            self.assertEqual(load(f)["Review.r"]["text"], "Great")
+
+    def test_reload(self):
+        """Test reload reads every shard"""
+        fresh = FileStorage(self.path, sharded=True)
+        fresh.reload()
+        self.assertEqual(sorted(fresh.all()), ["Review.r", "User.u"])
+        self.assertIsInstance(fresh.all()["User.u"], User)
+        self.assertEqual(fresh.all()["Review.r"].to_dict(),
+                         self.review.to_dict())
+
+    def test_delete(self):
+        """Test deleting the last object of a class empties its file"""
+        self.storage.delete(self.user)
+        self.storage.save()
+        fresh = FileStorage(self.path, sharded=True)
+        fresh.reload()
+        self.assertEqual(list(fresh.all()), ["Review.r"])
+
+
+class TestFileStorageWriteBehind(unittest.TestCase):
+    """unittest class for the write-behind mode of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a temporary directory and an object"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        now = datetime.now().isoformat()
+        self.obj = BaseModel(id="1234", created_at=now, updated_at=now)
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def wait_for_file(self) -> bool:
+        """waits up to 2 seconds for the JSON file to be written"""
+        for _ in range(200):
+            if os.path.exists(self.path):
+                return True
+            sleep(0.01)
+        return False
+
+    def test_save_is_deferred(self):
+        """Test save returns before anything is written"""
+        fs = FileStorage(self.path, write_behind=60)
+        fs.new(self.obj)
+        fs.save()
+        self.assertFalse(os.path.exists(self.path))
+        fs.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertIn("BaseModel.1234", load(f))
+
+    def test_flush_nothing_pending(self):
+        """Test flush does not write when no save is pending"""
+        fs = FileStorage(self.path, write_behind=60)
+        fs.new(self.obj)
+        fs.flush()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_group_commit(self):
+        """Test the thread writes once flush_changes saves are pending"""
+        fs = FileStorage(self.path, write_behind=60, flush_changes=2)
+        fs.new(self.obj)
+        fs.save()
+        sleep(0.05)
+        self.assertFalse(os.path.exists(self.path))
+        fs.save()
+        self.assertTrue(self.wait_for_file())
+
+    def test_interval(self):
+        """Test the thread writes after the interval"""
+        fs = FileStorage(self.path, write_behind=0.05)
+        fs.new(self.obj)
+        fs.save()
+        self.assertTrue(self.wait_for_file())
+
+    def test_thread_error(self):
+        """Test an error of the thread keeps the saves pending and is
+        raised by the next save or flush"""
+        for call in ("save", "flush"):
+            with self.subTest(call=call):
+                fs = FileStorage(self.path, write_behind=60,
+                                 flush_changes=1)
+                fs.new(self.obj)
+                with patch.object(fs, "_FileStorage__write",
+                                  side_effect=TypeError("not JSON")):
+                    fs.save()
+                    for _ in range(200):
+                        if fs._FileStorage__error is not None:
+                            break
+                        sleep(0.01)
+                self.assertTrue(fs._FileStorage__flusher.is_alive())
+                sleep(0.05)
+                self.assertFalse(os.path.exists(self.path))
+                with self.assertRaises(TypeError):
+                    getattr(fs, call)()
+                fs.flush()
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.assertIn("BaseModel.1234", load(f))
+                os.remove(self.path)
+                fs.close()
+
+    def test_close(self):
+        """Test close writes, stops the thread and leaves atexit"""
+        with patch("models.engine.file_storage.atexit") as atexit_mock:
+            fs = FileStorage(self.path, write_behind=60)
+            thread = fs._FileStorage__flusher
+            atexit_mock.register.assert_called_once_with(fs.flush)
+            fs.new(self.obj)
+            fs.save()
+            fs.close()
+            atexit_mock.unregister.assert_called_once_with(fs.flush)
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertIn("BaseModel.1234", load(f))
+        os.remove(self.path)
+        fs.save()
+        self.assertTrue(os.path.exists(self.path))
+        fs.close()
+
+    def test_console_quit_flushes(self):
+        """Test quit and EOF flush the storage"""
+        for command in ("quit", "EOF"):
+            with patch("console.storage") as storage_mock:
+                self.assertTrue(HBNBCommand().onecmd(command))
+                storage_mock.flush.assert_called_once()
+
+
+class TestFileStorageStreaming(unittest.TestCase):
+    """unittest class for the streaming reload of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a snapshot of a few objects"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        now = datetime.now().isoformat()
+        self.data = {f"User.{i}": {"id": str(i), "created_at": now,
+                                   "updated_at": now, "__class__": "User",
+                                   "first_name": "Betty {\"}, \u00e9",
+                                   "score": [i, 1.5, None, True]}
+                     for i in range(20)}
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_iter_entries(self):
+        """Test entries are parsed whatever the chunk size"""
+        for indent in (None, 4):
+            text = dumps(self.data, indent=indent)
+            for size in (1, 7, 1 << 16):
+                entries = file_storage._iter_entries(StringIO(text), size)
+                parsed = {k: (v, loads(raw)) for k, v, raw in entries}
+                self.assertEqual({k: v[0] for k, v in parsed.items()},
+                                 self.data)
+                self.assertEqual({k: v[1] for k, v in parsed.items()},
+                                 self.data)
+
+    def test_iter_entries_empty(self):
+        """Test an empty object yields nothing"""
+        self.assertEqual(list(file_storage._iter_entries(StringIO(" {} "))),
+                         [])
+
+    def test_iter_entries_invalid(self):
+        """Test a truncated or invalid file raises JSONDecodeError"""
+        text = dumps(self.data)[:-20]
+        with self.assertRaises(JSONDecodeError):
+            list(file_storage._iter_entries(StringIO(text), 16))
+        for text in ("[]", '{"User.1": {} "User.2": {}}',
+                     '{,"User.1": {}}', '{"User.1": {},}', "{1: {}}",
+                     '{"User.1": {}, 1: {}}', '{"User.1" {}}',
+                     '{"User.1": {}'):
+            with self.subTest(text=text), \
+                    self.assertRaises(JSONDecodeError):
+                list(file_storage._iter_entries(StringIO(text), 4))
+
+    def test_reload_pretty_file(self):
+        """Test an indented file is reloaded and saved back"""
+        with open(self.path, "w", encoding="utf-8") as f:
+            dump(self.data, f, indent=4)
+        fs = FileStorage(self.path)
+        fs.reload()
+        self.assertEqual({k: v.to_dict() for k, v in fs.all().items()},
+                         self.data)
+        with patch.object(User, "to_dict") as to_dict:
+            fs.save()
+            to_dict.assert_not_called()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(load(f), self.data)
+
+    def test_reload_invalid_object(self):
+        """Test an object that cannot be created stops the reload with
+        its error instead of being dropped with the entries after it"""
+        self.data["User.3"]["created_at"] = "today"
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{\n" + ",\n".join(
+                dumps(k) + ": " + dumps(v) for k, v in self.data.items()) +
+                "\n}\n")
+        with self.assertRaises(ValueError):
+            FileStorage(self.path).reload()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(load(f), self.data)
+
+    def test_reload_truncated(self):
+        """Test a snapshot that cannot be read to the end loads nothing"""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(dumps(self.data)[:-20])
+        fs = FileStorage(self.path)
+        fs.reload()
+        self.assertEqual(fs.all(), {})
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    """unittest class for the lazy mode of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a snapshot of two users"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        fs = FileStorage(self.path)
+        now = datetime.now().isoformat()
+        for i in range(2):
+            fs.new(User(id=str(i), created_at=now, updated_at=now,
+                        first_name="Betty"))
+        fs.save()
+        self.storage = FileStorage(self.path, lazy=True)
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_reload_creates_nothing(self):
+        """Test reload and key lookups do not create any instance"""
+        with patch.object(User, "__init__") as init:
+            self.storage.reload()
+            self.assertIn("User.0", self.storage.all())
+            self.assertEqual(len(self.storage.all()), 2)
+            self.assertEqual(sorted(self.storage.all()),
+                             ["User.0", "User.1"])
+            init.assert_not_called()
+
+    def test_reload_decodes_keys(self):
+        """Test reload only decodes the keys of a file written one entry
+        per line and parses the other layouts"""
+        with patch.object(file_storage, "_iter_entries") as parse:
+            self.storage.reload()
+            parse.assert_not_called()
+        expected = {k: v.to_dict() for k, v in self.storage.all().items()}
+        with open(self.path, "r", encoding="utf-8") as f:
+            content = load(f)
+        lines = ",\n".join(dumps(k) + ": " + dumps(v)
+                           for k, v in content.items())
+        for text in (dumps(content, indent=4), dumps(content),
+                     "{\n" + lines + "\n}\n\n"):
+            with self.subTest(text=text):
+                with open(self.path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                fs = FileStorage(self.path, lazy=True)
+                fs.reload()
+                self.assertEqual({k: v.to_dict()
+                                  for k, v in fs.all().items()}, expected)
+
+    def test_split_lines(self):
+        """Test the files not written one entry per line are rejected"""
+        for text in ('{\n"User.1": {}\n}\n', "{\n}\n"):
+            with self.subTest(text=text):
+                self.assertIsNotNone(file_storage._split_lines(
+                    StringIO(text)))
+        for text in ('{"User.1": {}}', '{\n"User.1": {}\n"User.2": {}\n}',
+                     '{\n"User.1": {},\n}', '{\n"User.1": {}\n',
+                     '{\n"User.1": {\n}', '{\n1: {}\n}',
+                     '{\n"User.1" {}\n}', '{\n"User.1": {}\n}\n}'):
+            with self.subTest(text=text):
+                self.assertIsNone(file_storage._split_lines(
+                    StringIO(text)))
+
+    def test_hydrate_on_access(self):
+        """Test an instance is created the first time it is read"""
+        self.storage.reload()
+        user = self.storage.all()["User.0"]
+        self.assertIsInstance(user, User)
+        self.assertEqual(user.first_name, "Betty")
+        self.assertIsInstance(user.created_at, datetime)
+        self.assertIs(self.storage.all()["User.0"], user)
+        self.assertIs(self.storage.all().get("User.0"), user)
+        self.assertIsInstance(dict.get(self.storage.all(), "User.1"),
+                              file_storage._Record)
+        for value in self.storage.all().values():
+            self.assertIsInstance(value, User)
+
+    def test_copies(self):
+        """Test the copies of all() hold instances, not placeholders"""
+        self.storage.reload()
+        objects = self.storage.all()
+        merged = {}
+        merged.update(objects)
+        for copy in (dict(objects), {**objects}, objects.copy(), merged):
+            with self.subTest(copy=type(copy)):
+                self.assertEqual(sorted(copy), ["User.0", "User.1"])
+                for value in copy.values():
+                    self.assertIsInstance(value, User)
+
+    def test_save_untouched(self):
+        """Test placeholders are saved without being created"""
+        self.storage.reload()
+        self.storage.all()["User.0"].first_name = "Holberton"
+        with patch.object(User, "__init__") as init:
+            self.storage.save()
+            init.assert_not_called()
+        with open(self.path, "r", encoding="utf-8") as f:
+            content = load(f)
+        self.assertEqual(content["User.0"]["first_name"], "Holberton")
+        self.assertEqual(content["User.1"]["first_name"], "Betty")
+
+    def test_delete(self):
+        """Test a placeholder can be deleted"""
+        self.storage.reload()
+        del self.storage.all()["User.1"]
+        self.storage.save()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(list(load(f)), ["User.0"])
+
+
+class TestFileStorageDurability(unittest.TestCase):
+    """unittest class for the atomic and durable writes of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a temporary directory and an object"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        now = datetime.now().isoformat()
+        self.obj = BaseModel(id="1234", created_at=now, updated_at=now)
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_invalid_durability(self):
+        """Test an unknown durability is refused"""
+        with self.assertRaises(ValueError):
+            FileStorage(self.path, durability="sometimes")
+
+    def test_atomic_save(self):
+        """Test a failed save leaves the previous file untouched"""
+        fs = FileStorage(self.path)
+        fs.new(self.obj)
+        fs.save()
+        with open(self.path, "r", encoding="utf-8") as f:
+            before = f.read()
+        self.obj.name = "Betty"
+        with patch("os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                fs.save()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual(os.listdir(self.tmp.name), ["file.json"])
+        fs.save()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(load(f)["BaseModel.1234"]["name"], "Betty")
+
+    def test_fsync(self):
+        """Test the number of fsync calls of each durability"""
+        expected = {"none": 0, "batch": 2, "always": 4}
+        for durability, calls in expected.items():
+            path = os.path.join(self.tmp.name, durability + ".json")
+            fs = FileStorage(path, journal=True, durability=durability)
+            fs.new(self.obj)
+            fs.new(BaseModel(**self.obj.to_dict() | {"id": "5678"}))
+            with patch("os.fsync") as fsync:
+                fs.save()
+                fs.delete(self.obj)
+                fs.save()
+            self.assertEqual(fsync.call_count, calls, durability)
+
+    def test_failed_journal_resyncs(self):
+        """Test the write following a failed append journals the changes
+        again and compacts the journal"""
+        fs = FileStorage(self.path, journal=True)
+        fs.new(self.obj)
+        os.mkdir(self.path + ".log")
+        with self.assertRaises(OSError):
+            fs.save()
+        os.rmdir(self.path + ".log")
+        fs.save()
+        fs.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertIn("BaseModel.1234", load(f))
+        with open(self.path + ".log", "r", encoding="utf-8") as f:
+            self.assertEqual(loads(f.read())["key"], "BaseModel.1234")
+        self.assertFalse(os.path.exists(self.path + ".log.1"))
+
+
+class TestFileStorageCompaction(unittest.TestCase):
+    """unittest class for the journal compaction of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a temporary directory and an object"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        now = datetime.now().isoformat()
+        self.obj = BaseModel(id="1234", created_at=now, updated_at=now)
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def update(self, fs, times, size=1000, wait=False) -> None:
+        """saves times modifications of self.obj into fs, waiting for
+        the compaction after each save when wait is True"""
+        fs.new(self.obj)
+        for i in range(times):
+            self.obj.__dict__["data"] = str(i) * size
+            fs.touch(self.obj)
+            fs.save()
+            if wait:
+                fs.flush()
+
+    def reloaded(self) -> FileStorage:
+        """returns a new journaled storage reloaded from the files"""
+        fs = FileStorage(self.path, journal=True)
+        fs.reload()
+        fs.flush()
+        return fs
+
+    def test_size_threshold(self):
+        """Test the journal is compacted once it reaches compact_size"""
+        fs = FileStorage(self.path, journal=True, compact_size=4000,
+                         compact_ratio=0)
+        self.update(fs, 10, wait=True)
+        self.assertLess(os.path.getsize(self.path + ".log"), 4000)
+        self.assertFalse(os.path.exists(self.path + ".log.1"))
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertIn("BaseModel.1234", load(f))
+        self.assertEqual(self.reloaded().all()["BaseModel.1234"].data,
+                         "9" * 1000)
+
+    def test_ratio_threshold(self):
+        """Test the journal is compacted once it outgrows the snapshot"""
+        fs = FileStorage(self.path, journal=True, compact_size=0)
+        self.update(fs, 100, wait=True)
+        self.assertTrue(os.path.exists(self.path))
+        self.assertLess(os.path.getsize(self.path + ".log"), 1 << 16)
+        self.assertEqual(self.reloaded().all()["BaseModel.1234"].data,
+                         "99" * 1000)
+
+    def test_disabled(self):
+        """Test a zero threshold never compacts"""
+        fs = FileStorage(self.path, journal=True, compact_size=0,
+                         compact_ratio=0)
+        self.update(fs, 100)
+        fs.flush()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertGreater(os.path.getsize(self.path + ".log"), 100000)
+
+    def test_background(self):
+        """Test the saves do not wait for a running compaction"""
+        fs = FileStorage(self.path, journal=True, compact_size=4000,
+                         compact_ratio=0)
+        release = threading.Event()
+        write = FileStorage._FileStorage__write_snapshot
+
+        def slow_write(*args):
+            """writes the snapshot once released"""
+            release.wait(5)
+            write(*args)
+
+        with patch.object(FileStorage, "_FileStorage__write_snapshot",
+                          slow_write):
+            self.update(fs, 5)
+            self.assertTrue(os.path.exists(self.path + ".log.1"))
+            self.update(fs, 2, 10)
+            release.set()
+            fs.flush()
+        self.assertFalse(os.path.exists(self.path + ".log.1"))
+        self.assertEqual(self.reloaded().all()["BaseModel.1234"].data,
+                         "1" * 10)
+
+    def test_interrupted(self):
+        """Test a sealed journal left by a crash is replayed before the
+        journal and is compacted by reload"""
+        records = [{"op": "put", "key": "BaseModel.1234",
+                    "value": self.obj.to_dict() | {"v": v}} for v in (1, 2)]
+        with open(self.path, "w", encoding="utf-8") as f:
+            dump({"BaseModel.1234": records[0]["value"]}, f)
+        with open(self.path + ".log.1", "w", encoding="utf-8") as f:
+            f.writelines(dumps(record) + "\n" for record in records)
+        with open(self.path + ".log", "w", encoding="utf-8") as f:
+            f.write(dumps(records[1] | {"value": records[1]["value"] |
+                                        {"v": 3}}) + "\n")
+        fs = self.reloaded()
+        self.assertEqual(fs.all()["BaseModel.1234"].v, 3)
+        self.assertFalse(os.path.exists(self.path + ".log.1"))
+        self.assertEqual(self.reloaded().all()["BaseModel.1234"].v, 3)
+
+    def test_reload_without_journal(self):
+        """Test a storage without journal folds the journals in"""
+        self.update(FileStorage(self.path, journal=True), 3)
+        fs = FileStorage(self.path)
+        fs.reload()
+        self.assertFalse(os.path.exists(self.path + ".log"))
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(load(f)["BaseModel.1234"]["data"], "2" * 1000)
+
+
+class TestFileStoragePerClass(unittest.TestCase):
+    """unittest class for the per class access to the objects"""
+    def setUp(self) -> None:
+        """Set up a storage holding two Users and a Review"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        self.storage = FileStorage(self.path)
+        now = datetime.now().isoformat()
+        self.objs = [User(id="1", created_at=now, updated_at=now),
+                     User(id="2", created_at=now, updated_at=now),
+                     Review(id="1", created_at=now, updated_at=now)]
+        for obj in self.objs:
+            self.storage.new(obj)
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def test_all_cls(self):
+        """Test all returns the objects of one class"""
+        self.assertEqual(self.storage.all(User),
+                         {"User.1": self.objs[0], "User.2": self.objs[1]})
+        self.assertEqual(self.storage.all("Review"),
+                         {"Review.1": self.objs[2]})
+        self.assertEqual(self.storage.all("Place"), {})
+        self.assertEqual(len(self.storage.all()), 3)
+
+    def test_count(self):
+        """Test count follows new, delete and the flat dictionary"""
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count(User), 2)
+        self.storage.delete(self.objs[0])
+        self.assertEqual(self.storage.count("User"), 1)
+        del self.storage.all()["Review.1"]
+        self.assertEqual(self.storage.count("Review"), 0)
+
+    def test_lazy(self):
+        """Test count does not create the objects of lazy mode"""
+        self.storage.save()
+        fs = FileStorage(self.path, lazy=True)
+        fs.reload()
+        self.assertEqual(fs.count("User"), 2)
+        self.assertTrue(all(type(v) is file_storage._Record
+                            for v in dict.values(fs.all())))
+        self.assertEqual(sorted(o.id for o in fs.all(User).values()),
+                         ["1", "2"])
+        self.assertIs(type(dict.__getitem__(fs.all(), "Review.1")),
+                      file_storage._Record)
+
+
+class TestFileStorageLookup(unittest.TestCase):
+    """unittest class for the foreign key indexes of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a storage holding places in two cities"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        self.storage = FileStorage(self.path)
+        now = datetime.now().isoformat()
+        self.places = [Place(id=str(i), created_at=now, updated_at=now,
+                             city_id="c" + str(i % 2))
+                       for i in range(4)]
+        for place in self.places:
+            self.storage.new(place)
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def keys(self, storage, value) -> list:
+        """returns the sorted keys of the places of the city value"""
+        return sorted(storage.lookup(Place, "city_id", value))
+
+    def test_lookup(self):
+        """Test lookup follows new, update and delete"""
+        self.assertEqual(self.keys(self.storage, "c0"),
+                         ["Place.0", "Place.2"])
+        with patch("models.storage", self.storage):
+            self.places[0].city_id = "c1"
+            self.storage.new(Place(id="4", city_id="c0"))
+        self.storage.delete(self.places[2])
+        self.assertEqual(self.keys(self.storage, "c0"), ["Place.4"])
+        self.assertEqual(self.keys(self.storage, "c1"),
+                         ["Place.0", "Place.1", "Place.3"])
+        self.assertEqual(self.storage.lookup("Place", "city_id", "c9"), {})
+
+    def test_reload(self):
+        """Test a reloaded storage finds the saved places"""
+        self.storage.save()
+        fs = FileStorage(self.path)
+        fs.reload()
+        self.assertEqual(self.keys(fs, "c1"), ["Place.1", "Place.3"])
+
+    def test_lazy(self):
+        """Test a lazy lookup only creates the matching places"""
+        self.storage.save()
+        fs = FileStorage(self.path, lazy=True)
+        fs.reload()
+        self.assertEqual(self.keys(fs, "c1"), ["Place.1", "Place.3"])
+        self.assertIs(type(dict.__getitem__(fs.all(), "Place.0")),
+                      file_storage._Record)
+        self.assertIsInstance(dict.__getitem__(fs.all(), "Place.1"), Place)
+
+    def test_lookup_range(self):
+        """Test a lazy range lookup only creates the matching places"""
+        for place in self.places:
+            object.__setattr__(place, "max_guest", int(place.id))
+        self.storage.save()
+        fs = FileStorage(self.path, lazy=True)
+        fs.reload()
+        self.assertEqual(list(fs.lookup_range(Place, "max_guest", 2)),
+                         ["Place.2", "Place.3"])
+        self.assertIs(type(dict.__getitem__(fs.all(), "Place.0")),
+                      file_storage._Record)
+        self.assertEqual(list(fs.lookup(Place, "number_rooms", 0)),
+                         ["Place.0", "Place.1", "Place.2", "Place.3"])
+
+    def test_lookup_radius(self):
+        """Test a lazy map lookup only creates the places nearby"""
+        for place in self.places:
+            object.__setattr__(place, "latitude", 48.8 + int(place.id) / 10)
+            object.__setattr__(place, "longitude", 2.3)
+        self.storage.save()
+        fs = FileStorage(self.path, lazy=True)
+        fs.reload()
+        self.assertEqual(list(fs.lookup_radius(Place, 48.99, 2.3, 14)),
+                         ["Place.2", "Place.1", "Place.3"])
+        self.assertEqual(list(fs.lookup_box(Place, 48, 2, 48.85, 3)),
+                         ["Place.0"])
+        self.assertIs(type(dict.__getitem__(fs.all(), "Place.0")),
+                      Place)
+        fs = FileStorage(self.path, lazy=True)
+        fs.reload()
+        fs.lookup_box(Place, 49, 2, 50, 3)
+        self.assertIs(type(dict.__getitem__(fs.all(), "Place.0")),
+                      file_storage._Record)
+
+    def test_search(self):
+        """Test the text index kept next to the snapshot"""
+        for place in self.places:
+            object.__setattr__(place, "name", "Loft " + place.city_id)
+        self.storage = FileStorage(self.path, text_index=True)
+        for place in self.places:
+            self.storage.new(place)
+        self.storage.save()
+        self.assertEqual(list(self.storage.search(Place, "c1")),
+                         ["Place.1", "Place.3"])
+        self.storage.flush()
+        self.assertTrue(os.path.exists(self.path + ".text"))
+        with patch("models.storage", self.storage):
+            self.places[1].name = "Cabin"
+        self.storage.save()
+        fs = FileStorage(self.path, text_index=True)
+        fs.reload()
+        with patch("models.engine.indexes.tokenize",
+                   wraps=indexes.tokenize) as tokenize:
+            self.assertEqual(list(fs.search(Place, "c1")), ["Place.3"])
+            # the query and the changed place only
+            self.assertEqual(tokenize.call_count, 2)
+        self.assertEqual(list(fs.search(Place, "cabin")), ["Place.1"])
+        with open(self.path + ".text", "w") as f:
+            f.write("{")
+        fs = FileStorage(self.path, text_index=True)
+        fs.reload()
+        self.assertEqual(list(fs.search(Place, "loft c0")),
+                         ["Place.0", "Place.2"])
+
+
+class TestFileStorageBinary(unittest.TestCase):
+    """unittest class for the binary snapshots of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a temporary directory and a few objects"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        now = datetime.now().isoformat()
+        self.objs = [User(id=str(i), created_at=now, updated_at=now,
+                          email="user{}@mail.com".format(i), number=i)
+                     for i in range(10)]
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def fill(self, fs):
+        """adds the objects to fs and saves them"""
+        for obj in self.objs:
+            fs.new(obj)
+        fs.save()
+
+    def test_invalid_format(self):
+        """Test an unknown snapshot format is refused"""
+        with self.assertRaises(ValueError):
+            FileStorage(self.path, snapshot_format="xml")
+
+    def test_round_trip(self):
+        """Test a binary snapshot reloads the same objects"""
+        self.fill(FileStorage(self.path, snapshot_format="binary"))
+        with open(self.path, "rb") as f:
+            self.assertTrue(f.read().startswith(b"HBNB"))
+        for lazy in (False, True):
+            fs = FileStorage(self.path, lazy=lazy)
+            fs.reload()
+            self.assertEqual({k: v.to_dict() for k, v in fs.all().items()},
+                             {"User." + o.id: o.to_dict()
+                              for o in self.objs})
+
+    def test_aware_dates(self):
+        """Test a date with a timezone is saved and read back"""
+        fs = FileStorage(self.path, snapshot_format="binary")
+        self.fill(fs)
+        with patch("models.storage", fs):
+            self.objs[0].created_at = datetime.fromisoformat(
+                "2017-09-28T21:05:54+02:00")
+        fs.save()
+        fs = FileStorage(self.path)
+        fs.reload()
+        self.assertEqual(fs.all()["User.0"].created_at,
+                         self.objs[0].created_at)
+
+    def test_smaller(self):
+        """Test the binary snapshot is smaller than the JSON one"""
+        self.fill(FileStorage(self.path))
+        text = os.path.getsize(self.path)
+        self.fill(FileStorage(self.path, snapshot_format="binary"))
+        self.assertLess(os.path.getsize(self.path), text)
+
+    def test_conversion(self):
+        """Test a save after a reload converts the file to the format"""
+        self.fill(FileStorage(self.path))
+        fs = FileStorage(self.path, snapshot_format="binary")
+        fs.reload()
+        fs.save()
+        with open(self.path, "rb") as f:
+            self.assertTrue(f.read().startswith(b"HBNB"))
+        fs = FileStorage(self.path)
+        fs.reload()
+        fs.save()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(len(load(f)), len(self.objs))
+
+    def test_journal(self):
+        """Test the journal stays JSON on top of a binary snapshot"""
+        fs = FileStorage(self.path, journal=True, snapshot_format="binary")
+        self.fill(fs)
+        self.objs[0].email = "new@mail.com"
+        fs.save()
+        with open(self.path + ".log", "r", encoding="utf-8") as f:
+            self.assertEqual(loads(f.readlines()[-1])["value"]["email"],
+                             "new@mail.com")
+        fs = FileStorage(self.path, snapshot_format="binary")
+        fs.reload()
+        self.assertEqual(fs.all()["User.0"].email, "new@mail.com")
+
+    def test_sharded(self):
+        """Test binary shards replace the JSON ones"""
+        fs = FileStorage(self.path, sharded=True)
+        self.fill(fs)
+        fs = FileStorage(self.path, sharded=True, snapshot_format="binary")
+        fs.reload()
+        fs.save()
+        directory = os.path.join(self.tmp.name, "file")
+        self.assertEqual(os.listdir(directory), ["User.bin"])
+        fs = FileStorage(self.path, sharded=True)
+        fs.reload()
+        self.assertEqual(len(fs.all()), len(self.objs))
+
+
+class TestFileStorageCompression(unittest.TestCase):
+    """unittest class for the compressed snapshots of FileStorage"""
+    def setUp(self) -> None:
+        """Set up a temporary directory and a few objects"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        now = datetime.now().isoformat()
+        self.objs = [Review(id=str(i), created_at=now, updated_at=now,
+                            place_id="p", user_id="u", text="Nice")
+                     for i in range(100)]
+
+    def tearDown(self) -> None:
+        """Remove the temporary directory"""
+        self.tmp.cleanup()
+
+    def fill(self, fs):
+        """adds the objects to fs and saves them"""
+        for obj in self.objs:
+            fs.new(obj)
+        fs.save()
+
+    def test_invalid_compression(self):
+        """Test an unknown compression is refused"""
+        with self.assertRaises(ValueError):
+            FileStorage(self.path, compression="zip")
+
+    def test_file_path(self):
+        """Test the compression extension is added to the file path"""
+        fs = FileStorage(self.path, compression="gzip")
+        self.assertEqual(fs._FileStorage__file_path, self.path + ".gz")
+        self.assertEqual(fs._FileStorage__journal_path,
+                         self.path + ".gz.log")
+        fs = FileStorage(self.path + ".xz")
+        self.assertEqual(fs._FileStorage__compression, "xz")
+
+    def test_round_trip(self):
+        """Test every compression and format reloads the same objects"""
+        expected = {"Review." + o.id: o.to_dict() for o in self.objs}
+        for compression in ("gzip", "xz"):
+            for snapshot_format in ("json", "binary"):
+                fs = FileStorage(self.path, compression=compression,
+                                 snapshot_format=snapshot_format)
+                self.fill(fs)
+                with open(fs._FileStorage__file_path, "rb") as f:
+                    self.assertFalse(f.read().startswith(b"{"))
+                fs = FileStorage(fs._FileStorage__file_path)
+                fs.reload()
+                self.assertEqual({k: v.to_dict()
+                                  for k, v in fs.all().items()}, expected)
+
+    def test_migration(self):
+        """Test turning the compression on or off keeps the objects"""
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                fs = FileStorage(self.path, journal=journal)
+                self.fill(fs)
+                fs.delete(self.objs[0])
+                fs.save()
+                paths = []
+                for compression in ("gzip", "xz", None):
+                    fs = FileStorage(self.path, compression=compression,
+                                     journal=journal)
+                    fs.reload()
+                    self.assertEqual(len(fs.all()), len(self.objs) - 1)
+                    fs.save()
+                    fs.flush()
+                    paths.append(fs._FileStorage__file_path)
+                self.assertEqual(paths, [self.path + ".gz",
+                                         self.path + ".xz", self.path])
+                self.assertFalse(os.path.exists(self.path + ".xz"))
+                os.remove(self.path)
+
+    def test_smaller(self):
+        """Test the compressed snapshot is smaller than the plain one"""
+        self.fill(FileStorage(self.path))
+        fs = FileStorage(self.path, compression="gzip")
+        self.fill(fs)
+        self.assertLess(os.path.getsize(fs._FileStorage__file_path) * 5,
+                        os.path.getsize(self.path))
+
+    def test_detected(self):
+        """Test a compressed file is read whatever its name"""
+        fs = FileStorage(self.path, compression="xz")
+        self.fill(fs)
+        os.replace(fs._FileStorage__file_path, self.path)
+        fs = FileStorage(self.path)
+        fs.reload()
+        self.assertEqual(len(fs.all()), len(self.objs))
+
+    def test_torn(self):
+        """Test a truncated compressed file does not raise"""
+        fs = FileStorage(self.path, compression="gzip")
+        self.fill(fs)
+        path = fs._FileStorage__file_path
+        os.truncate(path, os.path.getsize(path) // 2)
+        fs = FileStorage(path)
+        fs.reload()
+        self.assertLess(len(fs.all()), len(self.objs))
+
+    def test_sharded(self):
+        """Test compressed shards replace the plain ones"""
+        self.fill(FileStorage(self.path, sharded=True))
+        fs = FileStorage(self.path, sharded=True, compression="gzip")
+        fs.reload()
+        fs.save()
+        directory = os.path.join(self.tmp.name, "file")
+        self.assertEqual(os.listdir(directory), ["Review.json.gz"])
+        fs = FileStorage(self.path, sharded=True)
+        fs.reload()
+        self.assertEqual(len(fs.all()), len(self.objs))
@@ -0,0 +1,292 @@
+#!/usr/bin/python3
+"""Unittest for HashIndex class
+file name: test_indexes.py
+"""
+import unittest
+import inspect  # test function and module doc string
+import pycodestyle as pep8
+from json import dumps, loads
+from models.engine.indexes import FOREIGN_KEYS, GridIndex, HashIndex, \
+    SortedIndex, TextIndex, distance, in_box, radius_box, tokenize
+import models.engine.indexes as indexes
+
+
+class TestHashIndexDocPep8(unittest.TestCase):
+    """unittest class for HashIndex class
+    documentation and pep8 conformaty"""
+    def test_pep8_base(self):
+        """Test that the indexes module conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['models/engine/indexes.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_test_base(self):
+        """Test that the test_indexes conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['tests/test_models/test_engine/' +
+                                    'test_indexes.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_module_docstring(self):
+        """test module documentation"""
+        self.assertTrue(len(indexes.__doc__) > 0)
+
+    def test_class_docstring(self):
+        """test class documentation"""
+        self.assertTrue(len(str(HashIndex.__doc__)) > 0)
+        self.assertTrue(len(str(SortedIndex.__doc__)) > 0)
+        self.assertTrue(len(str(GridIndex.__doc__)) > 0)
+        self.assertTrue(len(str(TextIndex.__doc__)) > 0)
+
+    def test_func_docstrings(self):
+        """Tests for the presence of docstrings in all functions"""
+        for cls in (HashIndex, SortedIndex, GridIndex, TextIndex):
+            for func in inspect.getmembers(cls, inspect.isfunction):
+                self.assertTrue(len(str(func[1].__doc__)) > 0)
+
+
+class TestHashIndex(unittest.TestCase):
+    """unittest class for HashIndex class"""
+    def setUp(self) -> None:
+        """Set up an index of three places by city"""
+        self.index = HashIndex("city_id")
+        for key, value in (("Place.1", "c1"), ("Place.2", "c2"),
+                           ("Place.3", "c1")):
+            self.index.put(key, value)
+
+    def test_get(self):
+        """Test the keys are found by value in insertion order"""
+        self.assertEqual(self.index.attr, "city_id")
+        self.assertEqual(list(self.index.get("c1")), ["Place.1", "Place.3"])
+        self.assertEqual(list(self.index.get("c2")), ["Place.2"])
+        self.assertEqual(list(self.index.get("c9")), [])
+
+    def test_put_moves(self):
+        """Test a new value replaces the previous one"""
+        self.index.put("Place.1", "c2")
+        self.assertEqual(list(self.index.get("c1")), ["Place.3"])
+        self.assertEqual(list(self.index.get("c2")), ["Place.2", "Place.1"])
+        self.index.put("Place.1", None)
+        self.assertEqual(list(self.index.get("c2")), ["Place.2"])
+        self.assertEqual(list(self.index.get(None)), [])
+
+    def test_discard(self):
+        """Test discarded keys leave the index"""
+        self.index.discard("Place.2")
+        self.index.discard("Place.9")
+        self.assertEqual(list(self.index.get("c2")), [])
+        self.index.put("Place.2", "c1")
+        self.assertEqual(list(self.index.get("c1")),
+                         ["Place.1", "Place.3", "Place.2"])
+
+    def test_unhashable(self):
+        """Test unhashable values are left out"""
+        self.index.put("Place.1", ["c1"])
+        self.assertEqual(list(self.index.get("c1")), ["Place.3"])
+        with self.assertRaises(TypeError):
+            self.index.get(["c1"])
+
+    def test_foreign_keys(self):
+        """Test the relationships indexed by the storage engines"""
+        self.assertEqual(FOREIGN_KEYS["City"], ("state_id",))
+        self.assertEqual(set(FOREIGN_KEYS["Place"]), {"city_id", "user_id"})
+        self.assertEqual(set(FOREIGN_KEYS["Review"]),
+                         {"place_id", "user_id"})
+
+
+class TestSortedIndex(unittest.TestCase):
+    """unittest class for SortedIndex class"""
+    def setUp(self) -> None:
+        """Set up an index of five places by price"""
+        self.index = SortedIndex("price_by_night")
+        self.index.build([("Place.1", 100), ("Place.2", 80),
+                          ("Place.3", 120), ("Place.4", 80),
+                          ("Place.5", "free")])
+
+    def test_range(self):
+        """Test the keys are found by range in value order"""
+        self.assertEqual(self.index.range(80, 100),
+                         ["Place.2", "Place.4", "Place.1"])
+        self.assertEqual(self.index.range(low=90),
+                         ["Place.1", "Place.3"])
+        self.assertEqual(self.index.range(high=79.5), [])
+        self.assertEqual(self.index.range(), ["Place.2", "Place.4",
+                                              "Place.1", "Place.3"])
+        self.assertEqual(self.index.range(100, 80), [])
+
+    def test_get(self):
+        """Test the keys are found by value"""
+        self.assertEqual(self.index.get(80), ["Place.2", "Place.4"])
+        self.assertEqual(self.index.get(80.0), ["Place.2", "Place.4"])
+        self.assertEqual(self.index.get(90), [])
+        with self.assertRaises(TypeError):
+            self.index.get("free")
+
+    def test_put_discard(self):
+        """Test the index stays sorted as values change"""
+        self.index.put("Place.3", 80)
+        self.index.put("Place.0", 80)
+        self.index.put("Place.4", 150)
+        self.index.discard("Place.2")
+        self.index.discard("Place.9")
+        self.assertEqual(self.index.range(),
+                         ["Place.0", "Place.3", "Place.1", "Place.4"])
+        self.index.put("Place.1", None)
+        self.index.put("Place.0", float("nan"))
+        self.assertEqual(self.index.range(), ["Place.3", "Place.4"])
+
+    def test_put_matches_build(self):
+        """Test inserting one pair at a time gives the built order"""
+        pairs = [("Place." + str(i), (i * 7) % 5) for i in range(20)]
+        built = SortedIndex("max_guest")
+        built.build(pairs)
+        index = SortedIndex("max_guest")
+        for key, value in reversed(pairs):
+            index.put(key, value)
+        self.assertEqual(index.range(), built.range())
+        self.assertEqual(index.range(2, 3), built.range(2, 3))
+
+
+class TestGeometry(unittest.TestCase):
+    """unittest class for the distance and box functions"""
+    def test_distance(self):
+        """Test the great-circle distances"""
+        self.assertAlmostEqual(distance((48.8566, 2.3522),
+                                        (51.5074, -0.1278)), 343.5, 0)
+        self.assertEqual(distance((10, 20), (10, 20)), 0)
+        self.assertAlmostEqual(distance((0, 179.9), (0, -179.9)),
+                               22.24, 1)
+
+    def test_in_box(self):
+        """Test the boxes, across the antimeridian too"""
+        self.assertTrue(in_box((1, 2), 0, 0, 2, 2))
+        self.assertFalse(in_box((3, 2), 0, 0, 2, 2))
+        self.assertTrue(in_box((0, 179.5), -1, 179, 1, -179))
+        self.assertTrue(in_box((0, -179.5), -1, 179, 1, -179))
+        self.assertFalse(in_box((0, 0), -1, 179, 1, -179))
+
+    def test_radius_box(self):
+        """Test the box of a circle holds the circle"""
+        south, west, north, east = radius_box(48.8566, 2.3522, 100)
+        for lat, lon in ((south, 2.3522), (north, 2.3522)):
+            self.assertAlmostEqual(distance((48.8566, 2.3522),
+                                            (lat, lon)), 100, 6)
+        self.assertLess(west, 2.3522 - 0.9)
+        self.assertGreater(east, 2.3522 + 0.9)
+        west, east = radius_box(0, 179.9, 50)[1::2]
+        self.assertGreater(west, east)
+        self.assertEqual(radius_box(89.9, 0, 50)[1::2], (-180, 180))
+
+
+class TestGridIndex(unittest.TestCase):
+    """unittest class for GridIndex class"""
+    def setUp(self) -> None:
+        """Set up an index of places in Paris, London and Fiji"""
+        self.index = GridIndex(("latitude", "longitude"))
+        self.index.build([("Place.paris", (48.8566, 2.3522)),
+                          ("Place.versailles", (48.8049, 2.1204)),
+                          ("Place.london", (51.5074, -0.1278)),
+                          ("Place.fiji", (-17.7134, 178.065)),
+                          ("Place.nowhere", (None, 2.0))])
+
+    def test_box(self):
+        """Test the keys are found by box"""
+        self.assertEqual(sorted(self.index.box(48, 2, 49, 3)),
+                         ["Place.paris", "Place.versailles"])
+        self.assertEqual(sorted(self.index.box(48.82, 2, 49, 3)),
+                         ["Place.paris"])
+        self.assertEqual(self.index.box(-20, 170, -10, -170),
+                         ["Place.fiji"])
+        self.assertEqual(len(self.index.box(-90, -180, 90, 180)), 4)
+
+    def test_near(self):
+        """Test the keys are found by distance, nearest first"""
+        self.assertEqual(self.index.near(48.86, 2.35, 30),
+                         ["Place.paris", "Place.versailles"])
+        self.assertEqual(self.index.near(48.8, 2.1, 30),
+                         ["Place.versailles", "Place.paris"])
+        self.assertEqual(self.index.near(48.86, 2.35, 400),
+                         ["Place.paris", "Place.versailles",
+                          "Place.london"])
+        self.assertEqual(self.index.near(0, 0, 100), [])
+
+    def test_put_discard(self):
+        """Test moving and removing points"""
+        self.index.put("Place.london", (48.85, 2.35))
+        self.index.discard("Place.versailles")
+        self.index.discard("Place.none")
+        self.assertEqual(sorted(self.index.box(48, 2, 49, 3)),
+                         ["Place.london", "Place.paris"])
+        self.assertEqual(self.index.get((48.85, 2.35)), ["Place.london"])
+        with self.assertRaises(TypeError):
+            self.index.get((None, 2.0))
+        self.index.put("Place.london", "London")
+        self.assertEqual(self.index.box(48, 2, 49, 3), ["Place.paris"])
+
+
+class TestTextIndex(unittest.TestCase):
+    """unittest class for TextIndex class"""
+    def setUp(self) -> None:
+        """Set up an index of three places"""
+        self.index = TextIndex(("name", "description"))
+        self.index.build([
+            ("Place.1", ("Pool house", "A house with a pool and a garden")),
+            ("Place.2", ("Loft", "Quiet loft near the garden, no pool")),
+            ("Place.3", ("Cabin", None)),
+            ("Place.4", (None, 12))])
+
+    def test_tokenize(self):
+        """Test the words are case folded"""
+        self.assertEqual(tokenize("Pool-house, GARDEN_2!"),
+                         ["pool", "house", "garden_2"])
+
+    def test_search(self):
+        """Test the AND queries and their ranking"""
+        self.assertEqual(self.index.search("pool"), ["Place.1", "Place.2"])
+        self.assertEqual(self.index.search("GARDEN loft"), ["Place.2"])
+        self.assertEqual(self.index.search("pool cabin"), [])
+        self.assertEqual(self.index.search("cabin"), ["Place.3"])
+        self.assertEqual(self.index.search(" ,"), [])
+        self.assertEqual(self.index.search("gar"), [])
+        self.assertEqual(self.index.search("pool gar", prefix=True),
+                         ["Place.1", "Place.2"])
+        self.assertEqual(self.index.search("qu", prefix=True), ["Place.2"])
+
+    def test_put_discard(self):
+        """Test the index follows the changes of the text"""
+        self.index.put("Place.3", ("Cabin", "Garden view, pool"))
+        self.index.put("Place.1", ("Pool house", "A house"))
+        self.index.discard("Place.2")
+        self.index.discard("Place.9")
+        self.assertEqual(self.index.search("garden"), ["Place.3"])
+        self.assertEqual(self.index.search("qu", prefix=True), [])
+        self.assertEqual(self.index.search("pool"), ["Place.1", "Place.3"])
+
+    def test_restore(self):
+        """Test a dumped index answers the same and is checked"""
+        self.index.put("Place.2", ("Loft", "Garden view"))
+        self.assertTrue(self.index.changed)
+        data = loads(dumps(self.index.dump()))
+        self.assertFalse(self.index.changed)
+        index = TextIndex.restore(data)
+        self.assertEqual(index.attr, ("name", "description"))
+        self.assertEqual(index.search("garden"), ["Place.2", "Place.1"])
+        index.build([
+            ("Place.1", ("Pool house", "A house with a pool and a garden")),
+            ("Place.2", ("Loft", "Garden view")),
+            ("Place.3", ("Cabin", "Pool"))])
+        self.assertTrue(index.changed)
+        self.assertEqual(index.search("pool"), ["Place.3", "Place.1"])
+        self.assertEqual(index.search("view", prefix=True), ["Place.2"])
+        index.discard("Place.1")
+        index.discard("Place.2")
+        index = TextIndex.restore(loads(dumps(index.dump())))
+        self.assertEqual(len(loads(dumps(index.dump()))["keys"]), 1)
+        self.assertEqual(index.search("pool"), ["Place.3"])
+        self.assertEqual(index.search("garden"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
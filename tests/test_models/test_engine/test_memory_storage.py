@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""Unittest for MemoryStorage class
+file name: test_memory_storage.py
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import inspect  # test function and module doc string
+import pycodestyle as pep8
+from models.engine.memory_storage import MemoryStorage
+import models.engine.memory_storage as memory_storage
+from models.base_model import BaseModel
+from models.place import Place
+
+
+class TestMemoryStorageDocPep8(unittest.TestCase):
+    """unittest class for MemoryStorage class
+    documentation and pep8 conformaty"""
+    def test_pep8_base(self):
+        """Test that the memory_storage module conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['models/engine/memory_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_test_base(self):
+        """Test that the test_memory_storage conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['tests/test_models/test_engine/' +
+                                    'test_memory_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_module_docstring(self):
+        """test module documentation"""
+        self.assertTrue(len(memory_storage.__doc__) > 0)
+
+    def test_class_docstring(self):
+        """test class documentation"""
+        self.assertTrue(len(str(MemoryStorage.__doc__)) > 0)
+
+    def test_func_docstrings(self):
+        """Tests for the presence of docstrings in all functions"""
+        for func in inspect.getmembers(MemoryStorage, inspect.isfunction):
+            self.assertTrue(len(str(func[1].__doc__)) > 0)
+
+
+class TestMemoryStorage(unittest.TestCase):
+    """unittest class for MemoryStorage class"""
+    def setUp(self) -> None:
+        """Set up a storage and move to an empty directory"""
+        self.storage = MemoryStorage()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self) -> None:
+        """Go back to the working directory and remove the temporary one"""
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_instances(self):
+        """Test every storage has its own objects"""
+        with patch("models.storage", self.storage):
+            obj = BaseModel()
+        self.assertEqual(self.storage.all(), {"BaseModel." + obj.id: obj})
+        self.assertEqual(MemoryStorage().all(), {})
+
+    def test_no_io(self):
+        """Test nothing is read or written"""
+        with patch("models.storage", self.storage), \
+                patch("builtins.open") as open_mock:
+            obj = BaseModel()
+            obj.save()
+            self.storage.reload()
+            self.storage.delete(obj)
+            self.storage.save()
+        open_mock.assert_not_called()
+        self.assertEqual(os.listdir("."), [])
+        self.assertEqual(self.storage.all(), {})
+
+    def test_lookup(self):
+        """Test lookup follows the changes of the objects"""
+        with patch("models.storage", self.storage):
+            places = [Place(), Place()]
+            places[0].city_id = "c1"
+            places[1].city_id = "c2"
+            self.assertEqual(list(self.storage.lookup(Place, "city_id",
+                                                      "c1").values()),
+                             places[:1])
+            places[1].city_id = "c1"
+            self.assertEqual(len(self.storage.lookup("Place", "city_id",
+                                                     "c1")), 2)
+            self.storage.delete(places[0])
+        self.assertEqual(list(self.storage.lookup(Place, "city_id",
+                                                  "c1").values()),
+                         places[1:])
+
+
+if __name__ == '__main__':
+    unittest.main()
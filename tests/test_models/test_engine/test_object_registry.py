@@ -0,0 +1,317 @@
+#!/usr/bin/python3
+"""Unittest for ObjectRegistry class
+file name: test_object_registry.py
+"""
+import unittest
+import inspect  # test function and module doc string
+import pycodestyle as pep8
+from models.engine.columns import ColumnIndex, numpy
+from models.engine.indexes import TextIndex
+from models.engine.object_registry import ObjectRegistry
+import models.engine.object_registry as object_registry
+
+
+class TestObjectRegistryDocPep8(unittest.TestCase):
+    """unittest class for ObjectRegistry class
+    documentation and pep8 conformaty"""
+    def test_pep8_base(self):
+        """Test that the object_registry module conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['models/engine/object_registry.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_test_base(self):
+        """Test that the test_object_registry conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['tests/test_models/test_engine/' +
+                                    'test_object_registry.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_module_docstring(self):
+        """test module documentation"""
+        self.assertTrue(len(object_registry.__doc__) > 0)
+
+    def test_class_docstring(self):
+        """test class documentation"""
+        self.assertTrue(len(str(ObjectRegistry.__doc__)) > 0)
+
+    def test_func_docstrings(self):
+        """Tests for the presence of docstrings in all functions"""
+        for func in inspect.getmembers(ObjectRegistry, inspect.isfunction):
+            self.assertTrue(len(str(func[1].__doc__)) > 0)
+
+
+class TestObjectRegistry(unittest.TestCase):
+    """unittest class for the per class keys of ObjectRegistry"""
+    def setUp(self) -> None:
+        """Set up a registry holding two classes"""
+        self.reg = ObjectRegistry({"User.1": 1, "User.2": 2}, **{"City.1": 3})
+
+    def check(self) -> None:
+        """checks the keys of every class match the flat keys"""
+        names = {k.partition(".")[0] for k in self.reg}
+        self.assertEqual(sorted(self.reg.class_names()), sorted(names))
+        for name in names:
+            self.assertEqual(list(self.reg.keys_of(name)),
+                             [k for k in self.reg
+                              if k.partition(".")[0] == name])
+            self.assertEqual(self.reg.count(name), len(self.reg.keys_of(name)))
+
+    def test_flat_view(self):
+        """Test the registry is still a flat dictionary"""
+        self.assertIsInstance(self.reg, dict)
+        self.assertEqual(self.reg, {"User.1": 1, "User.2": 2, "City.1": 3})
+        self.assertEqual(self.reg.count("User"), 2)
+        self.assertEqual(self.reg.count("Place"), 0)
+        self.assertEqual(list(self.reg.keys_of("Place")), [])
+        self.check()
+
+    def test_mutations(self):
+        """Test every way to change the dictionary keeps the classes"""
+        self.reg["User.1"] = 10
+        self.reg["Place.1"] = 4
+        self.check()
+        del self.reg["City.1"]
+        self.assertNotIn("City", self.reg.class_names())
+        self.assertEqual(self.reg.pop("User.1"), 10)
+        self.assertIsNone(self.reg.pop("User.9", None))
+        with self.assertRaises(KeyError):
+            self.reg.pop("User.9")
+        self.check()
+        self.reg.setdefault("City.2", 5)
+        self.reg.update([("City.3", 6)], **{"Amenity.1": 7})
+        self.reg |= {"State.1": 8}
+        self.check()
+        self.assertEqual(self.reg.popitem(), ("State.1", 8))
+        self.check()
+        self.reg.clear()
+        self.assertEqual(self.reg.class_names(), [])
+        self.assertEqual(self.reg.count("User"), 0)
+
+    def test_changed(self):
+        """Test every key stored or removed is recorded"""
+        changed = set()
+        reg = ObjectRegistry({"User.1": 1, "User.2": 2}, changed=changed)
+        self.assertEqual(changed, {"User.1", "User.2"})
+        changed.clear()
+        reg["City.1"] = 3
+        del reg["User.1"]
+        reg.pop("User.9", None)
+        reg.setdefault("City.2", 4)
+        self.assertEqual(changed, {"City.1", "User.1", "City.2"})
+        changed.clear()
+        reg.popitem()
+        self.assertEqual(changed, {"City.2"})
+        reg.clear()
+        self.assertEqual(changed, {"City.2", "User.2", "City.1"})
+
+
+class _Obj:
+    """object with a city_id"""
+    def __init__(self, city_id) -> None:
+        """Initialization of _Obj"""
+        self.city_id = city_id
+
+
+class TestObjectRegistryIndexes(unittest.TestCase):
+    """unittest class for the secondary indexes of ObjectRegistry"""
+    def setUp(self) -> None:
+        """Set up a registry indexing Place.city_id"""
+        self.reg = ObjectRegistry(indexes={"Place": ("city_id",)})
+        self.reg.update({"Place.1": _Obj("c1"), "Place.2": _Obj("c2"),
+                         "Place.3": _Obj("c1"), "City.1": _Obj("c1")})
+
+    def test_lookup(self):
+        """Test the lookups of indexed and plain attributes"""
+        self.assertEqual(self.reg.lookup("Place", "city_id", "c1"),
+                         ["Place.1", "Place.3"])
+        self.assertEqual(self.reg.lookup("City", "city_id", "c1"),
+                         ["City.1"])
+        self.assertEqual(self.reg.lookup("Place", "name", None),
+                         ["Place.1", "Place.2", "Place.3"])
+        self.assertEqual(self.reg.lookup("User", "city_id", "c1"), [])
+
+    def test_lazy_build(self):
+        """Test the index is only built by the first lookup"""
+        reg = ObjectRegistry(indexes={"Place": ("city_id",)})
+        obj = _Obj("c1")
+        reg["Place.1"] = obj
+        obj.city_id = "c2"
+        self.assertEqual(reg.lookup("Place", "city_id", "c2"), ["Place.1"])
+
+    def test_maintained(self):
+        """Test the built index follows the changes of the registry"""
+        self.reg.lookup("Place", "city_id", "c1")
+        self.reg["Place.4"] = _Obj("c1")
+        del self.reg["Place.1"]
+        self.reg["Place.3"] = _Obj("c2")
+        self.assertEqual(self.reg.lookup("Place", "city_id", "c1"),
+                         ["Place.4"])
+        self.reg["Place.4"].city_id = "c2"
+        self.assertEqual(self.reg.lookup("Place", "city_id", "c1"),
+                         ["Place.4"])
+        self.reg.refresh("Place.4")
+        self.assertEqual(self.reg.lookup("Place", "city_id", "c1"), [])
+        self.assertEqual(self.reg.lookup("Place", "city_id", "c2"),
+                         ["Place.2", "Place.3", "Place.4"])
+        self.reg.pop("Place.2")
+        self.reg.clear()
+        self.assertEqual(self.reg.lookup("Place", "city_id", "c2"), [])
+        self.reg["Place.5"] = _Obj("c2")
+        self.assertEqual(self.reg.lookup("Place", "city_id", "c2"),
+                         ["Place.5"])
+
+    def test_unhashable(self):
+        """Test an unhashable value is looked up by going through"""
+        self.reg["Place.4"] = _Obj(["c1"])
+        self.assertEqual(self.reg.lookup("Place", "city_id", ["c1"]),
+                         ["Place.4"])
+
+
+class TestObjectRegistryRanges(unittest.TestCase):
+    """unittest class for the sorted indexes of ObjectRegistry"""
+    def setUp(self) -> None:
+        """Set up a registry sorting Place.city_id"""
+        self.reg = ObjectRegistry(ranges={"Place": ("city_id",)})
+        self.reg.update({"Place.1": _Obj(3), "Place.2": _Obj(1),
+                         "Place.3": _Obj(2), "City.1": _Obj(1)})
+
+    def test_lookup_range(self):
+        """Test the range lookups of indexed and plain attributes"""
+        self.assertEqual(self.reg.lookup_range("Place", "city_id", 2),
+                         ["Place.3", "Place.1"])
+        self.assertEqual(self.reg.lookup_range("City", "city_id", 1, 1),
+                         ["City.1"])
+        self.assertEqual(self.reg.lookup("Place", "city_id", 1),
+                         ["Place.2"])
+
+    def test_maintained(self):
+        """Test the sorted index follows the changes of the registry"""
+        self.assertEqual(self.reg.lookup_range("Place", "city_id"),
+                         ["Place.2", "Place.3", "Place.1"])
+        self.reg["Place.1"].city_id = 0
+        self.reg.refresh("Place.1")
+        self.reg["Place.4"] = _Obj(2)
+        del self.reg["Place.3"]
+        self.assertEqual(self.reg.lookup_range("Place", "city_id"),
+                         ["Place.1", "Place.2", "Place.4"])
+        self.assertEqual(self.reg.lookup("Place", "city_id", "x"), [])
+
+
+class _Point:
+    """object with coordinates"""
+    def __init__(self, latitude, longitude) -> None:
+        """Initialization of _Point"""
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class TestObjectRegistrySpatial(unittest.TestCase):
+    """unittest class for the spatial indexes of ObjectRegistry"""
+    def setUp(self) -> None:
+        """Set up a registry indexing Place coordinates"""
+        self.attrs = ("latitude", "longitude")
+        self.reg = ObjectRegistry(spatial={"Place": self.attrs})
+        self.reg.update({"Place.1": _Point(48.85, 2.35),
+                         "Place.2": _Point(48.80, 2.12),
+                         "City.1": _Point(48.85, 2.35)})
+
+    def test_lookups(self):
+        """Test the box and radius lookups, indexed or not"""
+        for name in ("Place", "City"):
+            self.assertEqual(self.reg.lookup_box(name, self.attrs,
+                                                 48.84, 2, 49, 3),
+                             [name + ".1"])
+            self.assertEqual(self.reg.lookup_near(name, self.attrs,
+                                                  48.85, 2.35, 1),
+                             [name + ".1"])
+        self.assertEqual(self.reg.lookup_near("Place", self.attrs,
+                                              48.80, 2.1, 50),
+                         ["Place.2", "Place.1"])
+        self.assertEqual(self.reg.attribute("Place.2", self.attrs),
+                         (48.80, 2.12))
+
+    def test_maintained(self):
+        """Test the grid follows the changes of the registry"""
+        self.reg.lookup_box("Place", self.attrs, 48, 2, 49, 3)
+        self.reg["Place.1"].latitude = 10
+        self.reg.refresh("Place.1")
+        self.reg["Place.3"] = _Point(48.9, 2.3)
+        del self.reg["Place.2"]
+        self.assertEqual(self.reg.lookup_box("Place", self.attrs,
+                                             48, 2, 49, 3), ["Place.3"])
+
+
+class TestObjectRegistryText(unittest.TestCase):
+    """unittest class for the text indexes of ObjectRegistry"""
+    def setUp(self) -> None:
+        """Set up a registry indexing the words of Place.city_id"""
+        self.attrs = ("city_id",)
+        self.reg = ObjectRegistry(text={"Place": self.attrs})
+        self.reg.update({"Place.1": _Obj("Pool house"),
+                         "Place.2": _Obj("Garden"),
+                         "City.1": _Obj("Pool")})
+
+    def test_lookup_text(self):
+        """Test the text lookups, indexed or not, follow the changes"""
+        for name in ("Place", "City"):
+            self.assertEqual(self.reg.lookup_text(name, self.attrs, "pool"),
+                             [name + ".1"])
+        self.reg["Place.2"].city_id = "Pool garden"
+        self.reg.refresh("Place.2")
+        self.assertEqual(self.reg.lookup_text("Place", self.attrs, "gar",
+                                              prefix=True), ["Place.2"])
+
+    def test_restore(self):
+        """Test a restored index is checked by its first lookup"""
+        index = TextIndex(self.attrs)
+        index.build([("Place.1", ("Garden",)), ("Place.9", ("Garden",))])
+        self.reg.restore("Place", self.attrs, index)
+        self.reg.restore("User", self.attrs, TextIndex(self.attrs))
+        self.assertEqual(self.reg.indexes_of(TextIndex),
+                         [("Place", self.attrs, index)])
+        self.assertEqual(self.reg.lookup_text("Place", self.attrs,
+                                              "garden"), ["Place.2"])
+        self.assertEqual(self.reg.indexes_of(TextIndex),
+                         [("Place", self.attrs, index)])
+
+
+class TestObjectRegistryColumns(unittest.TestCase):
+    """unittest class for the column indexes of ObjectRegistry"""
+    def setUp(self) -> None:
+        """Set up a registry keeping Place.city_id and Place.latitude in
+        columns"""
+        self.attrs = ("city_id", "latitude")
+        self.reg = ObjectRegistry(columns={"Place": self.attrs})
+        self.reg.update({"Place.1": _Point(1, 2), "Place.2": _Point(3, 4),
+                         "Place.3": _Point(1, 6)})
+        for key in self.reg:
+            self.reg[key].city_id = "c" + str(self.reg[key].latitude)
+            self.reg.refresh(key)
+
+    def test_aggregate(self):
+        """Test the aggregations, with columns or not, follow the
+        changes"""
+        self.assertEqual(self.reg.aggregate("Place", self.attrs, "latitude",
+                                            "sum", by="city_id"),
+                         {"c1": 2.0, "c3": 3.0})
+        self.assertEqual(self.reg.aggregate("Place", self.attrs, "longitude",
+                                            "max", by="city_id"),
+                         {"c1": 6.0, "c3": 4.0})
+        del self.reg["Place.1"]
+        self.reg["Place.2"].latitude = 5
+        self.reg.refresh("Place.2")
+        self.assertEqual(self.reg.aggregate("Place", self.attrs,
+                                            "latitude", "mean"), 3.0)
+        self.assertEqual(self.reg.aggregate("Place", self.attrs, None,
+                                            "count", by="city_id"),
+                         {"c1": 1, "c3": 1})
+        self.assertEqual(self.reg.aggregate("City", (), None, "count"), 0)
+        self.assertEqual(len(self.reg.indexes_of(ColumnIndex)),
+                         0 if numpy is None else 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
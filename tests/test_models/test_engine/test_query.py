@@ -0,0 +1,220 @@
+#!/usr/bin/python3
+"""Unittest for Query class
+file name: test_query.py
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from datetime import datetime
+import inspect  # test function and module doc string
+import pycodestyle as pep8
+from models.engine.query import Query
+import models.engine.query as query
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage, _Record
+from models.engine.memory_storage import MemoryStorage
+from models.place import Place
+
+
+class TestQueryDocPep8(unittest.TestCase):
+    """unittest class for Query class
+    documentation and pep8 conformaty"""
+    def test_pep8_base(self):
+        """Test that the query module conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['models/engine/query.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_test_base(self):
+        """Test that the test_query conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['tests/test_models/test_engine/' +
+                                    'test_query.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_module_docstring(self):
+        """test module documentation"""
+        self.assertTrue(len(query.__doc__) > 0)
+
+    def test_class_docstring(self):
+        """test class documentation"""
+        self.assertTrue(len(str(Query.__doc__)) > 0)
+
+    def test_func_docstrings(self):
+        """Tests for the presence of docstrings in all functions"""
+        for func in inspect.getmembers(Query, inspect.isfunction):
+            self.assertTrue(len(str(func[1].__doc__)) > 0)
+
+
+def places() -> list:
+    """returns 60 places in 6 cities, with prices from 0 to 19"""
+    now = datetime.now().isoformat()
+    return [Place(id="{:02d}".format(i), created_at=now, updated_at=now,
+                  city_id="c" + str(i % 6), price_by_night=i % 20,
+                  max_guest=i % 4, name="Loft" if i % 3 else None)
+            for i in range(60)]
+
+
+class TestQuery(unittest.TestCase):
+    """unittest class for the results of the queries"""
+    def setUp(self) -> None:
+        """Set up a memory, a file and a database storage"""
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "file")
+        self.engines = {"memory": MemoryStorage(),
+                        "file": FileStorage(path + ".json"),
+                        "db": DBStorage(path + ".db")}
+        for engine in self.engines.values():
+            for place in places():
+                engine.new(place)
+            engine.save()
+
+    def tearDown(self) -> None:
+        """Close the storages and remove the temporary directory"""
+        self.engines["db"].close()
+        self.tmp.cleanup()
+
+    def check(self, expected, build) -> None:
+        """checks build(engine) yields the ids expected on every engine"""
+        for name, engine in self.engines.items():
+            with self.subTest(engine=name):
+                self.assertEqual([p.id for p in build(engine.query(Place))],
+                                 expected)
+
+    def test_filter(self):
+        """Test every filter operator"""
+        self.check(["03", "09", "21", "27", "45"],
+                   lambda q: q.filter(city_id="c3", price_by_night__lte=10)
+                   .order_by("id"))
+        self.check(["18", "19", "38", "39", "58", "59"],
+                   lambda q: q.filter(price_by_night__gt=17).order_by("id"))
+        self.check(["00", "20", "40"],
+                   lambda q: q.filter(price_by_night__lt=1).order_by("id"))
+        self.check(["19", "39", "59"],
+                   lambda q: q.filter(price_by_night__gte=19,
+                                      max_guest__ne=0).order_by("id"))
+        self.check(["00", "01", "06", "07", "24", "25", "42", "43"],
+                   lambda q: q.filter(city_id__in=("c0", "c1"),
+                                      price_by_night__lte=7).order_by("id"))
+        self.check(["00", "03", "21", "24", "42"],
+                   lambda q: q.filter(name=None, price_by_night__lt=5)
+                   .order_by("id"))
+        self.check([], lambda q: q.filter(city_id="c9"))
+
+    def test_order_limit(self):
+        """Test the order, the ties and the limit"""
+        self.check(["59", "39", "19", "58"],
+                   lambda q: q.order_by("-price_by_night").limit(4))
+        self.check(["00", "20", "40", "01"],
+                   lambda q: q.order_by("price_by_night").limit(4))
+        self.check(["20", "40", "01", "41"],
+                   lambda q: q.filter(name="Loft")
+                   .order_by("price_by_night").limit(4))
+        self.check(["03", "07", "11", "15"],
+                   lambda q: q.filter(max_guest__lt=5)
+                   .order_by("-max_guest", "id").limit(4))
+        self.check(["10", "11"],
+                   lambda q: q.filter(price_by_night__gte=10)
+                   .order_by("id").limit(2))
+        self.check([], lambda q: q.limit(0))
+        for engine in self.engines.values():
+            self.assertEqual(engine.query("Place").filter(city_id="c2")
+                             .order_by("id").first().id, "02")
+            self.assertIsNone(engine.query(Place).filter(city_id="").first())
+
+    def test_updates(self):
+        """Test the queries see the changes of the objects"""
+        for name, engine in self.engines.items():
+            with self.subTest(engine=name), patch("models.storage", engine):
+                place = engine.query(Place).filter(city_id="c4").first()
+                place.city_id = "c9"
+                place.price_by_night = 100
+                self.assertEqual(engine.query(Place).filter(city_id="c9")
+                                 .filter(price_by_night__gt=50)
+                                 .first().id, place.id)
+                engine.delete(place)
+                self.assertIsNone(engine.query(Place)
+                                  .filter(city_id="c9").first())
+
+    def test_errors(self):
+        """Test the invalid filters and limits"""
+        q = self.engines["memory"].query(Place)
+        with self.assertRaises(ValueError):
+            q.filter(price_by_night__like=3)
+        with self.assertRaises(ValueError):
+            q.limit(-1)
+
+
+class TestQueryPlanner(unittest.TestCase):
+    """unittest class for the choice of the index of the queries"""
+    def setUp(self) -> None:
+        """Set up a memory storage"""
+        self.storage = MemoryStorage()
+        for place in places():
+            self.storage.new(place)
+
+    def plan(self, q) -> str:
+        """returns the first word of the plan of q"""
+        return q.explain().split()[0]
+
+    def test_most_selective(self):
+        """Test the index returning the fewest keys is chosen"""
+        q = self.storage.query(Place)
+        self.assertEqual(q.filter(city_id="c1").explain(),
+                         "index Place.city_id eq 'c1' (10 keys)")
+        self.assertEqual(q.filter(city_id="c1", price_by_night=3).explain(),
+                         "sorted index Place.price_by_night in [3, 3] "
+                         "(3 keys)")
+        self.assertEqual(q.filter(city_id="c1", price_by_night__lte=9)
+                         .explain(), "index Place.city_id eq 'c1' (10 keys)")
+        self.assertEqual(q.filter(city_id__in=["c1", "c2"]).explain(),
+                         "index Place.city_id in ('c1', 'c2') (20 keys)")
+
+    def test_scan(self):
+        """Test a scan when no index answers the filters"""
+        q = self.storage.query(Place)
+        self.assertEqual(q.explain(), "scan Place (60 keys)")
+        self.assertEqual(self.plan(q.filter(name="Loft")), "scan")
+        self.assertEqual(self.plan(q.filter(city_id=None)), "scan")
+        self.assertEqual(self.plan(q.filter(city_id=["c1"])), "scan")
+        self.assertEqual(self.plan(q.filter(price_by_night="3")), "scan")
+        self.assertEqual(self.plan(self.storage.query("City")), "scan")
+
+    def test_ordered(self):
+        """Test the sorted index giving the order stops at the limit"""
+        q = self.storage.query(Place).order_by("-price_by_night")
+        self.assertEqual(q.limit(2).explain(),
+                         "ordered reversed sorted index Place.price_by_night "
+                         "in [None, None] (2 keys)")
+        self.assertEqual(self.plan(q.filter(city_id="c1").limit(1)),
+                         "ordered")
+        self.assertEqual(self.plan(q.filter(city_id="c1")), "index")
+        self.assertEqual(self.plan(q.order_by("price_by_night", "id")),
+                         "scan")
+        with patch("models.storage", self.storage):
+            self.storage.all()["Place.00"].price_by_night = None
+        self.assertEqual(self.plan(q.limit(2)), "scan")
+
+    def test_lazy(self):
+        """Test only the objects needed are created in lazy mode"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "file.json")
+            fs = FileStorage(path)
+            for place in places():
+                fs.new(place)
+            fs.save()
+            fs = FileStorage(path, lazy=True)
+            fs.reload()
+            found = iter(fs.query(Place).filter(max_guest=1)
+                         .order_by("price_by_night").limit(2))
+            self.assertEqual(next(found).id, "01")
+            created = [k for k, v in dict.items(fs.all())
+                       if type(v) is not _Record]
+            self.assertEqual(created, ["Place.01"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+"""Unittest for RegistryStorage class
+file name: test_registry_storage.py
+"""
+import unittest
+from unittest.mock import patch
+import inspect  # test function and module doc string
+import pycodestyle as pep8
+from models.engine.registry_storage import RegistryStorage
+import models.engine.registry_storage as registry_storage
+from models.engine.base_storage import BaseStorage
+from models.engine.file_storage import FileStorage
+from models.engine.indexes import REGISTRY_INDEXES
+from models.engine.memory_storage import MemoryStorage
+from models.engine.object_registry import ObjectRegistry
+from models.place import Place
+
+
+class TestRegistryStorageDocPep8(unittest.TestCase):
+    """unittest class for RegistryStorage class
+    documentation and pep8 conformaty"""
+    def test_pep8_base(self):
+        """Test that the registry_storage module conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['models/engine/registry_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_test_base(self):
+        """Test that the test_registry_storage conforms to PEP8."""
+        style = pep8.StyleGuide()
+        result = style.check_files(['tests/test_models/test_engine/' +
+                                    'test_registry_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_module_docstring(self):
+        """test module documentation"""
+        self.assertTrue(len(registry_storage.__doc__) > 0)
+
+    def test_class_docstring(self):
+        """test class documentation"""
+        self.assertTrue(len(str(RegistryStorage.__doc__)) > 0)
+
+    def test_func_docstrings(self):
+        """Tests for the presence of docstrings in all functions"""
+        for func in inspect.getmembers(RegistryStorage, inspect.isfunction):
+            self.assertTrue(len(str(func[1].__doc__)) > 0)
+
+
+class _Storage(RegistryStorage):
+    """smallest engine: the query methods come from RegistryStorage"""
+    def __init__(self) -> None:
+        """Initialization of _Storage"""
+        self.registry = ObjectRegistry(**REGISTRY_INDEXES)
+
+    @property
+    def _objects(self):
+        """the registry of the engine"""
+        return self.registry
+
+    def new(self, obj) -> None:
+        """stores obj"""
+        self.registry[obj.__class__.__name__ + "." + obj.id] = obj
+
+    def delete(self, obj=None) -> None:
+        """removes obj"""
+        self.registry.pop(obj.__class__.__name__ + "." + obj.id, None)
+
+    def save(self) -> None:
+        """nothing to persist"""
+
+    def reload(self) -> None:
+        """nothing to read"""
+
+
+class TestRegistryStorage(unittest.TestCase):
+    """unittest class for RegistryStorage class"""
+    def setUp(self) -> None:
+        """Set up an engine holding a few places"""
+        self.storage = _Storage()
+        with patch("models.storage", self.storage):
+            self.places = [Place(id=str(i), city_id="c" + str(i % 2),
+                                 price_by_night=i, latitude=48.0 + i,
+                                 longitude=2.0, name="loft " + str(i))
+                           for i in range(4)]
+            for place in self.places:
+                self.storage.new(place)
+
+    def test_engines(self):
+        """Test the registry engines share RegistryStorage"""
+        self.assertTrue(issubclass(RegistryStorage, BaseStorage))
+        self.assertTrue(issubclass(MemoryStorage, RegistryStorage))
+        self.assertTrue(issubclass(FileStorage, RegistryStorage))
+        with self.assertRaises(TypeError):
+            RegistryStorage()
+
+    def test_queries(self):
+        """Test the queries read the registry of the engine"""
+        self.assertIs(self.storage.all(), self.storage.registry)
+        self.assertEqual(self.storage.count(Place), 4)
+        self.assertEqual(self.storage.count("City"), 0)
+        self.assertEqual(list(self.storage.lookup(Place, "city_id", "c1")),
+                         ["Place.1", "Place.3"])
+        self.assertEqual(list(self.storage.lookup_range(
+            "Place", "price_by_night", 1, 2)), ["Place.1", "Place.2"])
+        self.assertEqual(list(self.storage.lookup_box(
+            Place, 48.5, 1.0, 50.5, 3.0)), ["Place.1", "Place.2"])
+        self.assertEqual(list(self.storage.lookup_radius(
+            Place, 51.0, 2.0, 10)), ["Place.3"])
+        self.assertEqual(list(self.storage.search(Place, "loft 2")),
+                         ["Place.2"])
+        self.assertEqual(self.storage.aggregate(Place, "price_by_night",
+                                                by="city_id"),
+                         {"c0": 2, "c1": 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,6 +17,7 @@ from models.place import Place
 from models.base_model import BaseModel
 import models.place as place_model
 from models import storage
+from models.engine.file_storage import FileStorage
 
 
 class TestPlaceDocPep8(unittest.TestCase):
@@ -58,7 +59,10 @@ class TestPlaceClassWorking(unittest.TestCase):
     """unittest class for Place class when everything works"""
     def setUp(self) -> None:
         """Set up instances and variables"""
-        self.__file_path = storage._FileStorage__file_path
+        # the content of the file is only checked with FileStorage
+        self.__file_path = None
+        if isinstance(storage, FileStorage):
+            self.__file_path = storage._FileStorage__file_path
         self.instances = [Place()]
         self.instances.append(Place())
         self.id_pattern = re.compile(r'^[0-9a-fA-F]{8}-' +
@@ -163,7 +167,7 @@ class TestPlaceClassWorking(unittest.TestCase):
         # test correct values represented
         self.assertEqual(match.group(1), place.__class__.__name__)
         self.assertEqual(match.group(2), place.id)
-        self.assertEqual(match.group(3), str(place.__dict__))
+        self.assertEqual(match.group(3), str(place.attributes()))
         # test same class instance has same value
         self.assertEqual(match.group(1), new.__class__.__name__)
         with redirect_stdout(StringIO()) as f:
@@ -174,7 +178,7 @@ class TestPlaceClassWorking(unittest.TestCase):
         """test the to_dict method of the instance of Place
         """
         place = self.instances[0]
-        dic = place.__dict__
+        dic = place.attributes()
         to_dic = place.to_dict()
         for k, v in dic.items():
             if k not in ["created_at", "updated_at"]:
@@ -267,7 +271,7 @@ class TestPlaceClassWorking(unittest.TestCase):
             self.fail()
 
     def test_saving(self) -> None:
-        """test the FileStorage saving of the instance of Place
+        """test the storage saving of the instance of Place
         """
         place = self.instances[0]
 
@@ -283,40 +287,33 @@ class TestPlaceClassWorking(unittest.TestCase):
         self.assertTrue(place in storage.all().values())
         self.assertTrue(hasattr(storage.all()[place.__class__.__name__ +
                                               "." + place.id], "updated_at"))
-        try:
+        if self.__file_path is not None:
             self.assertTrue(os.path.exists(self.__file_path))
             with open(self.__file_path, "r", encoding="utf-8") as f:
                 content = load(f)
-        except IOError:
-            pass
-        self.assertIn(key, content)
-        self.assertEqual(content[key], place.to_dict())
+            self.assertIn(key, content)
+            self.assertEqual(content[key], place.to_dict())
 
     def test_deleting(self) -> None:
-        """test the FileStorage deleting of the instance of Place
+        """test the storage deleting of the instance of Place
         """
         # test deleting
         new2 = Place()
         new2.save()
-        try:
+        key = new2.__class__.__name__ + "." + new2.id
+        self.assertIn(key, storage.all())
+        if self.__file_path is not None:
             with open(self.__file_path, "r", encoding="utf-8") as f:
-                content = load(f).values()
-        except IOError:
-            pass
-        self.assertTrue(new2.to_dict() in content)
-        del storage.all()[new2.__class__.__name__ +
-                          "." + new2.id]
+                self.assertIn(new2.to_dict(), load(f).values())
+        storage.delete(new2)
         storage.save()
-        try:
+        self.assertNotIn(key, storage.all())
+        if self.__file_path is not None:
             with open(self.__file_path, "r", encoding="utf-8") as f:
-                content = load(f).values()
-        except IOError:
-            pass
-        self.assertFalse(new2.to_dict() in content)
+                self.assertNotIn(new2.to_dict(), load(f).values())
 
     def tearDown(self) -> None:
         """Tear down instances and variables"""
         for instance in self.instances:
-            del storage.all()[instance.__class__.__name__ +
-                              "." + instance.id]
+            storage.delete(instance)
         storage.save()
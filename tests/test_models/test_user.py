@@ -17,6 +17,7 @@ from models.user import User
 from models.base_model import BaseModel
 import models.user as user_model
 from models import storage
+from models.engine.file_storage import FileStorage
 
 
 class TestUserDocPep8(unittest.TestCase):
@@ -58,7 +59,10 @@ class TestUserClassWorking(unittest.TestCase):
     """unittest class for User class when everything works"""
     def setUp(self) -> None:
         """Set up instances and variables"""
-        self.__file_path = storage._FileStorage__file_path
+        # the content of the file is only checked with FileStorage
+        self.__file_path = None
+        if isinstance(storage, FileStorage):
+            self.__file_path = storage._FileStorage__file_path
         self.instances = [User()]
         self.instances.append(User())
         self.id_pattern = re.compile(r'^[0-9a-fA-F]{8}-' +
@@ -140,7 +144,7 @@ class TestUserClassWorking(unittest.TestCase):
         # test correct values represented
         self.assertEqual(match.group(1), user.__class__.__name__)
         self.assertEqual(match.group(2), user.id)
-        self.assertEqual(match.group(3), str(user.__dict__))
+        self.assertEqual(match.group(3), str(user.attributes()))
         # test same class instance has same value
         self.assertEqual(match.group(1), new.__class__.__name__)
         with redirect_stdout(StringIO()) as f:
@@ -151,7 +155,7 @@ class TestUserClassWorking(unittest.TestCase):
         """test the to_dict method of the instance of User
         """
         user = self.instances[0]
-        dic = user.__dict__
+        dic = user.attributes()
         to_dic = user.to_dict()
         for k, v in dic.items():
             if k not in ["created_at", "updated_at"]:
@@ -230,7 +234,7 @@ class TestUserClassWorking(unittest.TestCase):
             self.fail()
 
     def test_saving(self) -> None:
-        """test the FileStorage saving of the instance of User
+        """test the storage saving of the instance of User
         """
         user = self.instances[0]
 
@@ -246,40 +250,33 @@ class TestUserClassWorking(unittest.TestCase):
         self.assertTrue(user in storage.all().values())
         self.assertTrue(hasattr(storage.all()[user.__class__.__name__ +
                                               "." + user.id], "updated_at"))
-        try:
+        if self.__file_path is not None:
             self.assertTrue(os.path.exists(self.__file_path))
             with open(self.__file_path, "r", encoding="utf-8") as f:
                 content = load(f)
-        except IOError:
-            pass
-        self.assertIn(key, content)
-        self.assertEqual(content[key], user.to_dict())
+            self.assertIn(key, content)
+            self.assertEqual(content[key], user.to_dict())
 
     def test_deleting(self) -> None:
-        """test the FileStorage deleting of the instance of User
+        """test the storage deleting of the instance of User
         """
         # test deleting
         new2 = User()
         new2.save()
-        try:
+        key = new2.__class__.__name__ + "." + new2.id
+        self.assertIn(key, storage.all())
+        if self.__file_path is not None:
             with open(self.__file_path, "r", encoding="utf-8") as f:
-                content = load(f).values()
-        except IOError:
-            pass
-        self.assertTrue(new2.to_dict() in content)
-        del storage.all()[new2.__class__.__name__ +
-                          "." + new2.id]
+                self.assertIn(new2.to_dict(), load(f).values())
+        storage.delete(new2)
         storage.save()
-        try:
+        self.assertNotIn(key, storage.all())
+        if self.__file_path is not None:
             with open(self.__file_path, "r", encoding="utf-8") as f:
-                content = load(f).values()
-        except IOError:
-            pass
-        self.assertFalse(new2.to_dict() in content)
+                self.assertNotIn(new2.to_dict(), load(f).values())
 
     def tearDown(self) -> None:
         """Tear down instances and variables"""
         for instance in self.instances:
-            del storage.all()[instance.__class__.__name__ +
-                              "." + instance.id]
+            storage.delete(instance)
         storage.save()